@@ -0,0 +1,93 @@
+"""Block read and write cost of the disk image. \n
+Compares the previous readBlock/writeBlock, which opened the image on every block, against BlockDevice with
+pread and with the read-only mmap. "cat" reads one file block by block and joins it, like readFile; the threaded
+run does the same from several session threads sharing one device. \n
+Run from the Zacopot directory: python -m benchmarks.bench_block_device --file-kib 1024 --threads 8"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.block_device import BlockDevice
+from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS
+
+
+def legacy_read_block(block_number: int, disk_file_name: str) -> bytes:
+    with open(disk_file_name, 'rb') as disk_file:
+        disk_file.seek(block_number * BLOCK_SIZE)
+        return disk_file.read(BLOCK_SIZE)
+
+
+def legacy_write_block(block_number: int, data: bytes, disk_file_name: str):
+    with open(disk_file_name, 'r+b') as disk_file:
+        disk_file.seek(block_number * BLOCK_SIZE)
+        disk_file.write(data)
+
+
+def measure(work, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        work()
+    return (time.perf_counter() - start) / rounds
+
+
+def threaded(work, threads: int, rounds: int) -> float:
+    """Seconds per round with every thread running work once per round"""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            list(pool.map(lambda _: work(), range(threads)))
+        return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--file-kib', type=int, default=1024, help='size of the file read by cat')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(prefix='zacopot_disk_')
+    os.close(fd)
+    blocks = list(range(0, min(args.file_kib * 1024 // BLOCK_SIZE, TOTAL_BLOCKS)))
+    with open(path, 'wb') as f:
+        f.write(os.urandom(len(blocks) * BLOCK_SIZE))
+    block = os.urandom(BLOCK_SIZE)
+
+    device = BlockDevice(path, use_mmap=False)
+    readers = {
+        'legacy': lambda n: legacy_read_block(n, path),
+        'pread': device.read,
+        'mmap': BlockDevice(path).read,
+    }
+    writers = {
+        'legacy': lambda n: legacy_write_block(n, block, path),
+        'pwrite': lambda n: device.write(n, block),
+    }
+    expected = b''.join([legacy_read_block(n, path) for n in blocks])
+
+    result = {'file_bytes': len(blocks) * BLOCK_SIZE, 'threads': args.threads}
+    for name, read in readers.items():
+        def cat(read=read):
+            return b''.join([read(n) for n in blocks])
+
+        assert cat() == expected
+        seconds = measure(cat, args.rounds)
+        result[f'cat_{name}'] = {
+            'ms': round(seconds * 1000, 3),
+            'us_per_block': round(seconds / len(blocks) * 1e6, 2),
+            'threaded_mb_per_second': round(
+                len(blocks) * BLOCK_SIZE * args.threads / threaded(cat, args.threads, args.rounds) / 1e6, 1),
+        }
+    for name, write in writers.items():
+        seconds = measure(lambda: [write(n) for n in blocks], args.rounds)
+        result[f'write_{name}'] = {'us_per_block': round(seconds / len(blocks) * 1e6, 2)}
+
+    print(json.dumps(result, indent=2))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Image size and cat latency of compressed lure files. \n
+Builds the same text-heavy tree, CSV exports, SQL dumps and logs like the ones generate_fs writes, into images
+stored raw and compressed with each codec. cat is timed cold, with the block and extent caches cleared, and
+warm, served from the decompressed extent cache. \n
+Run from the Zacopot directory: python -m benchmarks.bench_compression --files 200 --file-kib 64"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from core.command_parser import command_parser
+from core.image import write_image, load_image
+from core.template import build_template
+from utils.block_cache import BLOCK_CACHE, EXTENT_CACHE
+from utils.block_device import close_device
+
+SPECIES = ('Lynx lynx', 'Bison bonasus', 'Canis lupus', 'Ursus arctos', 'Aquila chrysaetos', 'Castor fiber')
+AREAS = ('Carpathian Mountains', 'Bialowieza Forest', 'Retezat National Park', 'Shatsk Lakes', 'Danube Delta')
+
+
+def lines(kind: str, rng: random.Random, size: int) -> bytes:
+    """About size bytes of one kind of lure text"""
+    out, total = [], 0
+    while total < size:
+        number = len(out)
+        if kind == 'csv':
+            line = f'{number},{rng.choice(SPECIES)},{rng.choice(AREAS)},{rng.randint(1, 900)},{rng.random():.6f}\n'
+        elif kind == 'sql':
+            line = (f"INSERT INTO sightings VALUES ({number}, '{rng.choice(SPECIES)}', '{rng.choice(AREAS)}', "
+                    f"'2025-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}');\n")
+        else:
+            address = '.'.join(str(rng.randint(0, 255)) for _ in range(3))
+            line = (f'2025-06-{rng.randint(1, 30):02} {rng.randint(0, 23):02}:{rng.randint(0, 59):02} '
+                    f'sshd[{rng.randint(100, 9999)}]: Failed password for invalid user admin from 10.{address}\n')
+        out.append(line)
+        total += len(line)
+    return ''.join(out).encode()
+
+
+def make_source(root: str, files: int, file_kib: int) -> str:
+    rng = random.Random(7)
+    source = os.path.join(root, 'source')
+    for index in range(files):
+        kind = ('csv', 'sql', 'log')[index % 3]
+        directory = os.path.join(source, kind)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'file{index}.{kind}'), 'wb') as f:
+            f.write(lines(kind, rng, file_kib * 1024))
+    return source
+
+
+def cat_seconds(file_system, commands: list[str], cold: bool) -> float:
+    """Median seconds of one cat"""
+    times = []
+    for command in commands:
+        if cold:
+            BLOCK_CACHE.clear()
+            EXTENT_CACHE.clear()
+        start = time.perf_counter()
+        command_parser(file_system, command)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--file-kib', type=int, default=64)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='zacopot_compression_')
+    images = []
+    try:
+        source = make_source(root, args.files, args.file_kib)
+        commands = [f'cat {kind}/file{index}.{kind}' for index, kind in
+                    ((index, ('csv', 'sql', 'log')[index % 3]) for index in range(args.files))]
+        result = {'source_mib': round(args.files * args.file_kib / 1024, 1)}
+        expected = None
+        for codec in (None, 'zlib', 'lzma'):
+            image = os.path.join(root, f'{codec}.bin')
+            images.append(image)
+            start = time.perf_counter()
+            write_image(build_template(source, image, codec=codec), image)
+            build_seconds = time.perf_counter() - start
+            session = load_image(image).fork()
+
+            output = command_parser(session, commands[-1])
+            expected = expected or output
+            assert output == expected
+
+            cold = cat_seconds(session, commands, cold=True)
+            cat_seconds(session, commands, cold=False)      # fill the caches
+            result[codec or 'raw'] = {
+                'image_mib': round(os.path.getsize(image) / 2 ** 20, 2),
+                'build_ms': round(build_seconds * 1000, 1),
+                'cold_cat_ms': round(cold * 1000, 3),
+                'warm_cat_ms': round(cat_seconds(session, commands, cold=False) * 1000, 3),
+            }
+        print(json.dumps(result, indent=2))
+    finally:
+        for image in images:
+            close_device(image)
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Disk and block cache footprint of a decoy tree full of copies. \n
+Every home directory gets the same shell dotfiles and a copy of one of a few CSV exports, like the trees
+generate_fs produces. The tree is loaded with and without block deduplication, then every file is read once
+through a cold block cache. \n
+Run from the Zacopot directory: python -m benchmarks.bench_dedup --homes 500 --exports 5 --export-kib 64"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from core.command_parser import command_parser
+from core.filesystem import FileSystem
+from core.template import build_template
+from utils.block_cache import BLOCK_CACHE
+from utils.block_device import close_device
+from utils.constants import BLOCK_SIZE
+from utils.utils import readFile
+
+
+def make_source(root: str, homes: int, exports: int, export_kib: int) -> str:
+    source = os.path.join(root, 'source')
+    dotfiles = {'.bashrc': os.urandom(1800).hex().encode(), '.profile': os.urandom(400).hex().encode(),
+                '.bash_logout': b''}
+    rows = [os.urandom(export_kib * 512).hex().encode() for _ in range(exports)]
+    for index in range(homes):
+        home = os.path.join(source, 'home', f'user{index}')
+        os.makedirs(home)
+        for name, content in dotfiles.items():
+            with open(os.path.join(home, name), 'wb') as f:
+                f.write(content)
+        with open(os.path.join(home, 'export.csv'), 'wb') as f:
+            f.write(rows[index % exports])
+    return source
+
+
+def load(source: str, disk_file: str, dedup: bool) -> tuple[FileSystem, float]:
+    start = time.perf_counter()
+    file_system = build_template(source, disk_file, dedup=dedup)
+    return file_system, time.perf_counter() - start
+
+
+def read_everything(file_system: FileSystem) -> tuple[int, float]:
+    """Block cache bytes after reading every file once from a cold cache, and the time it took"""
+    BLOCK_CACHE.clear()
+    start = time.perf_counter()
+    for inode_number in file_system.inodes:
+        inode_obj = file_system.inodes[inode_number]
+        if inode_obj.file_type == 0:
+            readFile(inode_obj, file_system.disk_file)
+    return BLOCK_CACHE.size, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--homes', type=int, default=500)
+    parser.add_argument('--exports', type=int, default=5)
+    parser.add_argument('--export-kib', type=int, default=64)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='zacopot_dedup_')
+    try:
+        source = make_source(root, args.homes, args.exports, args.export_kib)
+        result = {'homes': args.homes}
+        file_systems = {}
+        for dedup in (False, True):
+            disk_file = os.path.join(root, f'disk_{dedup}.bin')
+            file_system, seconds = load(source, disk_file, dedup)
+            cache_bytes, read_seconds = read_everything(file_system)
+            stats = file_system.superblock.dedup_stats()
+            result['dedup' if dedup else 'raw'] = {
+                'load_ms': round(seconds * 1000, 1),
+                'stored_mib': round(stats['stored_blocks'] * BLOCK_SIZE / 2 ** 20, 1),
+                'referenced_mib': round(stats['referenced_blocks'] * BLOCK_SIZE / 2 ** 20, 1),
+                'ratio': stats['ratio'],
+                'read_all_ms': round(read_seconds * 1000, 1),
+                'cache_mib_after_reading_all': round(cache_bytes / 2 ** 20, 1),
+            }
+            file_systems[dedup] = file_system
+
+        path = f'home/user{args.homes - 1}/export.csv'
+        assert command_parser(file_systems[True], f'cat {path}') == command_parser(file_systems[False], f'cat {path}')
+        print(json.dumps(result, indent=2))
+    finally:
+        for dedup in (False, True):
+            close_device(os.path.join(root, f'disk_{dedup}.bin'))
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
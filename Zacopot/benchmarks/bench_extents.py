@@ -0,0 +1,98 @@
+"""Save and read cost of large lure files. \n
+Compares the previous layout, one padded block write per allocate_block() and a readFile that concatenated
+block after block (quadratic in the file size), against extents written and read with one call each. \n
+Run from the Zacopot directory: python -m benchmarks.bench_extents --sizes-mib 1,4,16"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from core.filesystem import FileSystem, Superblock
+from utils.constants import BLOCK_SIZE
+from utils.utils import block_iter, readFile
+
+
+def make_file_system(disk_file: str, total_blocks: int) -> FileSystem:
+    """Filesystem with a superblock large enough for multi-MiB files"""
+    file_system = FileSystem(disk_file)
+    file_system.superblock = Superblock(total_blocks=total_blocks)
+    file_system.superblock.inodes.take(file_system.root_inode)
+    return file_system
+
+
+def legacy_save(file_system: FileSystem, path: str) -> list[int]:
+    blocks = []
+    for block_data in block_iter(path):
+        if len(block_data) < BLOCK_SIZE:
+            block_data = block_data.ljust(BLOCK_SIZE, b'\x00')
+        block_number = file_system.superblock.allocate_block()
+        blocks.append(block_number)
+        with open(file_system.disk_file, 'r+b') as disk_file:
+            disk_file.seek(block_number * BLOCK_SIZE)
+            disk_file.write(block_data)
+    return blocks
+
+
+def legacy_read(blocks: list[int], size: int, disk_file_name: str) -> bytes:
+    content = b''
+    for block_number in blocks:
+        with open(disk_file_name, 'rb') as disk_file:
+            disk_file.seek(block_number * BLOCK_SIZE)
+            content += disk_file.read(BLOCK_SIZE)
+    return content[:size]
+
+
+def timed(work, rounds: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = work()
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes-mib', default='1,4,16', help='comma separated file sizes')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    sizes = [int(float(size) * 1024 * 1024) for size in args.sizes_mib.split(',')]
+
+    root = tempfile.mkdtemp(prefix='zacopot_extents_')
+    total_blocks = 2 * sum(-(-size // BLOCK_SIZE) for size in sizes) + 1
+    disk_file = os.path.join(root, 'disk_file.bin')
+    with open(disk_file, 'wb') as f:
+        f.truncate((total_blocks + 1) * BLOCK_SIZE)
+
+    result = {}
+    for size in sizes:
+        path = os.path.join(root, f'lure_{size}.bin')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+
+        legacy_fs = make_file_system(disk_file, total_blocks)
+        save_legacy, blocks = timed(lambda: legacy_save(legacy_fs, path), 1)
+        read_legacy, content = timed(lambda: legacy_read(blocks, size, disk_file), args.rounds)
+
+        extent_fs = make_file_system(disk_file, total_blocks)
+        save_extents, _ = timed(lambda: extent_fs.saveFile(path, 'lure'), 1)
+        inode = extent_fs.inodes[extent_fs.inodes[extent_fs.root_inode].get_inode('lure')]
+        read_extents, extent_content = timed(lambda: readFile(inode, disk_file), args.rounds)
+        assert content == extent_content
+
+        result[f'{size // 1024} KiB'] = {
+            'extents': len(inode.extents),
+            'save_legacy_ms': round(save_legacy * 1000, 2),
+            'save_extents_ms': round(save_extents * 1000, 2),
+            'read_legacy_ms': round(read_legacy * 1000, 2),
+            'read_extents_ms': round(read_extents * 1000, 2),
+            'read_speedup': round(read_legacy / read_extents, 1),
+        }
+        os.remove(path)
+
+    print(json.dumps(result, indent=2))
+    os.remove(disk_file)
+    os.rmdir(root)
+
+
+if __name__ == '__main__':
+    main()
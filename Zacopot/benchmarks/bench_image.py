@@ -0,0 +1,76 @@
+"""Boot cost of the template filesystem. \n
+Compares loading the source directory with fs_loader, what every start did before, against mapping an image
+compiled once with build_image. \n
+Run from the Zacopot directory: python -m benchmarks.bench_image --files 10000 --file-kib 4"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from core.command_parser import command_parser
+from core.filesystem import FileSystem
+from core.image import build_image, load_image
+from utils.block_device import close_device
+from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS
+from utils.loader import fs_loader
+
+
+def make_source(root: str, files: int, file_kib: int, per_dir: int) -> str:
+    source = os.path.join(root, 'source')
+    for index in range(files):
+        directory = os.path.join(source, f'dir{index // per_dir}')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'file{index}.txt'), 'wb') as f:
+            f.write(os.urandom(file_kib * 1024))
+    return source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--file-kib', type=int, default=4)
+    parser.add_argument('--per-dir', type=int, default=100)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='zacopot_image_')
+    try:
+        source = make_source(root, args.files, args.file_kib, args.per_dir)
+        disk_file = os.path.join(root, 'disk_file.bin')
+        image = os.path.join(root, 'fs_image.bin')
+
+        start = time.perf_counter()
+        with open(disk_file, 'wb') as f:
+            f.truncate(TOTAL_BLOCKS * BLOCK_SIZE)
+        file_system = FileSystem(disk_file)
+        fs_loader(file_system, source)
+        loader_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        build_image(source, image)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mapped = load_image(image)
+        load_seconds = time.perf_counter() - start
+
+        path = f'dir{(args.files - 1) // args.per_dir}/file{args.files - 1}.txt'
+        assert command_parser(mapped, f'cat {path}') == command_parser(file_system, f'cat {path}')
+
+        print(json.dumps({
+            'files': args.files,
+            'source_mib': round(args.files * args.file_kib / 1024, 1),
+            'image_mib': round(os.path.getsize(image) / 2 ** 20, 1),
+            'fs_loader_ms': round(loader_seconds * 1000, 1),
+            'build_image_ms': round(build_seconds * 1000, 1),
+            'load_image_ms': round(load_seconds * 1000, 2),
+            'speedup': round(loader_seconds / load_seconds),
+        }, indent=2))
+    finally:
+        close_device(image)
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
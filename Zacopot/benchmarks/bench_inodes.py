@@ -0,0 +1,85 @@
+"""Memory and lookup cost of a large template inode table. \n
+Builds a template of Inode and Directory objects, the previous representation, then packs it into a
+CompactInodeTable and drops the objects. Memory is what tracemalloc still sees held by each, file and directory
+names included. Lookups resolve names through Directory dicts against bisection over the sorted entry arrays. \n
+Run from the Zacopot directory: python -m benchmarks.bench_inodes --files 10000,100000 --per-dir 100"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from core.filesystem import InodeTable
+from models.inode_store import CompactInodeTable
+from models.models import Inode, Directory
+
+
+def build_objects(files: int, per_dir: int) -> InodeTable:
+    """Root with one directory per per_dir files"""
+    table = InodeTable()
+    table[1] = root = Directory('/', 1, 1)
+    inode_number = 2
+    for d in range(-(-files // per_dir)):
+        directory = Directory(f'dir{d}', inode_number, 1, path=f'/dir{d}/')
+        table[inode_number] = directory
+        root.add(directory.dirname, inode_number)
+        inode_number += 1
+        for f in range(min(per_dir, files - d * per_dir)):
+            name = f'file_{d}_{f}.log'
+            inode_obj = Inode(inode_number, 0, size=4096 + f, owner='admin', group='admin')
+            inode_obj.extents = [(inode_number * 2, 2)]
+            table[inode_number] = inode_obj
+            directory.add(name, inode_number)
+            inode_number += 1
+    return table
+
+
+def lookup_names(files: int, per_dir: int) -> list[tuple[int, str]]:
+    """(directory inode, file name) of every file in build_objects"""
+    return [(2 + d * (per_dir + 1), f'file_{d}_{f}.log')
+            for d in range(-(-files // per_dir)) for f in range(min(per_dir, files - d * per_dir))]
+
+
+def lookups_per_second(table, names: list[tuple[int, str]]) -> float:
+    start = time.perf_counter()
+    for dir_inode, name in names:
+        table.get(table.get(dir_inode).get_inode(name)).size
+    return len(names) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', default='10000,100000', help='comma separated file counts')
+    parser.add_argument('--per-dir', type=int, default=100)
+    args = parser.parse_args()
+
+    result = {}
+    for files in (int(count) for count in args.files.split(',')):
+        names = lookup_names(files, args.per_dir)
+        gc.collect()
+        tracemalloc.start()
+        table = build_objects(files, args.per_dir)
+        objects_bytes = tracemalloc.get_traced_memory()[0]
+        object_lookups = lookups_per_second(table, names)
+
+        compact = CompactInodeTable(table)
+        del table
+        gc.collect()
+        compact_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        result[f'{files} files'] = {
+            'objects_mib': round(objects_bytes / 2 ** 20, 1),
+            'compact_mib': round(compact_bytes / 2 ** 20, 1),
+            'bytes_per_inode_objects': round(objects_bytes / len(compact)),
+            'bytes_per_inode_compact': round(compact_bytes / len(compact)),
+            'object_lookups_per_second': round(object_lookups),
+            'compact_lookups_per_second': round(lookups_per_second(compact, names)),
+        }
+        del compact, names
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
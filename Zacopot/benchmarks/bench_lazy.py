@@ -0,0 +1,76 @@
+"""Startup cost of a large decoy tree. \n
+Compares copying every source file into the disk file, what fs_loader always did, against recording only the
+source path, size and times of each file. Reads are timed on both: the first cat of a lazily loaded file opens
+its source file, later ones are served from the shared block cache. \n
+Run from the Zacopot directory: python -m benchmarks.bench_lazy --files 10000 --file-kib 16"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from core.command_parser import command_parser
+from core.template import build_template
+from utils.block_device import close_device
+
+
+def make_source(root: str, files: int, file_kib: int, per_dir: int) -> str:
+    source = os.path.join(root, 'source')
+    for index in range(files):
+        directory = os.path.join(source, f'home{index // per_dir}')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'file{index}.log'), 'wb') as f:
+            f.write(os.urandom(file_kib * 512).hex().encode())
+    return source
+
+
+def timed(work) -> float:
+    start = time.perf_counter()
+    work()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--file-kib', type=int, default=16)
+    parser.add_argument('--per-dir', type=int, default=100)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='zacopot_lazy_')
+    eager_disk, lazy_disk = os.path.join(root, 'eager.bin'), os.path.join(root, 'lazy.bin')
+    try:
+        source = make_source(root, args.files, args.file_kib, args.per_dir)
+
+        start = time.perf_counter()
+        eager = build_template(source, eager_disk, lazy=False)
+        eager_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        lazy = build_template(source, lazy_disk, lazy=True)
+        lazy_seconds = time.perf_counter() - start
+
+        command = f'cat home{(args.files - 1) // args.per_dir}/file{args.files - 1}.log'
+        session = lazy.fork()
+        first_read = timed(lambda: command_parser(session, command))
+        cached_read = timed(lambda: command_parser(session, command))
+        assert command_parser(session, command) == command_parser(eager.fork(), command)
+
+        print(json.dumps({
+            'files': args.files,
+            'source_mib': round(args.files * args.file_kib / 1024, 1),
+            'eager_build_ms': round(eager_seconds * 1000, 1),
+            'lazy_build_ms': round(lazy_seconds * 1000, 1),
+            'eager_blocks_used': eager.superblock.total_blocks - eager.superblock.free_block_count,
+            'lazy_blocks_used': lazy.superblock.total_blocks - lazy.superblock.free_block_count,
+            'first_cat_ms': round(first_read * 1000, 3),
+            'cached_cat_ms': round(cached_read * 1000, 3),
+        }, indent=2))
+    finally:
+        close_device(eager_disk)
+        close_device(lazy_disk)
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
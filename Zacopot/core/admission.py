@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+from utils.constants import ADMISSION_RATE, ADMISSION_BURST, ADMISSION_MAX_PER_IP, ADMISSION_MIN_LIMIT, \
+    ADMISSION_ADAPT_INTERVAL, ADMISSION_CPU_HIGH, ADMISSION_LATENCY_HIGH, MAX_CONNECTIONS
+
+ACCEPT = 'accept'
+REJECT = 'reject'
+TARPIT = 'tarpit'
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate        # tokens per second
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class AdmissionController:
+    """Decides which new connections get a full SSH session. \n
+    Each source IP has a connection rate bucket and a cap on concurrent sessions, abusive IPs are tarpitted.
+    The global session limit adapts to measured CPU use and handshake latency"""
+
+    def __init__(self, command_logger,
+                 rate: float = ADMISSION_RATE,
+                 burst: float = ADMISSION_BURST,
+                 max_per_ip: int = ADMISSION_MAX_PER_IP,
+                 max_limit: int = MAX_CONNECTIONS,
+                 min_limit: int = ADMISSION_MIN_LIMIT,
+                 adapt_interval: float = ADMISSION_ADAPT_INTERVAL,
+                 cpu_high: float = ADMISSION_CPU_HIGH,
+                 latency_high: float = ADMISSION_LATENCY_HIGH,
+                 tarpit: bool = True,
+                 cpu_clock=time.process_time):
+        self.command_logger = command_logger
+        self.rate = rate
+        self.burst = burst
+        self.max_per_ip = max_per_ip
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.adapt_interval = adapt_interval
+        self.cpu_high = cpu_high
+        self.latency_high = latency_high
+        self.tarpit = tarpit
+        self.cpu_clock = cpu_clock
+
+        self.limit = max_limit          # current global session limit
+        self.buckets: dict[str, TokenBucket] = {}
+        self.active: dict[str, int] = {}    # ip -> open sessions
+        self.latencies = deque(maxlen=1024)     # recent handshake latencies, appended from transport threads
+        self.cpu_usage = 0.0
+        self.handshake_latency = 0.0
+
+        now = time.monotonic()
+        self._adapt_time = now
+        self._adapt_cpu = cpu_clock()
+        self._lock = threading.Lock()
+
+    def admit(self, addr: tuple[str, int], active_sessions: int, now: float | None = None) -> str:
+        """Returns ACCEPT, REJECT or TARPIT for a new connection"""
+        ip, port = addr
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            bucket = self.buckets.get(ip)
+            if bucket is None:
+                bucket = self.buckets[ip] = TokenBucket(self.rate, self.burst, now)
+
+            if not bucket.take(now):
+                decision, reason = TARPIT if self.tarpit else REJECT, 'rate limit'
+            elif self.active.get(ip, 0) >= self.max_per_ip:
+                decision, reason = TARPIT if self.tarpit else REJECT, 'too many sessions from ip'
+            elif active_sessions >= self.limit:
+                decision, reason = REJECT, f'global limit {self.limit}'
+            else:
+                decision, reason = ACCEPT, None
+                self.active[ip] = self.active.get(ip, 0) + 1
+
+        if reason:
+            self.command_logger.info(f'Client: {ip}:{port} | Admission: {decision} | Reason: {reason}')
+        else:
+            self.command_logger.info(f'Client: {ip}:{port} | Admission: {decision}')
+        return decision
+
+    def release(self, ip: str):
+        """Called once an accepted session is closed"""
+        with self._lock:
+            count = self.active.get(ip, 0) - 1
+            if count > 0:
+                self.active[ip] = count
+            else:
+                self.active.pop(ip, None)
+
+    def record_handshake(self, latency: float):
+        self.latencies.append(latency)
+
+    def adapt(self, now: float | None = None):
+        """Adjusts the global limit, additive increase and multiplicative decrease"""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._adapt_time
+        if elapsed < self.adapt_interval:
+            return
+
+        cpu = self.cpu_clock()
+        self.cpu_usage = (cpu - self._adapt_cpu) / elapsed
+        self._adapt_time, self._adapt_cpu = now, cpu
+
+        latencies = [self.latencies.popleft() for _ in range(len(self.latencies))]
+        self.handshake_latency = sum(latencies) / len(latencies) if latencies else 0.0
+
+        previous = self.limit
+        if self.cpu_usage > self.cpu_high or self.handshake_latency > self.latency_high:
+            self.limit = max(self.min_limit, int(self.limit * 0.75))
+        else:
+            self.limit = min(self.max_limit, self.limit + max(self.max_limit // 20, 1))
+
+        if self.limit != previous:
+            self.command_logger.info(f'Admission: limit {previous} -> {self.limit} | '
+                                     f'CPU: {self.cpu_usage:.2f} | Handshake latency: {self.handshake_latency:.3f}s')
+
+        with self._lock:        # forget idle ips whose bucket refilled
+            for ip in [ip for ip, bucket in self.buckets.items() if ip not in self.active and bucket.is_full(now)]:
+                del self.buckets[ip]
@@ -0,0 +1,380 @@
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.admission import ACCEPT, TARPIT
+from core.timer_wheel import TimerWheel
+from utils import metrics
+from utils.constants import MAX_CONNECTIONS, SESSION_WORKERS, CLOSE_WORKERS, HANDSHAKE_TIMEOUT, LOOP_TICK, \
+    MAX_PENDING_HANDSHAKES, SHED_POLICY, HANDSHAKE_QUEUE_SIZE, HANDSHAKE_QUEUE_TIMEOUT, SESSION_IDLE_TIMEOUT, \
+    SESSION_MAX_DURATION, REAPER_RESOLUTION, REAPER_SLOTS, OUTPUT_POLL_INTERVAL
+
+SHED_CLOSE = 'close'
+SHED_TARPIT = 'tarpit'
+SHED_DELAY = 'delay'
+SHED_POLICIES = (SHED_CLOSE, SHED_TARPIT, SHED_DELAY)
+
+WRITE_BLOCKED = 'write-blocked'     # session work result, output is waiting for the client's send window
+
+
+class LoopStats:
+    """Counters of the accept queue and the worker pool. \n
+    Accept counters are only written by the loop thread, wait times are recorded under a lock by the workers.
+    Every wait is observed in the wait histograms of utils.metrics as well"""
+
+    __slots__ = ("accepted", "rejected", "shed", "expired", "queue_waits", "queue_wait_total", "queue_wait_max",
+                 "work_queued", "work_started", "work_wait_total", "work_wait_max", "_lock")
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0           # closed at max_connections
+        self.shed = dict.fromkeys(SHED_POLICIES, 0)     # connections shed per policy, delay counts a full queue
+        self.expired = 0            # delayed connections that waited past the queue timeout
+        self.queue_waits = 0
+        self.queue_wait_total = 0.0     # seconds from accept to handshake start
+        self.queue_wait_max = 0.0
+        self.work_queued = 0
+        self.work_started = 0
+        self.work_wait_total = 0.0      # seconds from submit to a worker picking the session up
+        self.work_wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_queue_wait(self, wait: float):
+        self.queue_waits += 1
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+        metrics.HANDSHAKE_QUEUE_WAIT.observe(wait)
+
+    def record_work_wait(self, wait: float):
+        with self._lock:
+            self.work_started += 1
+            self.work_wait_total += wait
+            self.work_wait_max = max(self.work_wait_max, wait)
+        metrics.SESSION_WORK_WAIT.observe(wait)
+
+    def work_depth(self) -> int:
+        """Submitted session work not yet picked up by a worker"""
+        return self.work_queued - self.work_started
+
+
+class SessionLoop:
+    """Multiplexes the listening socket and every open shell channel on a single selector. \n
+    Only sessions with pending input are handed to the worker pool, idle sessions cost a registered fd"""
+
+    def __init__(self, sock: socket.socket, session_factory, error_logger,
+                 workers: int = SESSION_WORKERS,
+                 max_connections: int = MAX_CONNECTIONS,
+                 handshake_timeout: float = HANDSHAKE_TIMEOUT,
+                 max_pending: int = MAX_PENDING_HANDSHAKES,
+                 shed_policy: str = SHED_POLICY,
+                 queue_size: int = HANDSHAKE_QUEUE_SIZE,
+                 queue_timeout: float = HANDSHAKE_QUEUE_TIMEOUT,
+                 idle_timeout: float = SESSION_IDLE_TIMEOUT,
+                 session_timeout: float = SESSION_MAX_DURATION,
+                 tick: float = LOOP_TICK,
+                 output_poll: float = OUTPUT_POLL_INTERVAL,
+                 admission=None,
+                 tarpit=None):
+        self.sock = sock
+        self.session_factory = session_factory      # (client, addr, loop) -> session
+        self.error_logger = error_logger
+        self.max_connections = max_connections
+        self.handshake_timeout = handshake_timeout
+        if shed_policy not in SHED_POLICIES:
+            raise ValueError(f'Unknown shed policy {shed_policy!r}, expected one of {SHED_POLICIES}')
+        self.max_pending = max_pending      # handshakes in flight, each one owns a transport thread
+        self.shed_policy = shed_policy      # what happens to connections beyond max_pending
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.idle_timeout = idle_timeout        # seconds without client input
+        self.session_timeout = session_timeout  # seconds from shell start, however busy
+        self.tick = tick
+        self.output_poll = output_poll      # select timeout while some session waits to send
+        self.admission = admission      # AdmissionController, decides on every accepted connection
+        self.tarpit = tarpit            # Tarpit holding clients refused a session
+
+        self.selector = selectors.DefaultSelector()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='session')
+        # transport.close() joins the transport thread, keep it away from the shell workers
+        self.closer = ThreadPoolExecutor(max_workers=CLOSE_WORKERS, thread_name_prefix='session-close')
+
+        self.sessions = set()       # every live session
+        self.pending = {}           # session -> handshake deadline
+        self.queue = deque()        # (client, addr, accept time) delayed by the shed policy
+        self.stats = LoopStats()
+        self.activity = {}          # session -> [shell start, last input] of open shells
+        self.reaper = TimerWheel(REAPER_RESOLUTION, REAPER_SLOTS)     # one entry per open shell
+        self.writing = set()        # sessions with output held back by a full send window
+        self.ready = deque()        # callbacks handed over from other threads
+        self.fatal_event = threading.Event()    # set by stop() or a loop-level failure
+
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+
+    # thread-safe entry points ------------------------------------------------
+
+    def call_soon(self, callback, *args):
+        """Schedules a callback on the loop thread"""
+        self.ready.append((callback, args))
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):     # loop is already awake or closed
+            pass
+
+    def shell_ready(self, session):
+        """Called from the transport thread once the client requested a shell"""
+        self.call_soon(self._open, session)
+
+    def exec_ready(self, session):
+        """Called from the transport thread once the client requested a command, the session ends after it"""
+        self.call_soon(self._exec, session)
+
+    def handshake_done(self, latency: float):
+        """Called from the transport thread once key exchange finished"""
+        if self.admission:
+            self.admission.record_handshake(latency)
+
+    def stop(self):
+        """Stops the loop and closes every session"""
+        self.fatal_event.set()
+        self.call_soon(lambda: None)
+
+    # loop --------------------------------------------------------------------
+
+    def run(self):
+        self.sock.setblocking(False)
+        self.selector.register(self.sock, selectors.EVENT_READ, 'accept')
+        self.selector.register(self._wakeup_recv, selectors.EVENT_READ, 'wakeup')
+
+        try:
+            while not self.fatal_event.is_set():
+                timeout = self.output_poll if self.writing else self.tick
+                for key, _ in self.selector.select(timeout=timeout):
+                    if key.data == 'accept':
+                        self._accept()
+                    elif key.data == 'wakeup':
+                        self._drain_wakeup()
+                    else:
+                        self._dispatch(key.data)
+
+                while self.ready:
+                    callback, args = self.ready.popleft()
+                    callback(*args)
+
+                self._poll_writers()
+                self._expire_pending()
+                self._start_queued()
+                self._reap()
+                if self.admission:
+                    self.admission.adapt()
+                if self.tarpit:
+                    self.tarpit.tick()
+        finally:
+            self._shutdown()
+
+    def _accept(self):
+        while True:
+            try:
+                client, addr = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            self.stats.accepted += 1
+
+            if len(self.sessions) >= self.max_connections:     # max capacity is reached
+                self.stats.rejected += 1
+                client.close()
+                continue
+
+            if self.admission:
+                decision = self.admission.admit(addr, len(self.sessions))
+                if decision == TARPIT and self.tarpit and self.tarpit.add(client, addr):
+                    continue
+                if decision != ACCEPT:
+                    client.close()
+                    continue
+
+            if len(self.pending) >= self.max_pending:      # too many handshakes in flight
+                self._shed(client, addr)
+                continue
+
+            self._start(client, addr, time.monotonic())
+
+    def _start(self, client: socket.socket, addr: tuple[str, int], accepted: float):
+        """Creates the session and starts its handshake"""
+        self.stats.record_queue_wait(time.monotonic() - accepted)
+        client.setblocking(True)     # paramiko expects a blocking socket
+
+        try:
+            session = self.session_factory(client, addr, self)
+        except Exception:
+            self.error_logger.exception(f"Client: {addr[0]}:{addr[1]} | Unexpected error")
+            self._drop(client, addr)
+            return
+
+        self.sessions.add(session)
+        self.pending[session] = time.monotonic() + self.handshake_timeout
+
+        try:
+            session.start()
+        except Exception:
+            self.error_logger.exception(f"Client: {addr[0]}:{addr[1]} | Unexpected error")
+            self._close(session)
+
+    def _shed(self, client: socket.socket, addr: tuple[str, int]):
+        """Applies the shed policy to a connection that found every handshake slot taken"""
+        if self.shed_policy == SHED_DELAY and len(self.queue) < self.queue_size:
+            client.setblocking(False)
+            self.queue.append((client, addr, time.monotonic()))     # started once a slot frees up
+            return
+
+        self.stats.shed[self.shed_policy] += 1
+        if self.shed_policy == SHED_TARPIT and self.tarpit and self.tarpit.add(client, addr):
+            if self.admission:
+                self.admission.release(addr[0])
+            return
+        self._drop(client, addr)
+
+    def _start_queued(self):
+        """Starts delayed connections while handshake slots are free, drops the ones waiting too long"""
+        now = time.monotonic()
+        queue = self.queue
+        while queue and now - queue[0][2] > self.queue_timeout:
+            client, addr, _ = queue.popleft()
+            self.stats.expired += 1
+            self._drop(client, addr)
+
+        while queue and len(self.pending) < self.max_pending and len(self.sessions) < self.max_connections:
+            self._start(*queue.popleft())
+
+    def _drop(self, client: socket.socket, addr: tuple[str, int]):
+        client.close()
+        if self.admission:
+            self.admission.release(addr[0])
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _open(self, session):
+        if session not in self.pending:     # expired in the meantime
+            return
+        self._activate(session)
+        self._submit(session, session.open)
+
+    def _exec(self, session):
+        if session not in self.pending:
+            return
+        self._activate(session)
+        self._submit(session, session.run_exec)
+
+    def _activate(self, session):
+        self.pending.pop(session)
+        now = time.monotonic()
+        self.activity[session] = [now, now]
+        self.reaper.schedule(session, now + min(self.idle_timeout, self.session_timeout))
+
+    def _watch(self, session):
+        if session not in self.sessions:
+            return
+        self.selector.register(session.fileno(), selectors.EVENT_READ, session)
+
+    def _block(self, session):
+        if session in self.sessions:
+            self.writing.add(session)
+
+    def _poll_writers(self):
+        """Hands sessions back to a worker once their client made room in the send window"""
+        for session in [session for session in self.writing if session.writable()]:
+            self.writing.discard(session)
+            self._submit(session, session.flush)
+
+    def _dispatch(self, session):
+        # stop watching while a worker owns the session, so input is not handled twice
+        self.selector.unregister(session.fileno())
+        self.activity[session][1] = time.monotonic()
+        self._submit(session, session.on_readable)
+
+    def _submit(self, session, work):
+        submitted = time.monotonic()
+        self.stats.work_queued += 1
+
+        def run():
+            self.stats.record_work_wait(time.monotonic() - submitted)
+            return work()
+
+        future = self.executor.submit(run)
+
+        def done(f):
+            error = f.exception()
+            if error is not None:     # only the failing session is dropped, the others keep running
+                self.error_logger.error(f"Client: {session.client_ip}:{session.port} | Unexpected error",
+                                        exc_info=error)
+                self.call_soon(self._close, session)
+            elif f.result() is False:
+                self.call_soon(self._close, session)
+            elif f.result() == WRITE_BLOCKED:
+                self.call_soon(self._block, session)
+            else:
+                self.call_soon(self._watch, session)
+
+        future.add_done_callback(done)
+
+    def _close(self, session, reason: str | None = None):
+        if session not in self.sessions:
+            return
+        self.sessions.discard(session)
+        self.pending.pop(session, None)
+        self.activity.pop(session, None)
+        self.writing.discard(session)
+        self.reaper.cancel(session)
+        if self.admission:
+            self.admission.release(session.client_ip)
+        try:
+            self.selector.unregister(session.fileno())
+        except (KeyError, ValueError, OSError):
+            pass
+        self.closer.submit(session.close, reason)
+
+    def _expire_pending(self):
+        now = time.monotonic()
+        for session, deadline in list(self.pending.items()):
+            if now > deadline or not session.is_active():   # no shell request or failed handshake
+                self._close(session)
+
+    def _reap(self):
+        """Closes shells that were idle or open for too long, input only pushes the deadline back lazily"""
+        now = time.monotonic()
+        for session in self.reaper.advance(now):
+            opened, last_input = self.activity[session]
+            idle_deadline = last_input + self.idle_timeout
+            deadline = min(idle_deadline, opened + self.session_timeout)
+
+            if deadline > now:      # input arrived since the entry was scheduled
+                self.reaper.schedule(session, deadline)
+            elif session.fileno() not in self.selector.get_map() and session not in self.writing:
+                # a worker is running a command, check again later
+                self.reaper.schedule(session, now + self.reaper.resolution)
+            else:
+                self._close(session, 'idle' if idle_deadline <= now else 'timeout')
+
+    def _shutdown(self):
+        for session in list(self.sessions):
+            self._close(session)
+        self.executor.shutdown(wait=False)
+        self.closer.shutdown(wait=False)
+        while self.queue:
+            client, addr, _ = self.queue.popleft()
+            self._drop(client, addr)
+        if self.tarpit:
+            self.tarpit.close()
+        self.selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+        self.sock.close()
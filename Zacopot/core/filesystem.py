@@ -1,438 +1,933 @@
-# File System DS --------------------------------------------------------------
-import os
-from datetime import datetime
-
-from models.models import Inode, Directory
-from utils.utils import format_object, getInode, getPath, block_iter, writeBlock, readFile, getParentDirInode
-from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS, TOTAL_INODES
-from exceptions.fsExceptions import *
-
-
-# class CustomDS:
-#     """Custom data structure for associating files with its inode numbers. \n
-#     Each directory contains one"""
-#
-#     __slots__ = "ds"
-#
-#     def __init__(self, dot_inode: int, dotdot_inode: int):
-#         self.ds = {}
-#         self.add(".", dot_inode)
-#         self.add("..", dotdot_inode)
-#
-#     def add(self, filename: str, inode_number: int):
-#         if filename not in self.ds.keys():
-#             self.ds[filename] = inode_number
-#         else:
-#             raise ValueError(f"`{filename}` already exists.")
-#
-#     def remove(self, filename: str):
-#         if filename in self.ds.keys():
-#             self.ds.pop(filename)
-#         else:
-#             raise ValueError(f"`{filename}` does not exist.")
-#
-#     def get_inode(self, filename: str) -> int | None:
-#         return self.ds.get(filename, None)
-#
-#     def list_filenames(self) -> set[str]:
-#         return set(self.ds.keys())
-#
-#     def list_inode_numbers(self) -> set[int]:
-#         return set(self.ds.values())
-
-
-# Super block -----------------------------------------------------------------
-
-class Superblock:
-    __slots__ = ("total_blocks", "total_inodes", "free_blocks", "free_inodes")
-
-    def __init__(self, total_blocks=TOTAL_BLOCKS, total_inodes=TOTAL_INODES):
-        self.total_blocks = total_blocks
-        self.total_inodes = total_inodes
-        self.free_blocks = set(range(1, total_blocks + 1))
-        self.free_inodes = set(range(1, total_inodes + 1))
-
-    def allocate_block(self) -> int | None:
-        return self.free_blocks.pop() if self.free_blocks else None
-
-    def allocate_inode(self) -> int | None:
-        return self.free_inodes.pop() if self.free_inodes else None
-
-    def free_block(self, block_number: int):
-        self.free_blocks.add(block_number)
-
-    def free_inode(self, inode_number: int):
-        self.free_inodes.add(inode_number)
-
-
-# Data blocks -----------------------------------------------------------------
-
-class DataBlocks:
-    __slots__ = "blocks"
-
-    def __init__(self):
-        self.blocks = {}
-
-    def write_block(self, block_number: int, data: str):
-        self.blocks[block_number] = data
-
-    def read_block(self, block_number) -> str:
-        return self.blocks.get(block_number, "")
-
-
-# Journal ---------------------------------------------------------------------
-
-class Journal:
-    __slots__ = "log"
-
-    def __init__(self):
-        self.log = []
-
-    def record(self, action, inode_number):
-        self.log.append({"action": action, "inode": inode_number})
-
-    def replay(self):
-        for entry in self.log:
-            print(f"Replaying: {entry}")
-
-
-# File system -----------------------------------------------------------------
-
-class FileSystem:
-    __slots__ = (
-        "PATH", "PWD", "HOME", "USER", "UIT", "HOSTNAME", "LANG",
-        "superblock", "inodes", "directories", "journal", "root_inode",
-    )
-
-    def __init__(self):
-        # Environment Variables
-        self.PATH = '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin'
-        self.PWD = ()
-        self.HOME = 'home/admin'
-        self.USER = 'root'
-        self.HOSTNAME = 'debian'
-        self.LANG = 'en_US.UTF-8'
-
-        self.superblock = Superblock()
-        self.inodes: dict[int, Inode | Directory] = {}
-        # self.data_blocks = DataBlocks()
-        # self.journal = Journal()
-
-        self.root_inode = self.superblock.allocate_inode()
-        self.inodes[self.root_inode] = Directory("/", self.root_inode, self.root_inode)
-
-        self.PWD = self.root_inode, getPath(self.root_inode, self.inodes)
-
-    def mkdir(self, paths: list[str]) -> str | None:  # return error if any
-
-        error = ''
-
-        for path in paths:
-
-            path = path.rstrip('/')  # remove last '/' if any
-
-            try:
-                if path.find('/') == -1:  # create new dir in current directory
-                    dir_path = self.inodes[self.PWD[0]]
-                    dirname = path
-                else:
-                    sep = path.rfind('/')
-                    dir_path = self.inodes[getInode(path[:sep], self.root_inode, self.PWD[0], self.inodes)]
-                    dirname = path[sep + 1:]
-
-                if dirname in dir_path.list_filenames():  # check if dir with this name already exists
-                    error = f"mkdir: cannot create directory '{path}': File exists"
-                    continue
-
-                new_dir_inode = self.superblock.allocate_inode()
-
-                if new_dir_inode is None:  # inode allocation DIDNT work
-                    error = "Inode cannot be allocated."
-                    continue
-
-                new_dir = Directory(dirname, new_dir_inode, dir_path.inode_number)
-
-                self.inodes[new_dir_inode] = new_dir  # add new dir to dir list
-
-                dir_path.add(dirname, new_dir_inode)
-
-            except DirNotFoundException:
-                error = f"mkdir: cannot create directory '{path}': No such file or directory"
-
-        return error
-
-    def saveFile(self, path: str, input_file_name: str) -> None:
-        """Saves file content"""
-        self.touch(None, [input_file_name])
-        inode_obj = self.inodes[getInode(input_file_name, self.root_inode, self.PWD[0], self.inodes)]
-        inode_obj.size = os.stat(path).st_size
-
-        for block_data in block_iter(path):
-            if len(block_data) < BLOCK_SIZE:  # apply padding
-                block_data = block_data.ljust(BLOCK_SIZE, b'\x00')
-
-            block_number = self.superblock.allocate_block()
-            inode_obj.blocks.append(block_number)
-            writeBlock(block_number, block_data)
-
-    def deleteFile(self, inode_obj: Inode, parent_dir_obj: Directory) -> None:
-        if inode_obj.file_type == 1:    # is a dir
-            return
-
-        # free blocks
-        for block in inode_obj.blocks:
-            self.superblock.free_block(block)
-
-        # free inode number
-        self.superblock.free_inode(inode_obj.inode_number)
-
-        # delete entry from parent directory
-        parent_dir_obj.remove_by_inode(inode_obj.inode_number)
-
-        # delete from filesystem inodes dict
-        self.inodes.pop(inode_obj.inode_number)
-
-    def deleteDir(self, dir_inode_obj: Directory, parent_dir_obj: Directory):
-
-        if dir_inode_obj.inode_number in (self.root_inode, self.PWD[0]):    # dont delete root or current dir
-            return
-
-        stack = [(parent_dir_obj, dir_inode_obj)]
-
-        def getEmptiedChildDirs(inode_obj: Directory) -> list[tuple[Directory, Directory]] | None:
-            nonlocal self
-
-            child_dirs = []
-
-            for name, inode_num in list(inode_obj.entries.items()):
-                if name in ('.', '..'):
-                    continue
-                child_inode_obj = self.inodes[inode_num]
-                if child_inode_obj.file_type == 1:
-                    child_dirs.append((inode_obj, child_inode_obj))
-                else:  # is a file
-                    self.deleteFile(child_inode_obj, inode_obj)
-
-            return child_dirs if len(child_dirs) != 0 else None
-
-        if child_dirs := getEmptiedChildDirs(dir_inode_obj):
-            stack.extend(child_dirs)
-
-        while stack:
-
-            parent_inode_obj, inode_obj = stack.pop()
-
-            if inode_obj.inode_number in (self.root_inode, self.PWD[0]):  # dont delete root or current dir
-                return
-
-            if child_dirs := getEmptiedChildDirs(inode_obj):
-                stack.extend(child_dirs)
-            else:
-                # delete dot and dotdot dirs
-                inode_obj.remove('.')
-                inode_obj.remove('..')
-
-                # delete entry from parent directory
-                parent_inode_obj.remove_by_inode(inode_obj.inode_number)
-
-                # remove from fs inodes dict
-                self.inodes.pop(inode_obj.inode_number)
-
-                # free inode number
-                self.superblock.free_inode(inode_obj.inode_number)
-
-    def ls(self,
-           options: str = '',
-           long_options: dict[str, str] | None = None,
-           paths: list[str] | None = None,
-           ) -> str | None:
-
-        paths = paths or (self.PWD[1],)
-
-        output = ''
-        error = ''
-
-        files = []
-        directories = []
-
-        count_blocks = ('l' in options) or ('s' in options)  # block count is enabled
-        total_blocks = [0]
-
-        for path in paths:
-
-            try:
-                inode_num = getInode(path, self.root_inode, self.PWD[0], self.inodes)
-                inode_obj = self.inodes[inode_num]
-
-                if inode_obj.file_type == 0:
-                    files.append((path, inode_obj))
-                else:
-                    directories.append((path, inode_obj))
-
-            except DirNotFoundException:
-                error += f"ls: cannot access '{path}': No such file or directory\r\n"
-
-        for path, inode_obj in files:
-            output += format_object(inode_obj, path, self.inodes, total_blocks, options, long_options)
-
-        for path, inode_obj in directories:
-            if len(paths) > 1:  # only print header if multiple paths were given
-                output += f"\r\n\r\n{path}:\r\n"
-            output += format_object(inode_obj, path, self.inodes, total_blocks, options, long_options)
-
-        output = output.lstrip('\r\n').rstrip('\r\n')  # cleanup leading/trailing newlines and spaces
-
-        output = (error + output).rstrip('\r\n\t')
-
-        if count_blocks and error == '':
-            output = f'total {total_blocks[0]}\r\n' + output
-
-        return output
-
-    def cd(self, path: str | None) -> str:  # returns error
-
-        if path is None:      # check if path exists
-            return ''
-
-        try:
-            inode = getInode(path, self.root_inode, self.PWD[0], self.inodes)
-
-            if self.inodes[inode].file_type == 0:  # check if it's a file
-                return f"bash: cd: {path}: not a directory"
-
-            self.PWD = inode, getPath(inode, self.inodes)
-
-        except DirNotFoundException:
-            return f"bash: cd: {path}: No such file or directory"
-
-    def touch(self, options: str | None, paths: list[str]) -> str | None:  # return error if any
-
-        error = ''
-
-        for path in paths:
-
-            try:
-                if path.find('/') == -1:  # is just a file
-                    dir_path = self.inodes[self.PWD[0]]
-                    filename = path
-                else:  # is a full path
-                    sep = path.rfind('/')
-                    dir_path = self.inodes[getInode(path[:sep], self.root_inode, self.PWD[0], self.inodes)]
-                    filename = path[sep + 1:]
-
-                if filename in dir_path.list_filenames():  # check if file with this name already exists
-                    if options is None:     # check options to exist
-                        options = 'am'
-
-                    file_inode_obj = self.inodes[dir_path.get_inode(filename)]
-
-                    time = datetime.now()
-
-                    match options:
-                        case _ if 'a' in options:
-                            # change access time
-                            file_inode_obj.timestamps['accessed'] = time
-                        case _ if 'm' in options:
-                            # change modification time
-                            file_inode_obj.timestamps['modified'] = time
-                    continue
-
-                new_inode = self.superblock.allocate_inode()
-
-                if new_inode is None:  # inode allocation DIDNT work
-                    error = "Inode cannot be allocated."
-                    continue
-
-                self.inodes[new_inode] = Inode(new_inode, 0)
-
-                dir_path.add(filename, new_inode)
-                dir_path.size += 16 + len(filename) // 2  # add entry size
-
-            except DirNotFoundException:
-                error = f"touch: cannot touch '{path}': Not a directory"
-
-        return error
-
-    def cat(self, paths: list[str]) -> str:
-
-        output = ''
-
-        for index, path in enumerate(paths):
-            try:
-                inode_obj = self.inodes[getInode(path, self.root_inode, self.PWD[0], self.inodes)]
-
-                if inode_obj.file_type == 1:    # is a directory
-                    if index == 0:         # is the first path in arguments
-                        output = f'cat: {path}: Is a directory'
-                    break
-
-                file_data = readFile(inode_obj).decode("utf-8")
-
-                if file_data:
-                    output += file_data + '\r\n'
-
-            except DirNotFoundException:
-                if index == 0:  # is the first path in arguments
-                    output = f"cat: '{path}': No such file or directory"
-                break
-            except UnicodeDecodeError:
-                output = ''
-                break
-
-        return output.rstrip()
-
-    def rm(self, options: str | None, paths: list[str]) -> str:
-        output = ''
-
-        for index, path in enumerate(paths):
-            try:
-                inode_obj = self.inodes[getInode(path, self.root_inode, self.PWD[0], self.inodes)]
-
-                parent_dir_obj = getParentDirInode(path, self.root_inode, self.PWD[1], self.PWD[0], self.inodes)
-
-                if inode_obj.file_type == 1:    # is a directory
-                    if 'r' in options:
-                        if path in ('.', '..'):
-                            if index == 0:
-                                output = 'rm: "." and ".." may not be removed'
-                            break
-                        self.deleteDir(inode_obj, parent_dir_obj)
-                        continue
-                    else:
-                        if index == 0:  # is the first path in arguments
-                            output = f'rm: {path}: Is a directory'
-                        break
-
-                # delete file
-                self.deleteFile(inode_obj, parent_dir_obj)
-
-            except DirNotFoundException:
-                if index == 0:  # is the first path in arguments
-                    output = f"rm: '{path}': No such file or directory"
-                break
-
-        return output
-
-    def echo(self, input_text: list[str]) -> str:
-        return ' '.join(input_text)
-
-    def cp(self):
-        pass
-
-    def pwd(self):
-        return self.PWD[1]
-
-    def path(self):
-        return self.PATH
-
-    def home(self):
-        return self.HOME
-
-    def user(self):
-        return self.USER
-
-    def hostname(self):
-        return self.HOSTNAME
-
-    def lang(self):
-        return self.LANG
+# File System DS --------------------------------------------------------------
+import codecs
+import os
+from datetime import datetime
+from hashlib import blake2b
+from typing import Iterator
+
+from models.models import Inode, Directory
+from models.inode_store import CompactInodeTable
+from utils.bitmap import Bitmap
+from utils.compression import CODECS, compress, selected
+from utils.utils import format_object, getInode, parentPath, human_size, writeExtent, readFile, iterFile, rstripped
+from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS, TOTAL_INODES, DISK_FILE_NAME, DENTRY_CACHE_SIZE, \
+    DISK_DEVICE, LAZY_CONTENT, DEDUP_BLOCKS, COMPRESSION_CODEC
+from exceptions.fsExceptions import *
+
+
+# class CustomDS:
+#     """Custom data structure for associating files with its inode numbers. \n
+#     Each directory contains one"""
+#
+#     __slots__ = "ds"
+#
+#     def __init__(self, dot_inode: int, dotdot_inode: int):
+#         self.ds = {}
+#         self.add(".", dot_inode)
+#         self.add("..", dotdot_inode)
+#
+#     def add(self, filename: str, inode_number: int):
+#         if filename not in self.ds.keys():
+#             self.ds[filename] = inode_number
+#         else:
+#             raise ValueError(f"`{filename}` already exists.")
+#
+#     def remove(self, filename: str):
+#         if filename in self.ds.keys():
+#             self.ds.pop(filename)
+#         else:
+#             raise ValueError(f"`{filename}` does not exist.")
+#
+#     def get_inode(self, filename: str) -> int | None:
+#         return self.ds.get(filename, None)
+#
+#     def list_filenames(self) -> set[str]:
+#         return set(self.ds.keys())
+#
+#     def list_inode_numbers(self) -> set[int]:
+#         return set(self.ds.values())
+
+
+# Super block -----------------------------------------------------------------
+
+def to_extents(block_numbers: list[int]) -> list[tuple[int, int]]:
+    """Sorted block numbers as (first block, length) runs"""
+    extents = []
+    for block_number in block_numbers:
+        if extents and extents[-1][0] + extents[-1][1] == block_number:
+            extents[-1] = (extents[-1][0], extents[-1][1] + 1)
+        else:
+            extents.append((block_number, 1))
+    return extents
+
+
+class Superblock:
+    """Block and inode allocation of a filesystem, kept in bitmaps. \n
+    Blocks shared by several files through deduplication carry a reference count, a block only goes back to the
+    bitmap once its last reference is freed. Blocks with a single reference, all of them without deduplication,
+    are not counted"""
+
+    __slots__ = ("total_blocks", "total_inodes", "blocks", "inodes", "refs", "digests", "block_digests")
+
+    def __init__(self, total_blocks=TOTAL_BLOCKS, total_inodes=TOTAL_INODES):
+        self.total_blocks = total_blocks
+        self.total_inodes = total_inodes
+        self.blocks = Bitmap(total_blocks)
+        self.inodes = Bitmap(total_inodes)
+        self.refs: dict[int, int] = {}              # shared block -> references, always 2 or more
+        self.digests: dict[bytes, int] = {}         # content digest -> block holding it
+        self.block_digests: dict[int, bytes] = {}
+
+    @classmethod
+    def from_bitmaps(cls, blocks: Bitmap, inodes: Bitmap, refs: dict[int, int] | None = None) -> 'Superblock':
+        """Superblock of a saved filesystem, its digests are not kept so later files are not deduplicated
+        against it"""
+        new = cls.__new__(cls)
+        new.total_blocks = blocks.size
+        new.total_inodes = inodes.size
+        new.blocks = blocks
+        new.inodes = inodes
+        new.refs = refs or {}
+        new.digests = {}
+        new.block_digests = {}
+        return new
+
+    @property
+    def free_block_count(self) -> int:
+        return self.blocks.free
+
+    @property
+    def free_inode_count(self) -> int:
+        return self.inodes.free
+
+    def allocate_block(self) -> int | None:
+        return self.blocks.allocate()
+
+    def allocate_inode(self) -> int | None:
+        return self.inodes.allocate()
+
+    def allocate_extents(self, count: int) -> list[tuple[int, int]] | None:
+        """Blocks for a file of count blocks as (first block, length) runs, None if the disk is full. \n
+        Takes the next free run long enough for the whole file, otherwise the longest runs first"""
+        if count > self.blocks.free:
+            return None
+        if count == 0:
+            return []
+
+        start = self.blocks.allocate_run(count)
+        if start is not None:
+            return [(start, count)]
+
+        extents = []
+        for start, length in sorted(self.blocks.runs(), key=lambda run: run[1], reverse=True):
+            length = min(length, count)
+            self.blocks.take_run(start, length)
+            extents.append((start, length))
+            count -= length
+            if count == 0:
+                break
+        return extents
+
+    # Deduplication ---------------------------------------------------------
+
+    def shared_block(self, digest: bytes) -> int | None:
+        """Block already holding the content of digest, with one more reference taken on it"""
+        block_number = self.digests.get(digest)
+        if block_number is not None:
+            self.refs[block_number] = self.refs.get(block_number, 1) + 1
+        return block_number
+
+    def remember(self, digest: bytes, block_number: int):
+        """Records the content of a newly written block for shared_block"""
+        self.digests[digest] = block_number
+        self.block_digests[block_number] = digest
+
+    def dedup_stats(self) -> dict[str, int | float]:
+        """Blocks stored against the blocks files reference, and what sharing saved"""
+        stored = self.total_blocks - self.blocks.free
+        saved = sum(self.refs.values()) - len(self.refs)
+        return {
+            'stored_blocks': stored,
+            'referenced_blocks': stored + saved,
+            'shared_blocks': len(self.refs),
+            'bytes_saved': saved * BLOCK_SIZE,
+            'ratio': round((stored + saved) / stored, 3) if stored else 1.0,
+        }
+
+    def free_block(self, block_number: int):
+        references = self.refs.pop(block_number, 1)
+        if references > 2:
+            self.refs[block_number] = references - 1
+        elif references == 1:
+            self.blocks.release(block_number)
+            digest = self.block_digests.pop(block_number, None)
+            if digest is not None:
+                del self.digests[digest]
+
+    def free_extent(self, start: int, length: int):
+        if not self.refs and not self.block_digests:
+            self.blocks.release_run(start, length)
+            return
+        for block_number in range(start, start + length):
+            self.free_block(block_number)
+
+    def free_inode(self, inode_number: int):
+        self.inodes.release(inode_number)
+
+    def copy(self) -> 'Superblock':
+        """Independent snapshot of the allocation state"""
+        new = Superblock.__new__(Superblock)
+        new.total_blocks = self.total_blocks
+        new.total_inodes = self.total_inodes
+        new.blocks = self.blocks.copy()
+        new.inodes = self.inodes.copy()
+        new.refs = dict(self.refs)
+        new.digests = dict(self.digests)
+        new.block_digests = dict(self.block_digests)
+        return new
+
+    def fork(self) -> 'SuperblockOverlay':
+        return SuperblockOverlay(self)
+
+
+class SuperblockOverlay:
+    """Allocation state of a forked filesystem, kept as a delta against a shared superblock. \n
+    Free numbers are taken from the base bitmaps, which are never modified, with a cursor that only moves forward,
+    so every base number is handed out at most once. References the session drops on shared base blocks are
+    counted here, such a block is released with the last one"""
+
+    __slots__ = ("base", "total_blocks", "total_inodes", "released_blocks", "released_inodes", "dropped_refs",
+                 "_block_cursor", "_inode_cursor", "_taken_blocks", "_taken_inodes")
+
+    def __init__(self, base: Superblock):
+        self.base = base
+        self.total_blocks = base.total_blocks
+        self.total_inodes = base.total_inodes
+        self.released_blocks = set()    # numbers freed by this session
+        self.released_inodes = set()
+        self.dropped_refs: dict[int, int] = {}      # shared base block -> references freed by this session
+        self._block_cursor = 1          # base numbers below the cursors are used or handed out
+        self._inode_cursor = 1
+        self._taken_blocks = 0          # free base numbers handed out
+        self._taken_inodes = 0
+
+    @property
+    def free_block_count(self) -> int:
+        return self.base.blocks.free - self._taken_blocks + len(self.released_blocks)
+
+    @property
+    def free_inode_count(self) -> int:
+        return self.base.inodes.free - self._taken_inodes + len(self.released_inodes)
+
+    def allocate_block(self) -> int | None:
+        if self.released_blocks:
+            return self.released_blocks.pop()
+        block_number = self.base.blocks.find(self._block_cursor)
+        if block_number is not None:
+            self._block_cursor = block_number + 1
+            self._taken_blocks += 1
+        return block_number
+
+    def allocate_extents(self, count: int) -> list[tuple[int, int]] | None:
+        """Blocks freed by the session first, then the free runs of the base after the cursor"""
+        if count > self.free_block_count:
+            return None
+        blocks = [self.released_blocks.pop() for _ in range(min(count, len(self.released_blocks)))]
+        extents = to_extents(sorted(blocks))
+        count -= len(blocks)
+
+        base = self.base.blocks
+        while count:
+            start = base.find(self._block_cursor)
+            end = base.run_end(start, start + count)
+            extents.append((start, end - start))
+            self._block_cursor = end
+            self._taken_blocks += end - start
+            count -= end - start
+        return extents
+
+    def allocate_inode(self) -> int | None:
+        if self.released_inodes:
+            return self.released_inodes.pop()
+        inode_number = self.base.inodes.find(self._inode_cursor)
+        if inode_number is not None:
+            self._inode_cursor = inode_number + 1
+            self._taken_inodes += 1
+        return inode_number
+
+    def free_block(self, block_number: int):
+        dropped = self.dropped_refs.get(block_number, 0)
+        if self.base.refs.get(block_number, 1) - dropped > 1:
+            self.dropped_refs[block_number] = dropped + 1
+        else:
+            self.released_blocks.add(block_number)
+
+    def free_extent(self, start: int, length: int):
+        if not self.base.refs:
+            self.released_blocks.update(range(start, start + length))
+            return
+        for block_number in range(start, start + length):
+            self.free_block(block_number)
+
+    def free_inode(self, inode_number: int):
+        self.released_inodes.add(inode_number)
+
+
+# Inode table -----------------------------------------------------------------
+
+class InodeTable:
+    """Inode number -> inode mapping with copy-on-write over a shared base table. \n
+    Reads fall through to the base, modified inodes are copied into the overlay first"""
+
+    __slots__ = ("base", "overlay", "deleted", "__weakref__")    # template generations are tracked by weakref
+
+    def __init__(self, base: 'InodeTable | None' = None):
+        self.base = base            # never modified through this table
+        self.overlay: dict[int, Inode | Directory] = {}
+        self.deleted: set[int] = set()      # base inodes removed in this table
+
+    def get(self, inode_number: int, default=None) -> Inode | Directory | None:
+        inode_obj = self.overlay.get(inode_number)
+        if inode_obj is not None:
+            return inode_obj
+        if self.base is None or inode_number in self.deleted:
+            return default
+        return self.base.get(inode_number, default)
+
+    def __getitem__(self, inode_number: int) -> Inode | Directory:
+        inode_obj = self.get(inode_number)
+        if inode_obj is None:
+            raise KeyError(inode_number)
+        return inode_obj
+
+    def __setitem__(self, inode_number: int, inode_obj: Inode | Directory):
+        self.overlay[inode_number] = inode_obj
+        self.deleted.discard(inode_number)
+
+    def __contains__(self, inode_number: int) -> bool:
+        return self.get(inode_number) is not None
+
+    def __iter__(self):
+        yield from self.overlay
+        if self.base is not None:
+            for inode_number in self.base:
+                if inode_number not in self.overlay and inode_number not in self.deleted:
+                    yield inode_number
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def pop(self, inode_number: int) -> Inode | Directory:
+        inode_obj = self[inode_number]
+        self.overlay.pop(inode_number, None)
+        if self.base is not None:
+            self.deleted.add(inode_number)
+        return inode_obj
+
+    def writable(self, inode_number: int) -> Inode | Directory:
+        """Returns an inode that is safe to modify, copying it from the base if needed"""
+        inode_obj = self.overlay.get(inode_number)
+        if inode_obj is None:
+            inode_obj = self[inode_number].copy()
+            self.overlay[inode_number] = inode_obj
+        return inode_obj
+
+    def fork(self) -> 'InodeTable':
+        return InodeTable(self)
+
+
+# Dentry cache ----------------------------------------------------------------
+
+class DentryCache:
+    """Resolved paths of one filesystem, (base directory inode, path) -> inode. \n
+    Each entry is indexed under every inode its lookup passed through. A directory entry only goes away
+    together with its inode, so removing an inode drops exactly the entries that could now resolve differently.
+    Failed lookups are not cached, so new files and directories never make an entry stale"""
+
+    __slots__ = ("capacity", "entries", "users", "hits", "misses")
+
+    def __init__(self, capacity: int = DENTRY_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries: dict[tuple[int, str], int] = {}
+        self.users: dict[int, set[tuple[int, str]]] = {}     # inode -> entries resolved through it
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, base: int, path: str) -> int | None:
+        inode_number = self.entries.get((base, path))
+        if inode_number is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return inode_number
+
+    def put(self, base: int, path: str, inode_number: int, chain: list[int]):
+        if len(self.entries) >= self.capacity:      # paths typed by a script, start over instead of tracking age
+            self.entries.clear()
+            self.users.clear()
+        key = (base, path)
+        self.entries[key] = inode_number
+        for passed in chain:
+            self.users.setdefault(passed, set()).add(key)
+
+    def invalidate(self, inode_number: int):
+        for key in self.users.pop(inode_number, ()):
+            self.entries.pop(key, None)
+
+
+# Data blocks -----------------------------------------------------------------
+
+class DataBlocks:
+    __slots__ = "blocks"
+
+    def __init__(self):
+        self.blocks = {}
+
+    def write_block(self, block_number: int, data: str):
+        self.blocks[block_number] = data
+
+    def read_block(self, block_number) -> str:
+        return self.blocks.get(block_number, "")
+
+
+# Journal ---------------------------------------------------------------------
+
+class Journal:
+    __slots__ = "log"
+
+    def __init__(self):
+        self.log = []
+
+    def record(self, action, inode_number):
+        self.log.append({"action": action, "inode": inode_number})
+
+    def replay(self):
+        for entry in self.log:
+            print(f"Replaying: {entry}")
+
+
+# File system -----------------------------------------------------------------
+
+class FileSystem:
+    __slots__ = (
+        "PATH", "PWD", "HOME", "USER", "UIT", "HOSTNAME", "LANG",
+        "superblock", "inodes", "directories", "journal", "root_inode", "disk_file", "dentries",
+    )
+
+    def __init__(self, disk_file: str = DISK_FILE_NAME):
+        # Environment Variables
+        self.PATH = '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin'
+        self.PWD = ()
+        self.HOME = 'home/admin'
+        self.USER = 'root'
+        self.HOSTNAME = 'debian'
+        self.LANG = 'en_US.UTF-8'
+
+        self.disk_file = os.path.abspath(disk_file)      # block storage, each template generation has its own
+        self.superblock = Superblock()
+        self.inodes = InodeTable()
+        self.dentries = DentryCache()
+        # self.data_blocks = DataBlocks()
+        # self.journal = Journal()
+
+        self.root_inode = self.superblock.allocate_inode()
+        self.inodes[self.root_inode] = Directory("/", self.root_inode, self.root_inode)
+
+        self.PWD = self.root_inode, self.inodes[self.root_inode].path
+
+    def fork(self) -> 'FileSystem':
+        """Returns a session filesystem that shares this one as its read-only base layer. \n
+        Only inodes touched by the session are copied, so this filesystem must not change afterwards"""
+        fs = object.__new__(FileSystem)
+
+        fs.PATH = self.PATH
+        fs.PWD = self.PWD
+        fs.HOME = self.HOME
+        fs.USER = self.USER
+        fs.HOSTNAME = self.HOSTNAME
+        fs.LANG = self.LANG
+
+        fs.superblock = self.superblock.fork()
+        fs.inodes = self.inodes.fork()
+        fs.root_inode = self.root_inode
+        fs.disk_file = self.disk_file
+        fs.dentries = DentryCache()
+
+        return fs
+
+    def compact(self):
+        """Moves the inodes into a CompactInodeTable, later changes go to a copy-on-write overlay over it"""
+        if isinstance(self.inodes.base, CompactInodeTable) and not self.inodes.overlay and not self.inodes.deleted:
+            return
+        self.inodes = InodeTable(CompactInodeTable(self.inodes))
+        self.dentries = DentryCache()
+
+    def lookup(self, path: str) -> int:
+        """getInode through the dentry cache \n
+        :raises DirNotFoundException"""
+        base = self.root_inode if path.startswith('/') else self.PWD[0]
+        inode_number = self.dentries.get(base, path)
+        if inode_number is None:
+            chain = []
+            inode_number = getInode(path, self.root_inode, self.PWD[0], self.inodes, chain)
+            self.dentries.put(base, path, inode_number, chain)
+        return inode_number
+
+    def lookup_parent(self, path: str) -> Directory:
+        """Directory holding path \n
+        :raises DirNotFoundException"""
+        return self.inodes[self.lookup(parentPath(path, self.PWD[1]))]
+
+    def mkdir(self, paths: list[str]) -> str | None:  # return error if any
+
+        error = ''
+
+        for path in paths:
+
+            path = path.rstrip('/')  # remove last '/' if any
+
+            try:
+                if path.find('/') == -1:  # create new dir in current directory
+                    dir_path = self.inodes[self.PWD[0]]
+                    dirname = path
+                else:
+                    sep = path.rfind('/')
+                    dir_path = self.inodes[self.lookup(path[:sep])]
+                    dirname = path[sep + 1:]
+
+                if dirname in dir_path.list_filenames():  # check if dir with this name already exists
+                    error = f"mkdir: cannot create directory '{path}': File exists"
+                    continue
+
+                new_dir_inode = self.superblock.allocate_inode()
+
+                if new_dir_inode is None:  # inode allocation DIDNT work
+                    error = "Inode cannot be allocated."
+                    continue
+
+                new_dir = Directory(dirname, new_dir_inode, dir_path.inode_number, path=dir_path.path + dirname + '/')
+
+                self.inodes[new_dir_inode] = new_dir  # add new dir to dir list
+
+                self.inodes.writable(dir_path.inode_number).add(dirname, new_dir_inode)
+
+            except DirNotFoundException:
+                error = f"mkdir: cannot create directory '{path}': No such file or directory"
+
+        return error
+
+    def saveFile(self, path: str, input_file_name: str, lazy: bool = LAZY_CONTENT,
+                 dedup: bool = DEDUP_BLOCKS, codec: str | None = COMPRESSION_CODEC) -> None:
+        """Saves file content into contiguous extents, one write per extent. \n
+        With lazy set only the source path, size and times are recorded, the content stays in the source file
+        until something reads it. With dedup set blocks already on the disk are shared, see storeShared.
+        With a codec, files selected by name or size are stored compressed when that takes fewer blocks \n
+        :raises NoSpaceLeftException"""
+        self.touch(None, [input_file_name])
+        inode_obj = self.inodes[self.lookup(input_file_name)]
+        stat = os.stat(path)
+        size = stat.st_size
+
+        if lazy:
+            inode_obj.size = size
+            inode_obj.extents = [(0, -(-size // BLOCK_SIZE))] if size else []
+            inode_obj.source = os.path.abspath(path), stat.st_mtime
+            inode_obj.timestamps['modified'] = datetime.fromtimestamp(stat.st_mtime)
+            inode_obj.timestamps['accessed'] = datetime.fromtimestamp(stat.st_atime)
+            return
+
+        data = None     # content already read whole, compressed or for storeShared
+        if codec is not None and selected(input_file_name, size):
+            with open(path, 'rb') as input_file:
+                data = input_file.read()
+            packed = compress(codec, data)
+            if -(-len(packed) // BLOCK_SIZE) < -(-size // BLOCK_SIZE):
+                data = packed
+                inode_obj.compression = CODECS[codec]
+
+        if dedup:
+            if data is None:
+                with open(path, 'rb') as input_file:
+                    data = input_file.read()
+            inode_obj.extents = self.storeShared(data, input_file_name)
+            inode_obj.size = size
+            return
+
+        extents = self.superblock.allocate_extents(-(-(size if data is None else len(data)) // BLOCK_SIZE))
+        if extents is None:
+            raise NoSpaceLeftException(f"No space left on device for {input_file_name}.")
+        inode_obj.size = size
+        inode_obj.extents = extents
+
+        if data is not None:
+            view = memoryview(data)
+            for start, length in extents:
+                writeExtent(start, view[:length * BLOCK_SIZE], self.disk_file)
+                view = view[length * BLOCK_SIZE:]
+            return
+
+        with open(path, 'rb') as input_file:
+            for start, length in extents:
+                writeExtent(start, input_file.read(length * BLOCK_SIZE), self.disk_file)     # the last one unpadded
+
+    def storeShared(self, data: bytes, input_file_name: str) -> list[tuple[int, int]]:
+        """Writes the blocks of data no file holds yet and returns the extents of all of them. \n
+        Blocks are keyed by a digest of their content, the tail padded with zeros as it is written, so identical
+        blocks of any files, or within one, are stored once \n
+        :raises NoSpaceLeftException"""
+        view = memoryview(data.ljust(-(-len(data) // BLOCK_SIZE) * BLOCK_SIZE, b'\0'))
+        digests = [blake2b(view[offset:offset + BLOCK_SIZE], digest_size=16).digest()
+                   for offset in range(0, len(view), BLOCK_SIZE)]
+        missing = [digest for digest in dict.fromkeys(digests) if digest not in self.superblock.digests]
+
+        allocated = self.superblock.allocate_extents(len(missing))
+        if allocated is None:
+            raise NoSpaceLeftException(f"No space left on device for {input_file_name}.")
+        free = (block_number for start, length in allocated for block_number in range(start, start + length))
+        for digest in missing:
+            self.superblock.remember(digest, next(free))
+
+        # the first occurrence of a missing block is its write and first reference, any other one is shared
+        blocks = []
+        writes = []     # (block, index in data) runs of consecutive new blocks, each written at once
+        missing = set(missing)
+        for index, digest in enumerate(digests):
+            if digest in missing:
+                missing.discard(digest)
+                block_number = self.superblock.digests[digest]
+                last = writes[-1] if writes else None
+                if last and last[0] + last[2] == block_number and last[1] + last[2] == index:
+                    last[2] += 1
+                else:
+                    writes.append([block_number, index, 1])
+            else:
+                block_number = self.superblock.shared_block(digest)
+            blocks.append(block_number)
+
+        for block_number, index, count in writes:
+            writeExtent(block_number, view[index * BLOCK_SIZE:(index + count) * BLOCK_SIZE], self.disk_file)
+        return to_extents(blocks)
+
+    def deleteFile(self, inode_obj: Inode, parent_dir_obj: Directory) -> None:
+        if inode_obj.file_type == 1:    # is a dir
+            return
+
+        # free blocks, a lazily loaded file never had any
+        if inode_obj.source is None:
+            for start, length in inode_obj.extents:
+                self.superblock.free_extent(start, length)
+
+        # free inode number
+        self.superblock.free_inode(inode_obj.inode_number)
+
+        # delete entry from parent directory
+        self.inodes.writable(parent_dir_obj.inode_number).remove_by_inode(inode_obj.inode_number)
+
+        # delete from filesystem inodes dict
+        self.inodes.pop(inode_obj.inode_number)
+        self.dentries.invalidate(inode_obj.inode_number)
+
+    def deleteDir(self, dir_inode_obj: Directory, parent_dir_obj: Directory):
+
+        if dir_inode_obj.inode_number in (self.root_inode, self.PWD[0]):    # dont delete root or current dir
+            return
+
+        # (parent, dir) inode numbers, objects are looked up again since deletes copy them
+        stack = [(parent_dir_obj.inode_number, dir_inode_obj.inode_number)]
+
+        def getEmptiedChildDirs(inode_num: int) -> list[tuple[int, int]] | None:
+            nonlocal self
+
+            inode_obj = self.inodes[inode_num]
+            child_dirs = []
+
+            for name, child_inode_num in list(inode_obj.entries.items()):
+                if name in ('.', '..'):
+                    continue
+                child_inode_obj = self.inodes[child_inode_num]
+                if child_inode_obj.file_type == 1:
+                    child_dirs.append((inode_num, child_inode_num))
+                else:  # is a file
+                    self.deleteFile(child_inode_obj, inode_obj)
+
+            return child_dirs if len(child_dirs) != 0 else None
+
+        while stack:
+
+            parent_inode_num, inode_num = stack[-1]
+
+            if inode_num in (self.root_inode, self.PWD[0]):  # dont delete root or current dir
+                return
+
+            if child_dirs := getEmptiedChildDirs(inode_num):
+                stack.extend(child_dirs)    # revisit this dir once its children are gone
+            else:
+                stack.pop()
+
+                # delete entry from parent directory
+                self.inodes.writable(parent_inode_num).remove_by_inode(inode_num)
+
+                # remove from fs inodes dict
+                self.inodes.pop(inode_num)
+                self.dentries.invalidate(inode_num)
+
+                # free inode number
+                self.superblock.free_inode(inode_num)
+
+    def ls(self,
+           options: str = '',
+           long_options: dict[str, str] | None = None,
+           paths: list[str] | None = None,
+           ) -> str | None:
+
+        paths = paths or (self.PWD[1],)
+
+        error = ''
+
+        files = []
+        directories = []
+
+        count_blocks = ('l' in options) or ('s' in options)  # block count is enabled
+        total_blocks = [0]
+
+        for path in paths:
+
+            try:
+                inode_num = self.lookup(path)
+                inode_obj = self.inodes[inode_num]
+
+                if inode_obj.file_type == 0:
+                    files.append((path, inode_obj))
+                else:
+                    directories.append((path, inode_obj))
+
+            except DirNotFoundException:
+                error += f"ls: cannot access '{path}': No such file or directory\r\n"
+
+        parts = []      # joined once
+        for path, inode_obj in files:
+            parts.append(format_object(inode_obj, path, self.inodes, total_blocks, options, long_options))
+
+        for path, inode_obj in directories:
+            if len(paths) > 1:  # only print header if multiple paths were given
+                parts.append(f"\r\n\r\n{path}:\r\n")
+            parts.append(format_object(inode_obj, path, self.inodes, total_blocks, options, long_options))
+
+        output = ''.join(parts).lstrip('\r\n').rstrip('\r\n')  # cleanup leading/trailing newlines and spaces
+
+        output = (error + output).rstrip('\r\n\t')
+
+        if count_blocks and error == '':
+            output = f'total {total_blocks[0]}\r\n' + output
+
+        return output
+
+    def cd(self, path: str | None) -> str:  # returns error
+
+        if path is None:      # check if path exists
+            return ''
+
+        try:
+            inode = self.lookup(path)
+
+            if self.inodes[inode].file_type == 0:  # check if it's a file
+                return f"bash: cd: {path}: not a directory"
+
+            self.PWD = inode, self.inodes[inode].path
+
+        except DirNotFoundException:
+            return f"bash: cd: {path}: No such file or directory"
+
+    def touch(self, options: str | None, paths: list[str]) -> str | None:  # return error if any
+
+        error = ''
+
+        for path in paths:
+
+            try:
+                if path.find('/') == -1:  # is just a file
+                    dir_path = self.inodes[self.PWD[0]]
+                    filename = path
+                else:  # is a full path
+                    sep = path.rfind('/')
+                    dir_path = self.inodes[self.lookup(path[:sep])]
+                    filename = path[sep + 1:]
+
+                if filename in dir_path.list_filenames():  # check if file with this name already exists
+                    if options is None:     # check options to exist
+                        options = 'am'
+
+                    file_inode_obj = self.inodes.writable(dir_path.get_inode(filename))
+
+                    time = datetime.now()
+
+                    match options:
+                        case _ if 'a' in options:
+                            # change access time
+                            file_inode_obj.timestamps['accessed'] = time
+                        case _ if 'm' in options:
+                            # change modification time
+                            file_inode_obj.timestamps['modified'] = time
+                    continue
+
+                new_inode = self.superblock.allocate_inode()
+
+                if new_inode is None:  # inode allocation DIDNT work
+                    error = "Inode cannot be allocated."
+                    continue
+
+                self.inodes[new_inode] = Inode(new_inode, 0)
+
+                dir_path = self.inodes.writable(dir_path.inode_number)
+                dir_path.add(filename, new_inode)
+                dir_path.size += 16 + len(filename) // 2  # add entry size
+
+            except DirNotFoundException:
+                error = f"touch: cannot touch '{path}': Not a directory"
+
+        return error
+
+    def cat(self, paths: list[str]) -> str:
+
+        output = ''
+
+        for index, path in enumerate(paths):
+            try:
+                inode_obj = self.inodes[self.lookup(path)]
+
+                if inode_obj.file_type == 1:    # is a directory
+                    if index == 0:         # is the first path in arguments
+                        output = f'cat: {path}: Is a directory'
+                    break
+
+                file_data = readFile(inode_obj, self.disk_file).decode("utf-8")
+
+                if file_data:
+                    output += file_data + '\r\n'
+
+            except DirNotFoundException:
+                if index == 0:  # is the first path in arguments
+                    output = f"cat: '{path}': No such file or directory"
+                break
+            except UnicodeDecodeError:
+                output = ''
+                break
+
+        return output.rstrip()
+
+    def cat_stream(self, paths: list[str]) -> str | Iterator[bytes]:
+        """Same output as cat, encoded and generated in chunks while the caller sends them. \n
+        Errors on the first path still come back as a string. Chunks already sent cannot be taken back,
+        so a file that is not UTF-8 ends the stream where cat would have printed nothing"""
+        if not paths:
+            return ''
+        try:
+            inode_obj = self.inodes[self.lookup(paths[0])]
+        except DirNotFoundException:
+            return f"cat: '{paths[0]}': No such file or directory"
+        if inode_obj.file_type == 1:
+            return f'cat: {paths[0]}: Is a directory'
+
+        return rstripped(self._cat_chunks(paths))
+
+    def _cat_chunks(self, paths: list[str]) -> Iterator[bytes]:
+        for path in paths:
+            try:
+                inode_obj = self.inodes[self.lookup(path)]
+            except DirNotFoundException:
+                return
+            if inode_obj.file_type == 1:
+                return
+
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            has_data = False
+            try:
+                for chunk in iterFile(inode_obj, self.disk_file):
+                    decoder.decode(chunk)       # validate only, the bytes go out as they are
+                    has_data = True
+                    yield chunk
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                return
+
+            if has_data:
+                yield b'\r\n'
+
+    def rm(self, options: str | None, paths: list[str]) -> str:
+        output = ''
+
+        for index, path in enumerate(paths):
+            try:
+                inode_obj = self.inodes[self.lookup(path)]
+
+                parent_dir_obj = self.lookup_parent(path)
+
+                if inode_obj.file_type == 1:    # is a directory
+                    if 'r' in options:
+                        if path in ('.', '..'):
+                            if index == 0:
+                                output = 'rm: "." and ".." may not be removed'
+                            break
+                        self.deleteDir(inode_obj, parent_dir_obj)
+                        continue
+                    else:
+                        if index == 0:  # is the first path in arguments
+                            output = f'rm: {path}: Is a directory'
+                        break
+
+                # delete file
+                self.deleteFile(inode_obj, parent_dir_obj)
+
+            except DirNotFoundException:
+                if index == 0:  # is the first path in arguments
+                    output = f"rm: '{path}': No such file or directory"
+                break
+
+        return output
+
+    def echo(self, input_text: list[str]) -> str:
+        return ' '.join(input_text)
+
+    def cp(self):
+        pass
+
+    def df(self, options: str) -> str:
+        """Disk usage read from the superblock free counts, -h human readable sizes, -i inodes"""
+        superblock = self.superblock
+        if 'i' in options:
+            header = 'Inodes', 'IUsed', 'IFree', 'IUse%'
+            total, free = superblock.total_inodes, superblock.free_inode_count
+            format_size = str
+        else:
+            total, free = superblock.total_blocks * BLOCK_SIZE, superblock.free_block_count * BLOCK_SIZE
+            if 'h' in options:
+                header = 'Size', 'Used', 'Avail', 'Use%'
+                format_size = human_size
+            else:
+                header = '1K-blocks', 'Used', 'Available', 'Use%'
+                format_size = lambda size: str(size // 1024)
+
+        used = total - free
+        rows = (('Filesystem', *header, 'Mounted on'),
+                (DISK_DEVICE, format_size(total), format_size(used), format_size(free), f'{-(-used * 100 // total)}%',
+                 '/'))
+        return '\r\n'.join(f'{name:<15}{size:>10}{used:>8}{free:>10}{percent:>6} {mount}'
+                             for name, size, used, free, percent, mount in rows)
+
+    def pwd(self):
+        return self.PWD[1]
+
+    def path(self):
+        return self.PATH
+
+    def home(self):
+        return self.HOME
+
+    def user(self):
+        return self.USER
+
+    def hostname(self):
+        return self.HOSTNAME
+
+    def lang(self):
+        return self.LANG
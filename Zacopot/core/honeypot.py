@@ -1,241 +1,471 @@
-import socket
-import threading
-import time
-
-import paramiko
-
-from core.command_parser import command_parser
-from core.filesystem import FileSystem
-from models.models import CommandTypes
-from utils.constants import BANNER, KEY_PATH, FS_SOURCE_PATH, DISTRO, MAX_CONNECTIONS, \
-    MAX_BUFFER_SIZE, LOG_DIR
-from utils.loader import fs_loader
-import logging
-from copy import deepcopy
-
-
-# key = paramiko.RSAKey.generate(bits=2048)
-# key.write_private_key_file(key_path)
-
-class SSHServer(paramiko.ServerInterface):
-
-    def __init__(self, addr, command_logger, username: str = 'admin', password: str = 'admin'):
-        self.event = threading.Event()
-        self.client_ip, self.client_port = addr
-        self.command_logger = command_logger
-        self.username = username
-        self.password = password
-
-    def check_channel_request(self, kind, chanid):
-        if kind == 'session':
-            return paramiko.common.OPEN_SUCCEEDED
-        return paramiko.common.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
-
-    def get_allowed_auths(self, username):      # allow only user-pass auth
-        return 'password'
-
-    def check_auth_password(self, username, password):
-        self.command_logger.info(f'Client: {self.client_ip}:{self.client_port} | Type: {CommandTypes.CREDENTIALS} | Username: {repr(username)} | Password: {repr(password)}')
-
-        if self.username == username and self.password == password:
-            return paramiko.common.AUTH_SUCCESSFUL
-        return paramiko.common.AUTH_SUCCESSFUL
-
-    def check_channel_shell_request(self, channel):     # allows shell
-        self.event.set()
-        return True
-
-    def check_channel_pty_request(              # allow pseudo-terminal
-        self, channel, term, width, height, pixelwidth, pixelheight, modes
-    ):
-        return True
-
-    def check_channel_exec_request(self, channel, command):
-        # log exec commands even if not allowed
-        self.command_logger.info(
-            f'Client: {self.client_ip}:{self.client_port} | Type: {CommandTypes.EXEC} | Command: {repr(command)}')
-
-        return False
-
-
-def client_handler(file_system, sock, client, addr, host_key, command_logger, error_logger, active_connections: set, active_connections_lock, fatal_event, username: str, password: str):
-    client_ip, port = addr
-
-    with active_connections_lock:       # add new connection to active connections
-        active_connections.add(addr)
-
-    # log new connection
-    command_logger.info(f'Client: {client_ip}:{port} connected')
-
-    transport = paramiko.Transport(client)
-    transport.server_version = "SSH-2.0-OpenSSH_7.4p1 Debian-10+deb9u7"
-    transport.add_server_key(host_key)
-    server = SSHServer(addr, command_logger, username, password)
-
-    channel = None
-
-    try:
-        try:
-            # set up connection
-            transport.start_server(server=server)
-        except paramiko.SSHException as e:
-            error_logger.exception(f"Client: {client_ip}:{port} | SSHException: {e}")
-            transport.close()
-            client.close()
-            command_logger.info(f'Client: {client_ip}:{port} disconnected')
-            return
-        # set up connection
-        # transport.server_version = "SSH-2.0-OpenSSH_7.4p1 Debian-10+deb9u7"
-        # transport.start_server(server=server)
-
-        channel = transport.accept(20)      # wait 20 sec for channel
-        if channel is None:     # no channel
-            return
-        server.event.wait(10)               # wait 10 sec for shell request
-        if not server.event.is_set():       # no shell request
-            return
-
-        # start fake shell communication
-        path = file_system.PWD[1]
-        prompt = f'{username}@{DISTRO}:{path}$ '
-        channel.send(BANNER + prompt.encode())
-
-        buff = b''
-        command = ''
-
-        while True:
-            try:
-                data = channel.recv(1024)
-                if not data:
-                    return
-
-                channel.send(data)
-
-                buff += data
-
-                if len(buff) > MAX_BUFFER_SIZE:
-                    channel.send(b'Input too long. Connection closed.\n')
-                    break
-
-                # implement backspace
-                if buff and buff[-1] in (8, 127):
-                    buff = buff.rstrip(b'\x7f')
-                    if len(buff) > 0:
-                        buff = buff[:-1]
-                        channel.send(b'\b \b')
-                    continue
-
-                # if buff and buff.endswith((b'\x1b[A', b'\x1b[B', b'\x1b[C', b'\x1b[D', b'\x1b[3~')):
-                #     buff = buff[:-3]
-                #     channel.send(b'\b \b' * 3)
-                #     continue
-
-                if buff.endswith(b'\r') or buff.endswith(b'\n'):    # check for message ending
-                    command = buff.decode().strip()
-
-                    output = command_parser(file_system, command)
-
-                    if output == 'exit':
-                        break
-
-                    path = file_system.PWD[1]
-
-                    if len(output) != 0:
-                        output = '\r\n' + output
-                    prompt = f'{username}@{DISTRO}:{path}$ '
-                    channel.send((output + '\r\n' + prompt).encode())      # send back output
-                    buff = b''
-
-                    command_logger.info(f'Client: {client_ip}:{port} | Type: {CommandTypes.SHELL} | Command: {repr(command)} | Output: {output}')
-
-            except Exception:
-                command_logger.info(f'Client: {client_ip}:{port} | Type: {CommandTypes.SHELL} | Last Command: {repr(command)}')
-                error_logger.exception(f"Client: {client_ip}:{port} | Unexpected error")
-                channel.close()
-                fatal_event.set()  # set fatal event to propagate error
-                sock.close()       # close socket so the fatal event is seen in main thread
-                break
-
-    except Exception:
-        error_logger.exception(f"Client: {client_ip}:{port} | Unexpected error")
-        fatal_event.set()       # set fatal event to propagate error
-        if sock:
-            sock.close()  # close socket so the fatal event is seen in main thread
-
-    finally:
-        if channel:
-            channel.close()     # close channel if is open
-        transport.close()
-        client.close()
-
-        with active_connections_lock:       # remove client from active client connections
-            active_connections.remove(addr)
-
-        command_logger.info(f'Client: {client_ip}:{port} disconnected')
-
-        # set reference count to 0 asap
-        file_system = None
-
-
-def honeypot(host='0.0.0.0', port=2222, username: str = 'admin', password: str = 'admin'):
-    host_key = paramiko.RSAKey(filename=KEY_PATH)
-
-    # Command logger
-    command_logger = logging.getLogger('command_logger')
-    command_handler = logging.FileHandler(LOG_DIR + '/commands.log', encoding='utf-8')
-    command_handler.setLevel(logging.INFO)
-    command_handler.setFormatter(logging.Formatter('%(asctime)s | %(message)s'))
-    command_logger.addHandler(command_handler)
-    command_logger.setLevel(logging.INFO)
-
-    # Error logger
-    error_logger = logging.getLogger('error_logger')
-    error_handler = logging.FileHandler(LOG_DIR + '/errors.log', encoding='utf-8')
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s - %(message)s'))
-    error_logger.addHandler(error_handler)
-    error_logger.setLevel(logging.ERROR)
-
-    # network set up
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind((host, port))
-    sock.listen(100)
-    sock.settimeout(1.0)  # 1 second timeout
-
-    active_connections = set()      # cap active connections
-    active_connections_lock = threading.Lock()
-    fatal_event = threading.Event()     # for error propagation
-
-    print('Initializing filesystem...')
-    file_system = FileSystem()
-    fs_loader(file_system, FS_SOURCE_PATH)
-
-    print(f'SSH server is listening on port {port}.')
-
-    while True:
-        try:
-            client, addr = sock.accept()
-
-            with active_connections_lock:       # prevent more connections if max capacity is reached
-                if len(active_connections) >= MAX_CONNECTIONS:
-                    client.close()
-                    continue
-
-            # create fs deep copy for each client
-            fs_copy = deepcopy(file_system)
-
-            # create daemon threads to easily stop the main process
-            threading.Thread(target=client_handler, args=(fs_copy, sock, client, addr, host_key, command_logger, error_logger, active_connections, active_connections_lock, fatal_event, username, password), daemon=True).start()
-
-        except socket.timeout:
-            # check for internal exceptions
-            if fatal_event.is_set():
-                break
-        except Exception:
-            error_logger.exception(f"Unexpected error")
-            break
-
-
-if __name__ == '__main__':
-    honeypot()
+import signal
+import socket
+import threading
+import time
+from typing import Iterator
+
+import paramiko
+
+from core.admission import AdmissionController
+from core.command_parser import command_parser, KNOWN_COMMANDS
+from core.event_loop import SessionLoop, WRITE_BLOCKED
+from core.filesystem import FileSystem
+from core.image import boot_template
+from core.line_discipline import LineEditor
+from core.tarpit import Tarpit
+from core.template import TemplateStore
+from models.models import CommandTypes
+from utils.constants import BANNER, KEY_PATH, FS_SOURCE_PATH, DISTRO, LOG_DIR, LISTEN_BACKLOG, RECV_SIZE, \
+    TARPIT_ENABLED, METRICS_HOST, METRICS_PORT, TEMPLATE_WATCH_INTERVAL, LOG_OUTPUT_LIMIT
+from utils.block_cache import BLOCK_CACHE, EXTENT_CACHE
+from utils.log_writer import LogWriter
+from utils import metrics
+import logging
+
+
+# key = paramiko.RSAKey.generate(bits=2048)
+# key.write_private_key_file(key_path)
+
+class SSHServer(paramiko.ServerInterface):
+
+    def __init__(self, addr, command_logger, username: str = 'admin', password: str = 'admin', on_shell=None,
+                 on_auth=None, on_exec=None):
+        self.event = threading.Event()
+        self.on_shell = on_shell        # notified with the channel on shell request
+        self.on_exec = on_exec          # notified with the channel and command on exec request
+        self.on_auth = on_auth          # notified once on the first auth attempt, key exchange is done by then
+        self.client_ip, self.client_port = addr
+        self.command_logger = command_logger
+        self.username = username
+        self.password = password
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.common.OPEN_SUCCEEDED
+        return paramiko.common.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def _auth_attempt(self):
+        if self.on_auth:
+            self.on_auth()
+            self.on_auth = None
+
+    def get_allowed_auths(self, username):      # allow only user-pass auth
+        self._auth_attempt()
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        self._auth_attempt()
+        self.command_logger.info(f'Client: {self.client_ip}:{self.client_port} | Type: {CommandTypes.CREDENTIALS} | Username: {repr(username)} | Password: {repr(password)}')
+
+        if self.username == username and self.password == password:
+            return paramiko.common.AUTH_SUCCESSFUL
+        return paramiko.common.AUTH_SUCCESSFUL
+
+    def check_channel_shell_request(self, channel):     # allows shell
+        self.event.set()
+        if self.on_shell:
+            self.on_shell(channel)
+        return True
+
+    def check_channel_pty_request(              # allow pseudo-terminal
+        self, channel, term, width, height, pixelwidth, pixelheight, modes
+    ):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self.command_logger.info(
+            f'Client: {self.client_ip}:{self.client_port} | Type: {CommandTypes.EXEC} | Command: {repr(command)}')
+
+        if self.on_exec is None:
+            return False
+        self.on_exec(channel, command)
+        return True
+
+
+def exit_status(command: str, output: str) -> int:
+    """Exit status bash would report for the output of a command"""
+    if output.startswith('bash: '):     # 'bash: cd: nowhere: No such file or directory' is an error as well
+        return 127 if output.endswith('command not found') else 1
+    name = command.split(maxsplit=1)[0] if command.strip() else ''
+    return 1 if name and output.startswith(f'{name}: ') else 0
+
+
+def command_name(command: str) -> str:
+    """Metrics label of a command, unknown commands share one label to bound the label count"""
+    parts = command.split(maxsplit=1)
+    if not parts:
+        return 'empty'
+    return parts[0] if parts[0] in KNOWN_COMMANDS else 'unknown'
+
+
+def logged_output(head: bytes, size: int) -> str:
+    """Streamed output as written to the command log, head holds its first LOG_OUTPUT_LIMIT bytes"""
+    output = head.decode(errors='replace')
+    if size > len(head):
+        output += f'... <{size - len(head)} more bytes>'
+    return output
+
+
+class StderrData(bytes):
+    """Output chunk that goes to the stderr stream of an exec channel"""
+
+
+class Session:
+    """State of a single client connection, driven by the session loop"""
+
+    __slots__ = (
+        "template", "file_system", "client", "client_ip", "port", "transport", "server", "channel",
+        "command_logger", "error_logger", "username", "on_shell", "on_exec", "on_handshake", "accepted", "handshake_done", "editor", "command",
+        "command_type", "output", "pending", "offset",
+    )
+
+    def __init__(self, template: TemplateStore, client, addr, host_key, command_logger, error_logger,
+                 username: str, password: str, on_shell, on_handshake=None, on_exec=None):
+        self.template = template
+        self.file_system = None     # forked from the template once a shell is granted
+        self.client = client
+        self.client_ip, self.port = addr
+        self.command_logger = command_logger
+        self.error_logger = error_logger
+        self.username = username
+        self.on_shell = on_shell        # loop callback, receives the session
+        self.on_exec = on_exec          # loop callback, receives the session, exec requests are refused without it
+        self.on_handshake = on_handshake    # loop callback, receives the handshake latency
+        self.accepted = time.monotonic()
+        self.handshake_done = False
+        self.channel = None
+
+        self.editor = LineEditor()
+        self.command = ''
+        self.command_type = CommandTypes.SHELL
+        self.output = None      # generator of reply chunks still to be sent
+        self.pending = b''      # chunk being sent, from offset on
+        self.offset = 0
+
+        self.transport = paramiko.Transport(client)
+        self.transport.server_version = "SSH-2.0-OpenSSH_7.4p1 Debian-10+deb9u7"
+        self.transport.add_server_key(host_key)
+        self.server = SSHServer(addr, command_logger, username, password, on_shell=self._on_shell,
+                                on_auth=self._on_auth, on_exec=self._on_exec if on_exec else None)
+
+    def _on_auth(self):
+        latency = time.monotonic() - self.accepted
+        self.handshake_done = True
+        metrics.HANDSHAKES.labels('success').inc()
+        metrics.HANDSHAKE_SECONDS.observe(latency)
+        if self.on_handshake:
+            self.on_handshake(latency)
+
+    def _on_exec(self, channel, command: bytes):
+        self.channel = channel
+        self.command = command.decode(errors='replace').strip()
+        self.command_type = CommandTypes.EXEC
+        self.on_exec(self)
+
+    def _on_shell(self, channel):
+        self.channel = channel
+        self.on_shell(self)
+
+    def start(self):
+        # log new connection
+        self.command_logger.info(f'Client: {self.client_ip}:{self.port} connected')
+
+        # negotiation runs on the transport thread, the loop is notified on shell request
+        self.transport.start_server(event=threading.Event(), server=self.server)
+
+    def is_active(self) -> bool:
+        return self.transport.is_active()
+
+    def fileno(self) -> int:
+        return self.channel.fileno() if self.channel else -1
+
+    def open(self):
+        """Start fake shell communication"""
+        self.file_system = self.template.fork()
+        path = self.file_system.PWD[1]
+        prompt = f'{self.username}@{DISTRO}:{path}$ '
+        self.channel.send(BANNER + prompt.encode())
+
+    def on_readable(self) -> bool | str:
+        """Handles one chunk of client input, returns False when the session should end"""
+        channel = self.channel
+
+        try:
+            data = channel.recv(RECV_SIZE)
+            if not data:
+                return False
+            metrics.BYTES_RECEIVED.inc(len(data))
+            if self.command_type == CommandTypes.EXEC:      # stdin sent while the exec request is answered
+                return True
+
+            echo, lines = self.editor.feed(data)
+
+            if self.editor.overflow:
+                channel.sendall(b''.join(echo) + b'Input too long. Connection closed.\n')
+                return False
+
+        except Exception:
+            self.command_logger.info(f'Client: {self.client_ip}:{self.port} | Type: {CommandTypes.SHELL} | Last Command: {repr(self.command)}')
+            raise       # the loop logs the error and closes this session
+
+        self.output = self._shell_reply(echo, lines)
+        return self.flush()
+
+    def _shell_reply(self, echo: list[bytes], lines: list[bytes]):
+        """Generates the reply to one chunk of input, a command runs once the output before it was sent. \n
+        Returns False when the client typed exit"""
+        client_ip, port = self.client_ip, self.port
+        reply = [echo[0]]      # short outputs of this chunk go out in one send
+
+        for line, line_echo in zip(lines, echo[1:]):
+            self.command = line.decode(errors='replace').strip()
+
+            output = self._run(self.command)
+
+            if output == 'exit':
+                yield b''.join(reply)
+                return False
+
+            if isinstance(output, str):
+                if len(output) != 0:
+                    output = '\r\n' + output
+                reply.append(output.encode())
+            else:       # streamed, whatever is queued goes out first
+                reply.append(b'\r\n')
+                yield b''.join(reply)
+                reply = []
+                head, size = [], 0
+                for chunk in output:
+                    if size < LOG_OUTPUT_LIMIT:
+                        head.append(chunk[:LOG_OUTPUT_LIMIT - size])
+                    size += len(chunk)
+                    yield chunk
+                output = logged_output(b''.join(head), size)
+
+            path = self.file_system.PWD[1]
+            prompt = f'{self.username}@{DISTRO}:{path}$ '
+            reply.append(('\r\n' + prompt).encode())      # send back output
+            reply.append(line_echo)       # input typed after this line
+
+            self.command_logger.info(f'Client: {client_ip}:{port} | Type: {CommandTypes.SHELL} | Command: {repr(self.command)} | Output: {output}')
+
+        yield b''.join(reply)
+
+    def run_exec(self) -> bool | str:
+        """Runs an exec request without pty, banner or prompt. \n
+        The reply closes the channel and the session ends once the loop reads that, closing the transport here
+        would race the transport thread still acknowledging the request"""
+        self.file_system = self.template.fork()
+        self.output = self._exec_reply()
+        return self.flush()
+
+    def _exec_reply(self):
+        """Generates the output of every command in the exec request, errors on stderr, then closes the channel
+        with the exit status. The client then ends the connection, even with its stdin still open"""
+        status = 0
+
+        for command in self.command.replace('\n', ';').split(';'):      # 'uname -a; cat /proc/cpuinfo'
+            command = command.strip()
+            if not command:
+                continue
+            output = self._run(command)
+            if output == 'exit':
+                break
+
+            if isinstance(output, str):
+                status = exit_status(command, output)
+                if output:
+                    data = (output.replace('\r\n', '\n') + '\n').encode()
+                    yield StderrData(data) if status else data
+            else:
+                status = 0
+                chunk = b''
+                for chunk in output:
+                    yield chunk.replace(b'\r\n', b'\n')
+                if chunk:
+                    yield b'\n'
+
+        self.channel.send_exit_status(status)
+        self.channel.shutdown_write()
+        self.channel.close()
+
+    def flush(self) -> bool | str:
+        """Sends queued output while the send window of the channel allows it. \n
+        Returns WRITE_BLOCKED when the client stopped reading, the loop calls flush again once the window opened,
+        so a slow reader holds one chunk and a paused generator instead of the whole output"""
+        channel = self.channel
+
+        try:
+            while True:
+                if self.offset >= len(self.pending):
+                    try:
+                        self.pending, self.offset = next(self.output), 0
+                    except StopIteration as stop:
+                        self.output, self.pending, self.offset = None, b'', 0
+                        return stop.value is not False
+                    continue
+
+                if not channel.send_ready():
+                    return WRITE_BLOCKED
+
+                send = channel.send_stderr if isinstance(self.pending, StderrData) else channel.send
+                sent = send(self.pending[self.offset:])
+                self.offset += sent
+                metrics.BYTES_SENT.inc(sent)
+
+        except Exception:
+            self.command_logger.info(f'Client: {self.client_ip}:{self.port} | Type: {self.command_type} | Last Command: {repr(self.command)}')
+            raise
+
+    def writable(self) -> bool:
+        return self.channel.send_ready()
+
+    def _run(self, command: str) -> str | Iterator[bytes]:
+        start = time.perf_counter()
+        output = command_parser(self.file_system, command, stream=True)
+        name = command_name(command)
+        metrics.COMMANDS.labels(name).inc()
+        metrics.COMMAND_SECONDS.labels(name).observe(time.perf_counter() - start)
+        return output
+
+    def close(self, reason: str | None = None):
+        """Tears the connection down, reason is set when the reaper closes the session"""
+        error = self.transport.get_exception()
+        if isinstance(error, paramiko.SSHException):     # failed handshake
+            self.error_logger.error(f"Client: {self.client_ip}:{self.port} | SSHException: {error}")
+        if not self.handshake_done:
+            metrics.HANDSHAKES.labels('failure').inc()
+        if self.file_system is not None:
+            metrics.SESSION_FS_INODES.observe(len(self.file_system.inodes.overlay))
+            dentries = self.file_system.dentries
+            metrics.DENTRY_LOOKUPS.labels('hit').inc(dentries.hits)
+            metrics.DENTRY_LOOKUPS.labels('miss').inc(dentries.misses)
+
+        if self.channel:
+            if reason == 'idle':        # same message bash prints when TMOUT expires
+                try:
+                    self.channel.settimeout(1.0)
+                    self.channel.sendall(b'\r\ntimed out waiting for input: auto-logout\r\n')
+                except Exception:
+                    pass
+            self.channel.close()     # close channel if is open
+        self.transport.close()
+        self.client.close()
+
+        if reason:
+            self.command_logger.info(f'Client: {self.client_ip}:{self.port} disconnected ({reason})')
+        else:
+            self.command_logger.info(f'Client: {self.client_ip}:{self.port} disconnected')
+
+        if self.file_system is None:    # scanner or failed handshake, no filesystem was ever built
+            self.template.skipped()
+
+        if self.output is not None:     # drops a reply still waiting on the send window
+            self.output.close()
+            self.output = None
+
+        # set reference count to 0 asap
+        self.file_system = None
+
+
+def honeypot(host='0.0.0.0', port=2222, username: str = 'admin', password: str = 'admin',
+             worker_id: int | None = None, file_system: FileSystem | None = None, metrics_port: int | None = METRICS_PORT):
+    host_key = paramiko.RSAKey(filename=KEY_PATH)
+
+    # workers started by the supervisor write their own log files
+    log_suffix = '' if worker_id is None else f'.{worker_id}'
+
+    # records are written by a background thread, sessions never wait on the log files
+    log_writer = LogWriter()
+    command_log = LOG_DIR + f'/commands{log_suffix}.log'
+    error_log = LOG_DIR + f'/errors{log_suffix}.log'
+    log_writer.drop_report_file = error_log
+
+    # Command logger
+    command_logger = logging.getLogger('command_logger')
+    command_handler = log_writer.handler(command_log, logging.Formatter('%(asctime)s | %(message)s'), logging.INFO)
+    command_logger.addHandler(command_handler)
+    command_logger.setLevel(logging.INFO)
+
+    # Error logger
+    error_logger = logging.getLogger('error_logger')
+    error_handler = log_writer.handler(error_log, logging.Formatter('%(asctime)s | %(levelname)s - %(message)s'), logging.ERROR)
+    error_logger.addHandler(error_handler)
+    error_logger.setLevel(logging.ERROR)
+
+    # network set up
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if worker_id is not None:       # every worker binds the same port, the kernel balances connections
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+
+    if file_system is None:     # workers inherit the template built by the supervisor
+        file_system = boot_template(FS_SOURCE_PATH)
+    template = TemplateStore(file_system, FS_SOURCE_PATH, command_logger, error_logger)
+    if TEMPLATE_WATCH_INTERVAL:
+        template.watch(TEMPLATE_WATCH_INTERVAL)
+
+    def session_factory(client, addr, loop: SessionLoop) -> Session:
+        # the copy-on-write view of the template is forked on shell request
+        return Session(template, client, addr, host_key, command_logger, error_logger, username, password,
+                       loop.shell_ready, loop.handshake_done, loop.exec_ready)
+
+    print(f'SSH server is listening on port {port}.')
+
+    # per-ip rate and session caps, refused clients are held on a slow banner when the tarpit is enabled
+    admission = AdmissionController(command_logger, tarpit=TARPIT_ENABLED)
+    tarpit = Tarpit(command_logger) if TARPIT_ENABLED else None
+
+    loop = SessionLoop(sock, session_factory, error_logger, admission=admission, tarpit=tarpit)
+
+    # gauges are read when /metrics is scraped
+    metrics_server = None
+    if metrics_port is not None:
+        metrics.REGISTRY.set_callback('zacopot_sessions_active', lambda: len(loop.sessions))
+        metrics.REGISTRY.set_callback('zacopot_handshakes_pending', lambda: len(loop.pending))
+        metrics.REGISTRY.set_callback('zacopot_connections_accepted_total', lambda: loop.stats.accepted)
+        metrics.REGISTRY.set_callback('zacopot_connections_shed_total', lambda: dict(loop.stats.shed))
+        metrics.REGISTRY.set_callback('zacopot_handshake_queue_depth', lambda: len(loop.queue))
+        metrics.REGISTRY.set_callback('zacopot_session_work_depth', loop.stats.work_depth)
+        metrics.REGISTRY.set_callback('zacopot_log_queue_depth', log_writer.depth)
+        metrics.REGISTRY.set_callback('zacopot_log_records_dropped_total', lambda: log_writer.dropped)
+        metrics.REGISTRY.set_callback('zacopot_block_cache_total', BLOCK_CACHE.stats)
+        metrics.REGISTRY.set_callback('zacopot_block_cache_bytes', lambda: BLOCK_CACHE.size)
+        metrics.REGISTRY.set_callback('zacopot_extent_cache_total', EXTENT_CACHE.stats)
+        metrics.REGISTRY.set_callback('zacopot_extent_cache_bytes', lambda: EXTENT_CACHE.size)
+        metrics.REGISTRY.set_callback('zacopot_template_blocks', lambda: {
+            kind: template.file_system.superblock.dedup_stats()[f'{kind}_blocks']
+            for kind in ('stored', 'referenced', 'shared')})
+        metrics.REGISTRY.set_callback('zacopot_template_dedup_saved_bytes',
+                                      lambda: template.file_system.superblock.dedup_stats()['bytes_saved'])
+        metrics.REGISTRY.set_callback('zacopot_filesystem_forks_total',
+                                      lambda: {'forked': template.forks, 'avoided': template.avoided})
+        # supervised workers each listen on their own port
+        metrics_server = metrics.start_metrics_server(METRICS_HOST, metrics_port + (worker_id or 0))
+
+    if threading.current_thread() is threading.main_thread():     # stop cleanly so queued logs are written
+        signal.signal(signal.SIGTERM, lambda signum, frame: loop.stop())
+        # rebuild the template from FS_SOURCE_PATH, live sessions keep their current copy
+        signal.signal(signal.SIGHUP, lambda signum, frame: template.reload_in_background())
+
+    log_writer.start()
+    try:
+        loop.run()
+    finally:
+        command_logger.info(f'Filesystem forks: {template.forks} | Avoided: {template.avoided}')
+        stats = loop.stats
+        command_logger.info(f'Accepted: {stats.accepted} | Rejected: {stats.rejected} | Shed: {stats.shed} | '
+                            f'Queue expired: {stats.expired} | Max queue wait: {stats.queue_wait_max:.3f}s | '
+                            f'Max work wait: {stats.work_wait_max:.3f}s')
+        if metrics_server:
+            metrics_server.shutdown()
+        template.close()
+        command_logger.removeHandler(command_handler)
+        error_logger.removeHandler(error_handler)
+        log_writer.stop()
+
+
+if __name__ == '__main__':
+    honeypot()
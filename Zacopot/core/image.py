@@ -0,0 +1,140 @@
+"""Compiled filesystem images. \n
+An image is a template saved in a single file that is mapped read-only at boot instead of loading the source
+directory again. The file starts with the data region, the blocks of the template disk file at their usual
+offsets, so the shared BlockDevice of the image serves file contents as before. The CompactInodeTable arrays,
+its string tables, the superblock bitmaps and the reference counts of shared blocks follow, then a JSON header
+and a fixed footer:
+
+    [data blocks 0..last used][sections, 8 byte aligned][header][footer]
+
+Run from the Zacopot directory: python -m core.image [source] [image]"""
+import argparse
+import json
+import os
+import struct
+import time
+from array import array
+
+from core.filesystem import FileSystem, InodeTable, Superblock
+from core.template import build_template
+from exceptions.fsExceptions import ImageFormatException
+from models.inode_store import CompactInodeTable, ARRAY_FIELDS
+from utils.bitmap import Bitmap
+from utils.block_device import block_device, close_device
+from utils.constants import BLOCK_SIZE, DISK_FILE_NAME, FS_SOURCE_PATH, FS_IMAGE_PATH
+
+IMAGE_MAGIC = b'ZACOIMG\x00'
+IMAGE_VERSION = 4     # 2: source paths of lazily loaded files, 3: shared block reference counts, 4: compression
+FOOTER = struct.Struct('<8sIQQ')    # magic, version, header offset, header size
+
+
+def write_image(file_system: FileSystem, path: str):
+    """Turns the disk file of a freshly built template, path, into an image of it"""
+    table = CompactInodeTable(file_system.inodes)
+    superblock = file_system.superblock
+    sections = dict(table.sections(), blocks=superblock.blocks.to_bytes(), inodes=superblock.inodes.to_bytes(),
+                    ref_blocks=array('I', superblock.refs.keys()), ref_counts=array('I', superblock.refs.values()))
+
+    close_device(path)      # the device maps the old size
+    with open(path, 'r+b') as image:
+        image.truncate((superblock.blocks.last_used() + 1) * BLOCK_SIZE)
+        image.seek(0, os.SEEK_END)
+
+        index = {}
+        for name, data in sections.items():
+            if isinstance(data, list):
+                typecode, payload = 's', '\0'.join(data).encode()
+            elif isinstance(data, array):
+                typecode, payload = data.typecode, data.tobytes()
+            else:
+                typecode, payload = 'B', data
+            image.write(bytes(-image.tell() % 8))      # memoryview.cast needs aligned items
+            index[name] = (image.tell(), len(payload), typecode)
+            image.write(payload)
+
+        header = json.dumps({
+            'root_inode': file_system.root_inode,
+            'inodes': len(table),
+            'sections': index,
+        }).encode()
+        header_offset = image.tell()
+        image.write(header)
+        image.write(FOOTER.pack(IMAGE_MAGIC, IMAGE_VERSION, header_offset, len(header)))
+
+
+def build_image(source: str = FS_SOURCE_PATH, path: str = FS_IMAGE_PATH):
+    """Compiles the source directory into an image, replacing any earlier one at once"""
+    partial = f'{path}.{os.getpid()}.partial'
+    try:
+        write_image(build_template(source, partial), partial)
+        close_device(path)
+        os.replace(partial, path)
+    finally:
+        close_device(partial)
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def load_image(path: str = FS_IMAGE_PATH) -> FileSystem:
+    """Template filesystem over an image. \n
+    The inode arrays are views into the read-only map of the image, shared with every process that maps it,
+    only the string tables and the bitmaps are copied \n
+    :raises ImageFormatException"""
+    device = block_device(path, writable=False)
+    size = os.fstat(device.fd).st_size
+    if size < FOOTER.size:
+        raise ImageFormatException(f'{path} is not a filesystem image')
+    magic, version, header_offset, header_size = FOOTER.unpack(device.read_at(size - FOOTER.size, FOOTER.size))
+    if magic != IMAGE_MAGIC:
+        raise ImageFormatException(f'{path} is not a filesystem image')
+    if version != IMAGE_VERSION:
+        raise ImageFormatException(f'{path} has image version {version}, expected {IMAGE_VERSION}, rebuild it')
+    header = json.loads(device.read_at(header_offset, header_size))
+
+    sections = {}
+    for name, (offset, length, typecode) in header['sections'].items():
+        data = device.view(offset, length)
+        if typecode == 's':
+            text = str(data, 'utf-8')
+            sections[name] = text.split('\0') if text else []
+        elif name in ARRAY_FIELDS or name.startswith('ref_'):
+            sections[name] = data.cast(typecode)
+        else:
+            sections[name] = data
+
+    file_system = FileSystem(path)
+    file_system.superblock = Superblock.from_bitmaps(Bitmap.from_bytes(sections['blocks']),
+                                                     Bitmap.from_bytes(sections['inodes']),
+                                                     dict(zip(sections['ref_blocks'], sections['ref_counts'])))
+    file_system.inodes = InodeTable(CompactInodeTable.from_sections(sections, header['inodes']))
+    file_system.root_inode = header['root_inode']
+    file_system.PWD = file_system.root_inode, file_system.inodes[file_system.root_inode].path
+    return file_system
+
+
+def boot_template(source: str = FS_SOURCE_PATH, path: str = FS_IMAGE_PATH) -> FileSystem:
+    """The image when one was built, otherwise the source directory is loaded into DISK_FILE_NAME as before"""
+    if os.path.exists(path):
+        print(f'Mapping filesystem image {path}...')
+        return load_image(path)
+    print('Initializing filesystem...')
+    return build_template(source, DISK_FILE_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', nargs='?', default=FS_SOURCE_PATH)
+    parser.add_argument('image', nargs='?', default=FS_IMAGE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_image(args.source, args.image)
+    print(f'Built {args.image} from {args.source} in {time.perf_counter() - start:.2f}s, '
+          f'{os.path.getsize(args.image)} bytes.')
+    stats = load_image(args.image).superblock.dedup_stats()
+    print(f'{stats["referenced_blocks"]} blocks referenced, {stats["stored_blocks"]} stored, '
+          f'{stats["bytes_saved"]} bytes saved by sharing, ratio {stats["ratio"]}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+import re
+
+from utils.constants import MAX_BUFFER_SIZE, HISTORY_SIZE
+
+# bytes that need handling, everything else is inserted as typed
+SPECIAL_BYTES = re.compile(rb'[\x00-\x1f\x7f]')
+
+BACKSPACE = (8, 127)
+LINE_END = (10, 13)
+ESC = 27
+CTRL_A, CTRL_C, CTRL_E, CTRL_U = 1, 3, 5, 21
+
+
+def columns(data: bytes | bytearray) -> int:
+    """Number of terminal columns taken by utf-8 text, continuation bytes take none"""
+    return sum(1 for b in data if b & 0xC0 != 0x80)
+
+
+class LineEditor:
+    """Terminal line discipline for the fake shell. \n
+    Feeds raw client input into a growable line buffer and returns the echo for the whole chunk
+    together with every completed line, so one recv costs one send. \n
+    The echo is split at each completed line, echo[k] is shown before the output of lines[k]"""
+
+    __slots__ = ("line", "cursor", "history", "history_index", "max_length", "overflow", "_escape", "_after_cr")
+
+    def __init__(self, max_length: int = MAX_BUFFER_SIZE):
+        self.line = bytearray()
+        self.cursor = 0             # byte offset into line
+        self.history: list[bytes] = []
+        self.history_index = 0
+        self.max_length = max_length
+        self.overflow = False       # set once a line grows past max_length
+        self._escape = bytearray()      # escape sequence split across recv calls
+        self._after_cr = False      # LF right after CR ends the same line
+
+    def feed(self, data: bytes) -> tuple[list[bytes], list[bytes]]:
+        """Processes one chunk of input, returns (echo segments, completed lines) \n
+        There is always one more echo segment than completed lines"""
+        segments = []
+        echo = bytearray()
+        lines = []
+        line = self.line
+        i = 0
+        size = len(data)
+
+        while i < size:
+            if self._escape:
+                i = self._feed_escape(data, i, echo)
+                continue
+
+            byte = data[i]
+
+            if byte == 10 and self._after_cr:       # CRLF
+                self._after_cr = False
+                echo.append(byte)
+                i += 1
+                continue
+            self._after_cr = False
+
+            match = SPECIAL_BYTES.search(data, i)
+            end = match.start() if match else size
+
+            if end > i:     # run of printable bytes
+                chunk = data[i:end]
+                if self.cursor == len(line):    # typing or pasting at the end of the line
+                    line += chunk
+                    echo += chunk
+                else:
+                    tail = line[self.cursor:]
+                    line[self.cursor:self.cursor] = chunk
+                    echo += chunk + tail + b'\b' * columns(tail)
+                self.cursor += len(chunk)
+                if len(line) > self.max_length:
+                    self.overflow = True
+                    segments.append(bytes(echo))
+                    return segments, lines
+                i = end
+                continue
+
+            i += 1
+
+            if byte in LINE_END:
+                echo.append(byte)
+                segments.append(bytes(echo))
+                echo.clear()
+                completed = bytes(line)
+                lines.append(completed)
+                self._remember(completed)
+                line.clear()
+                self.cursor = 0
+                self._after_cr = byte == 13
+            elif byte in BACKSPACE:
+                self._backspace(echo)
+            elif byte == ESC:
+                self._escape.append(byte)
+            elif byte == CTRL_C:
+                echo += b'^C'
+                segments.append(bytes(echo))
+                echo.clear()
+                lines.append(b'')
+                line.clear()
+                self.cursor = 0
+            elif byte == CTRL_U:
+                self._replace(b'', echo)
+            elif byte == CTRL_A:
+                self._move(-self.cursor, echo)
+            elif byte == CTRL_E:
+                self._move(len(line) - self.cursor, echo)
+            # other control characters are ignored
+
+        segments.append(bytes(echo))
+        return segments, lines
+
+    # editing -----------------------------------------------------------------
+
+    def _remember(self, line: bytes):
+        if line.strip() and (not self.history or self.history[-1] != line):
+            self.history.append(line)
+            if len(self.history) > HISTORY_SIZE:
+                del self.history[0]
+        self.history_index = len(self.history)
+
+    def _char_start(self, position: int) -> int:
+        """Start of the utf-8 character that ends right before position"""
+        position -= 1
+        while position > 0 and self.line[position] & 0xC0 == 0x80:
+            position -= 1
+        return position
+
+    def _char_end(self, position: int) -> int:
+        position += 1
+        while position < len(self.line) and self.line[position] & 0xC0 == 0x80:
+            position += 1
+        return position
+
+    def _backspace(self, echo: bytearray):
+        if self.cursor == 0:
+            return
+        start = self._char_start(self.cursor)
+        del self.line[start:self.cursor]
+        self.cursor = start
+        tail = self.line[start:]
+        echo += b'\b' + tail + b' ' + b'\b' * (columns(tail) + 1)
+
+    def _delete(self, echo: bytearray):
+        if self.cursor == len(self.line):
+            return
+        del self.line[self.cursor:self._char_end(self.cursor)]
+        tail = self.line[self.cursor:]
+        echo += tail + b' ' + b'\b' * (columns(tail) + 1)
+
+    def _move(self, offset: int, echo: bytearray):
+        """Moves the cursor by a byte offset that lands on a character boundary"""
+        target = self.cursor + offset
+        if target < self.cursor:
+            echo += b'\b' * columns(self.line[target:self.cursor])
+        else:
+            echo += self.line[self.cursor:target]      # redraw to move right
+        self.cursor = target
+
+    def _replace(self, new_line: bytes, echo: bytearray):
+        """Replaces the whole line, used for history and line kill"""
+        old_columns = columns(self.line)
+        echo += b'\b' * columns(self.line[:self.cursor])
+        echo += new_line
+        padding = max(old_columns - columns(new_line), 0)
+        echo += b' ' * padding + b'\b' * padding
+        self.line[:] = new_line
+        self.cursor = len(self.line)
+
+    def _feed_escape(self, data: bytes, i: int, echo: bytearray) -> int:
+        """Collects an escape sequence, returns the next input index"""
+        self._escape.append(data[i])
+        i += 1
+        sequence = bytes(self._escape)
+
+        if len(sequence) == 2 and sequence != b'\x1b[' and sequence != b'\x1bO':
+            self._escape.clear()        # unknown two byte sequence
+            return i
+        if len(sequence) < 3 or (sequence[-1] < 0x40 and len(sequence) < 8):    # sequence not finished yet
+            return i
+
+        self._escape.clear()
+        match sequence[2:]:
+            case b'C':      # right
+                if self.cursor < len(self.line):
+                    self._move(self._char_end(self.cursor) - self.cursor, echo)
+            case b'D':      # left
+                if self.cursor > 0:
+                    self._move(self._char_start(self.cursor) - self.cursor, echo)
+            case b'H' | b'1~':      # home
+                self._move(-self.cursor, echo)
+            case b'F' | b'4~':      # end
+                self._move(len(self.line) - self.cursor, echo)
+            case b'3~':     # delete
+                self._delete(echo)
+            case b'A':      # history up
+                if self.history_index > 0:
+                    self.history_index -= 1
+                    self._replace(self.history[self.history_index], echo)
+            case b'B':      # history down
+                if self.history_index < len(self.history):
+                    self.history_index += 1
+                    entry = self.history[self.history_index] if self.history_index < len(self.history) else b''
+                    self._replace(entry, echo)
+        return i
@@ -0,0 +1,156 @@
+import os
+import signal
+import time
+import traceback
+from collections import deque
+
+from core.image import boot_template
+from core.honeypot import honeypot
+from core.template import TemplateStore
+from utils.constants import FS_SOURCE_PATH, WORKER_RESTART_DELAY, WORKER_MAX_RESTART_DELAY, \
+    WORKER_MAX_RESTARTS, WORKER_RESTART_WINDOW
+
+
+class Supervisor:
+    """Keeps a fixed number of forked worker processes running. \n
+    A crashed worker is restarted under the same id with exponential backoff, the other workers are left alone"""
+
+    def __init__(self, workers: int, worker_main,
+                 restart_delay: float = WORKER_RESTART_DELAY,
+                 max_restart_delay: float = WORKER_MAX_RESTART_DELAY,
+                 max_restarts: int = WORKER_MAX_RESTARTS,
+                 restart_window: float = WORKER_RESTART_WINDOW,
+                 on_reload=None):
+        self.workers = workers
+        self.worker_main = worker_main      # (worker_id) -> None, runs in the child process
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.on_reload = on_reload          # called on SIGHUP before it is forwarded to the workers
+
+        self.children: dict[int, int] = {}          # pid -> worker id
+        self.restarts: dict[int, float] = {}        # worker id -> restart time
+        self.crashes: dict[int, deque] = {}         # worker id -> recent crash times
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self, worker_id: int):
+        pid = os.fork()
+        if pid == 0:    # worker process
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)      # until the worker installs its reload handler
+            exit_code = 0
+            try:
+                self.worker_main(worker_id)
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.children[pid] = worker_id
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self) -> bool:
+        """Collects exited workers and schedules their restart, returns False once the crash limit is hit"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return True
+            if pid == 0:
+                return True
+
+            worker_id = self.children.pop(pid, None)
+            if worker_id is None or self.stopping:
+                continue
+
+            now = time.monotonic()
+            crashes = self.crashes.setdefault(worker_id, deque())
+            crashes.append(now)
+            while crashes and now - crashes[0] > self.restart_window:
+                crashes.popleft()
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            if len(crashes) > self.max_restarts:
+                print(f'Worker {worker_id} (pid {pid}) exited with status {exit_code}, '
+                      f'{len(crashes)} crashes in {self.restart_window:.0f}s, stopping.')
+                return False
+
+            delay = min(self.restart_delay * 2 ** (len(crashes) - 1), self.max_restart_delay)
+            print(f'Worker {worker_id} (pid {pid}) exited with status {exit_code}, restarting in {delay:.1f}s.')
+            self.restarts[worker_id] = now + delay
+
+    def reload(self):
+        """Refreshes the template inherited by restarted workers and tells the running ones to reload"""
+        if self.on_reload:
+            self.on_reload()
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    def _request_reload(self, signum=None, frame=None):
+        self.reload_requested = True
+
+    def run(self) -> int:
+        """Runs until stopped by a signal, returns the process exit code"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+
+        for worker_id in range(self.workers):
+            self.spawn(worker_id)
+
+        exit_code = 0
+
+        while self.children or (self.restarts and not self.stopping):
+            if not self._reap():
+                exit_code = 1
+                self.stop()
+                continue
+
+            if self.reload_requested and not self.stopping:
+                self.reload_requested = False
+                self.reload()
+
+            now = time.monotonic()
+            for worker_id, restart_time in list(self.restarts.items()):
+                if self.stopping:
+                    self.restarts.clear()
+                elif now >= restart_time:
+                    self.restarts.pop(worker_id)
+                    self.spawn(worker_id)
+
+            time.sleep(0.1)
+
+        return exit_code
+
+
+def supervisor(workers: int, host='0.0.0.0', port=2222, username: str = 'admin', password: str = 'admin',
+               metrics_port: int | None = None) -> int:
+    """Forks worker processes that share the listening port through SO_REUSEPORT. \n
+    The template filesystem is built once and inherited by every worker, SIGHUP reloads it everywhere"""
+
+    template = TemplateStore(boot_template(FS_SOURCE_PATH), FS_SOURCE_PATH)
+
+    def worker_main(worker_id: int):
+        honeypot(host, port, username, password, worker_id=worker_id, file_system=template.file_system,
+                 metrics_port=metrics_port)
+
+    def on_reload():
+        if template.reload():
+            print(f'Template reloaded, generation {template.generation}.')
+
+    print(f'Supervisor starting {workers} workers on port {port}.')
+
+    return Supervisor(workers, worker_main, on_reload=on_reload).run()
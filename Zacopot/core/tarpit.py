@@ -0,0 +1,56 @@
+import random
+import socket
+import time
+
+from utils.constants import TARPIT_INTERVAL, TARPIT_MAX, TARPIT_MAX_HOLD
+
+
+class Tarpit:
+    """Holds abusive clients on a slow-drip banner instead of a paramiko Transport. \n
+    SSH allows lines before the version string, a client keeps waiting for it while one random line
+    is sent every interval. Driven by the session loop tick, costs only an open socket per client"""
+
+    def __init__(self, command_logger, interval: float = TARPIT_INTERVAL, max_clients: int = TARPIT_MAX,
+                 max_hold: float = TARPIT_MAX_HOLD):
+        self.command_logger = command_logger
+        self.interval = interval
+        self.max_clients = max_clients
+        self.max_hold = max_hold
+        self.clients: dict[socket.socket, tuple[tuple[str, int], float, float]] = {}  # sock -> (addr, start, next send)
+
+    def add(self, client: socket.socket, addr: tuple[str, int], now: float | None = None) -> bool:
+        """Starts holding a client, returns False when the tarpit is full"""
+        if len(self.clients) >= self.max_clients:
+            return False
+        now = time.monotonic() if now is None else now
+        client.setblocking(False)
+        self.clients[client] = (addr, now, now)
+        self.command_logger.info(f'Client: {addr[0]}:{addr[1]} | Tarpit: held')
+        return True
+
+    def tick(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        for client, (addr, start, next_send) in list(self.clients.items()):
+            if now < next_send:
+                continue
+            if now - start > self.max_hold:
+                self._release(client, addr, start, now)
+                continue
+            try:
+                client.send(b'%x\r\n' % random.getrandbits(32))
+            except (BlockingIOError, InterruptedError):     # client is not reading, fine
+                pass
+            except OSError:     # client gave up
+                self._release(client, addr, start, now)
+                continue
+            self.clients[client] = (addr, start, now + self.interval)
+
+    def close(self):
+        now = time.monotonic()
+        for client, (addr, start, _) in list(self.clients.items()):
+            self._release(client, addr, start, now)
+
+    def _release(self, client: socket.socket, addr: tuple[str, int], start: float, now: float):
+        self.clients.pop(client, None)
+        client.close()
+        self.command_logger.info(f'Client: {addr[0]}:{addr[1]} | Tarpit: released after {now - start:.0f}s')
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+import weakref
+
+from core.filesystem import FileSystem
+from utils.block_device import close_device
+from utils.constants import BLOCK_SIZE, TOTAL_BLOCKS, DISK_FILE_NAME, FS_SOURCE_PATH, COMPACT_TEMPLATE, \
+    LAZY_CONTENT, DEDUP_BLOCKS, COMPRESSION_CODEC
+from utils.loader import fs_loader
+
+
+def build_template(source: str, disk_file: str, lazy: bool = LAZY_CONTENT, dedup: bool = DEDUP_BLOCKS,
+                   codec: str | None = COMPRESSION_CODEC) -> FileSystem:
+    """Loads a template filesystem from the source directory into a fresh disk file"""
+    close_device(disk_file)     # a device still mapping an earlier file of that name would see it truncated
+    with open(disk_file, 'wb') as f:
+        f.truncate(TOTAL_BLOCKS * BLOCK_SIZE)
+    file_system = FileSystem(disk_file)
+    fs_loader(file_system, source, lazy, dedup, codec)
+    return file_system
+
+
+def template_size(file_system: FileSystem) -> tuple[int, int, int]:
+    """Returns (inodes, blocks, content bytes) of a template"""
+    inodes = list(file_system.inodes)
+    blocks = sum(len(file_system.inodes[n]) for n in inodes)
+    size = sum(file_system.inodes[n].size for n in inodes)
+    return len(inodes), blocks, size
+
+
+def source_signature(source: str) -> tuple[int, float]:
+    """Cheap change check of the source directory, (entry count, newest mtime)"""
+    count, newest = 0, 0.0
+    for root, dirs, files in os.walk(source):
+        for name in dirs + files:
+            count += 1
+            try:
+                newest = max(newest, os.stat(os.path.join(root, name)).st_mtime)
+            except OSError:     # removed while walking
+                pass
+    return count, newest
+
+
+def _remove_disk_file(disk_file: str, owner_pid: int):
+    close_device(disk_file)
+    if os.getpid() == owner_pid:     # forked workers inherit the finalizer, only the creator removes the file
+        try:
+            os.remove(disk_file)
+        except OSError:
+            pass
+
+
+class TemplateStore:
+    """Owns the template filesystem and hands out copy-on-write forks of it. \n
+    Sessions fork only once a shell is granted, connections that never get that far are counted as avoided.
+    A reload builds the next generation into its own disk file and swaps it in for new sessions,
+    sessions forked earlier keep reading the previous generation until they close"""
+
+    def __init__(self, file_system: FileSystem, source: str = FS_SOURCE_PATH,
+                 command_logger: logging.Logger | None = None, error_logger: logging.Logger | None = None):
+        if COMPACT_TEMPLATE:        # before the supervisor forks, so workers share the arrays
+            file_system.compact()
+        self.file_system = file_system
+        self.source = source
+        self.command_logger = command_logger or logging.getLogger(__name__)
+        self.error_logger = error_logger or logging.getLogger(__name__)
+        self.generation = 0
+        self.forks = 0          # sessions that got their own filesystem
+        self.avoided = 0        # sessions closed before a shell request
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()    # one reload at a time
+        self._finalizers = []       # remove the disk files of reloaded generations
+
+    def fork(self) -> FileSystem:
+        with self._lock:
+            self.forks += 1
+        return self.file_system.fork()      # a single attribute read, reloads swap it atomically
+
+    def skipped(self):
+        with self._lock:
+            self.avoided += 1
+
+    def reload(self) -> bool:
+        """Builds and swaps in a new generation, returns False if a reload was already running or failed"""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            start = time.perf_counter()
+            generation = self.generation + 1
+            disk_file = f'{DISK_FILE_NAME}.{os.getpid()}.{generation}'
+            try:
+                file_system = build_template(self.source, disk_file)
+            except Exception:
+                self.error_logger.exception(f'Template reload failed | Generation: {generation}')
+                _remove_disk_file(disk_file, os.getpid())
+                return False
+            if COMPACT_TEMPLATE:
+                file_system.compact()
+
+            # the disk file goes away with the last session still using this generation
+            self._finalizers.append(weakref.finalize(file_system.inodes, _remove_disk_file, disk_file, os.getpid()))
+            self.file_system = file_system
+            self.generation = generation
+
+            inodes, blocks, size = template_size(file_system)
+            dedup = file_system.superblock.dedup_stats()
+            self.command_logger.info(f'Template reloaded | Generation: {generation} | Inodes: {inodes} | '
+                                     f'Blocks: {blocks} | Bytes: {size} | Stored blocks: {dedup["stored_blocks"]} | '
+                                     f'Dedup ratio: {dedup["ratio"]} | Dedup saved: {dedup["bytes_saved"]} | '
+                                     f'Duration: {time.perf_counter() - start:.3f}s')
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def close(self):
+        """Removes every generation disk file, workers exit without running finalizers"""
+        for finalizer in self._finalizers:
+            finalizer()
+
+    def reload_in_background(self):
+        threading.Thread(target=self.reload, name='template-reload', daemon=True).start()
+
+    def watch(self, interval: float):
+        """Reloads whenever the source directory changes, checked every interval seconds"""
+        def run():
+            signature = source_signature(self.source)
+            while True:
+                time.sleep(interval)
+                current = source_signature(self.source)
+                if current != signature:
+                    signature = current
+                    self.reload()
+
+        threading.Thread(target=run, name='template-watch', daemon=True).start()
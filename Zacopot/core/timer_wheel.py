@@ -0,0 +1,61 @@
+import math
+import time
+
+
+class TimerWheel:
+    """Hashed timer wheel, one slot per resolution step. \n
+    Scheduling and cancelling are O(1), advancing only visits the slots whose step has passed.
+    Deadlines further away than one revolution stay in their slot until their round comes"""
+
+    __slots__ = ("resolution", "slots", "entries", "_current")
+
+    def __init__(self, resolution: float, size: int, now: float | None = None):
+        self.resolution = resolution
+        self.slots: list[dict] = [{} for _ in range(size)]     # key -> deadline
+        self.entries = {}           # key -> slot index, used to cancel
+        now = time.monotonic() if now is None else now
+        self._current = int(now / resolution)      # last step that was advanced
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def schedule(self, key, deadline: float):
+        """Schedules or reschedules key"""
+        self.cancel(key)
+        # first step at or after the deadline, so a visited slot only holds entries of later rounds
+        step = max(math.ceil(deadline / self.resolution), self._current + 1)
+        index = step % len(self.slots)
+        self.slots[index][key] = deadline
+        self.entries[key] = index
+
+    def cancel(self, key):
+        index = self.entries.pop(key, None)
+        if index is not None:
+            del self.slots[index][key]
+
+    def advance(self, now: float | None = None) -> list:
+        """Returns every key whose deadline passed, in no particular order"""
+        now = time.monotonic() if now is None else now
+        target = int(now / self.resolution)
+        if target <= self._current:
+            return []
+
+        size = len(self.slots)
+        if target - self._current >= size:     # fell behind by a whole revolution, visit every slot once
+            indexes = range(size)
+        else:
+            indexes = (step % size for step in range(self._current + 1, target + 1))
+        self._current = target
+
+        expired = []
+        for index in indexes:
+            slot = self.slots[index]
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self.entries[key]
+            expired += due
+        return expired
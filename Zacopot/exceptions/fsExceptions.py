@@ -1,23 +1,39 @@
-
-class DirNotFoundException(Exception):
-    __slots__ = "message"
-
-    def __init__(self, message):
-        self.message = message
-        super().__init__(message)
-
-
-class CannotOpenDirException(Exception):
-    __slots__ = "message"
-
-    def __init__(self, message):
-        self.message = message
-        super().__init__(message)
-
-
-class BlockSizeExceededException(Exception):
-    __slots__ = "message"
-
-    def __init__(self, message):
-        self.message = message
-        super().__init__(message)
+
+class DirNotFoundException(Exception):
+    __slots__ = "message"
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class CannotOpenDirException(Exception):
+    __slots__ = "message"
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class BlockSizeExceededException(Exception):
+    __slots__ = "message"
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class ImageFormatException(Exception):
+    __slots__ = "message"
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+class NoSpaceLeftException(Exception):
+    __slots__ = "message"
+
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
@@ -1,4 +1,17 @@
-from core.honeypot import honeypot
-
-if __name__ == '__main__':
-    honeypot()
+import argparse
+
+from core.honeypot import honeypot
+from core.supervisor import supervisor
+from utils.constants import WORKERS, METRICS_PORT
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Zacopot SSH honeypot')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='number of worker processes')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help='serve Prometheus metrics on localhost, workers use consecutive ports')
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        raise SystemExit(supervisor(args.workers, metrics_port=args.metrics_port))
+    else:
+        honeypot(metrics_port=args.metrics_port)
@@ -0,0 +1,260 @@
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+from models.models import Inode, Directory
+
+PERMISSION_CHARS = 'rwxrwxrwx'
+TIMESTAMP_NAMES = ('created', 'modified', 'accessed')
+TIMESTAMP_INDEX = {name: i for i, name in enumerate(TIMESTAMP_NAMES)}
+
+# what a CompactInodeTable is made of, saved as is by core.image
+ARRAY_FIELDS = ("file_types", "sizes", "modes", "hard_links", "owners", "groups", "times", "extent_offsets",
+                "extent_data", "dir_index", "entry_offsets", "entry_inodes", "source_index", "source_mtimes",
+                "compressions")
+STRING_FIELDS = ("names", "dirnames", "paths", "entry_names", "source_paths")
+
+
+def mode_bits(permissions: str) -> int:
+    """'rwxr-xr-x' -> 0o755"""
+    return sum(1 << (8 - i) for i, char in enumerate(permissions) if char != '-')
+
+
+def permission_string(mode: int) -> str:
+    """0o755 -> 'rwxr-xr-x'"""
+    return ''.join(char if mode & (1 << (8 - i)) else '-' for i, char in enumerate(PERMISSION_CHARS))
+
+
+class CompactInodeTable:
+    """Read-only inode table stored as typed arrays indexed by inode number. \n
+    Holds a finished template: sizes, mode bits, link counts, owner and group indexes into interned names and
+    float timestamps live in arrays, extents and directory entries in flat arrays with per-inode offsets.
+    Entry names are sorted per directory and found by bisection. get() hands out thin views, copy() on a view
+    returns a real Inode or Directory, so an InodeTable over this one stays copy-on-write"""
+
+    __slots__ = ("size", "file_types", "sizes", "modes", "hard_links", "owners", "groups", "names", "times",
+                 "extent_offsets", "extent_data", "dir_index", "dirnames", "paths", "entry_offsets", "entry_names",
+                 "entry_inodes", "source_index", "source_paths", "source_mtimes", "compressions",
+                 "_count")
+
+    def __init__(self, inodes):
+        """inodes is any inode table, iterated once"""
+        numbers = sorted(inodes)
+        self.size = numbers[-1] + 1 if numbers else 1
+        self._count = len(numbers)
+        self.file_types = array('b', [-1]) * self.size      # -1 marks a free inode number
+        self.sizes = array('q', [0]) * self.size
+        self.modes = array('H', [0]) * self.size
+        self.hard_links = array('I', [0]) * self.size
+        self.owners = array('H', [0]) * self.size
+        self.groups = array('H', [0]) * self.size
+        self.names: list[str] = []          # owner and group names, stored once
+        self.times = array('d', [0.0]) * (3 * self.size)
+        self.extent_offsets = array('I', [0]) * (self.size + 1)     # extents of n are pairs offsets[n]:offsets[n + 1]
+        self.extent_data = array('Q')
+        self.dir_index = array('i', [-1]) * self.size
+        self.dirnames: list[str] = []
+        self.paths: list[str] = []
+        self.entry_offsets = array('I', [0])
+        self.entry_names: list[str] = []
+        self.entry_inodes = array('I')
+        self.source_index = array('i', [-1]) * self.size     # lazily loaded files only
+        self.source_paths: list[str] = []
+        self.source_mtimes = array('d')
+        self.compressions = array('B', bytes(self.size))
+
+        name_index = {}
+        for inode_number in range(self.size):
+            inode_obj = inodes.get(inode_number)
+            if inode_obj is not None:
+                self._add(inode_number, inode_obj, name_index)
+            self.extent_offsets[inode_number + 1] = len(self.extent_data)
+
+    def _add(self, inode_number: int, inode_obj: Inode | Directory, name_index: dict[str, int]):
+        self.file_types[inode_number] = inode_obj.file_type
+        self.sizes[inode_number] = inode_obj.size
+        self.modes[inode_number] = mode_bits(inode_obj.permissions)
+        self.hard_links[inode_number] = inode_obj.hard_links
+        self.compressions[inode_number] = inode_obj.compression
+        for names, name in ((self.owners, inode_obj.owner), (self.groups, inode_obj.group)):
+            index = name_index.get(name)
+            if index is None:
+                index = name_index[name] = len(self.names)
+                self.names.append(name)
+            names[inode_number] = index
+        for i, name in enumerate(TIMESTAMP_NAMES):
+            self.times[3 * inode_number + i] = inode_obj.timestamps[name].timestamp()
+        for start, length in inode_obj.extents:
+            self.extent_data.extend((start, length))
+        if inode_obj.source is not None:
+            self.source_index[inode_number] = len(self.source_paths)
+            self.source_paths.append(inode_obj.source[0])
+            self.source_mtimes.append(inode_obj.source[1])
+
+        if inode_obj.file_type == 1:
+            self.dir_index[inode_number] = len(self.dirnames)
+            self.dirnames.append(inode_obj.dirname)
+            self.paths.append(inode_obj.path)
+            entries = sorted(inode_obj.entries.items())
+            self.entry_names.extend(name for name, _ in entries)
+            self.entry_inodes.extend(number for _, number in entries)
+            self.entry_offsets.append(len(self.entry_names))
+
+    def sections(self) -> dict[str, array | list[str]]:
+        return {name: getattr(self, name) for name in ARRAY_FIELDS + STRING_FIELDS}
+
+    @classmethod
+    def from_sections(cls, sections: dict, count: int) -> 'CompactInodeTable':
+        """Table over saved sections, the arrays may be memoryviews cast to the same type codes"""
+        table = cls.__new__(cls)
+        for name in ARRAY_FIELDS + STRING_FIELDS:
+            setattr(table, name, sections[name])
+        table.size = len(table.file_types)
+        table._count = count
+        return table
+
+    def get(self, inode_number: int, default=None) -> 'InodeView | DirectoryView | None':
+        if not 0 <= inode_number < self.size or self.file_types[inode_number] == -1:
+            return default
+        if self.file_types[inode_number] == 1:
+            return DirectoryView(self, inode_number)
+        return InodeView(self, inode_number)
+
+    def __getitem__(self, inode_number: int) -> 'InodeView | DirectoryView':
+        inode_obj = self.get(inode_number)
+        if inode_obj is None:
+            raise KeyError(inode_number)
+        return inode_obj
+
+    def __contains__(self, inode_number: int) -> bool:
+        return 0 <= inode_number < self.size and self.file_types[inode_number] != -1
+
+    def __iter__(self):
+        file_types = self.file_types
+        return (inode_number for inode_number in range(self.size) if file_types[inode_number] != -1)
+
+    def __len__(self):
+        return self._count
+
+
+class InodeView:
+    """Inode of a CompactInodeTable, read-only, copy() materializes it"""
+
+    __slots__ = ("table", "inode_number")
+
+    def __init__(self, table: CompactInodeTable, inode_number: int):
+        self.table = table
+        self.inode_number = inode_number
+
+    @property
+    def file_type(self) -> int:
+        return self.table.file_types[self.inode_number]
+
+    @property
+    def size(self) -> int:
+        return self.table.sizes[self.inode_number]
+
+    @property
+    def extents(self) -> list[tuple[int, int]]:
+        table = self.table
+        data = table.extent_data[table.extent_offsets[self.inode_number]:table.extent_offsets[self.inode_number + 1]]
+        return list(zip(data[::2], data[1::2]))
+
+    @property
+    def permissions(self) -> str:
+        return permission_string(self.table.modes[self.inode_number])
+
+    @property
+    def hard_links(self) -> int:
+        return self.table.hard_links[self.inode_number]
+
+    @property
+    def owner(self) -> str:
+        return self.table.names[self.table.owners[self.inode_number]]
+
+    @property
+    def group(self) -> str:
+        return self.table.names[self.table.groups[self.inode_number]]
+
+    @property
+    def source(self) -> tuple[str, float] | None:
+        index = self.table.source_index[self.inode_number]
+        return (self.table.source_paths[index], self.table.source_mtimes[index]) if index != -1 else None
+
+    @property
+    def compression(self) -> int:
+        return self.table.compressions[self.inode_number]
+
+    @property
+    def timestamps(self) -> dict[str, datetime]:
+        times = self.table.times
+        return {name: datetime.fromtimestamp(times[3 * self.inode_number + i])
+                for i, name in enumerate(TIMESTAMP_NAMES)}
+
+    def time(self, name: str) -> float:
+        return self.table.times[3 * self.inode_number + TIMESTAMP_INDEX[name]]
+
+    def __len__(self):
+        table = self.table
+        return sum(table.extent_data[table.extent_offsets[self.inode_number] + 1:
+                                     table.extent_offsets[self.inode_number + 1]:2])
+
+    __format__ = Inode.__format__
+    blocks = Inode.blocks
+
+    def copy(self) -> Inode:
+        new = object.__new__(Inode)
+        self._copy_into(new)
+        return new
+
+    def _copy_into(self, new: Inode):
+        new.inode_number = self.inode_number
+        new.file_type = self.file_type
+        new.size = self.size
+        new.extents = self.extents
+        new.permissions = self.permissions
+        new.hard_links = self.hard_links
+        new.owner = self.owner
+        new.group = self.group
+        new.timestamps = self.timestamps
+        new.source = self.source
+        new.compression = self.compression
+
+
+class DirectoryView(InodeView):
+    __slots__ = ()
+
+    def _entry_range(self) -> tuple[int, int]:
+        index = self.table.dir_index[self.inode_number]
+        return self.table.entry_offsets[index], self.table.entry_offsets[index + 1]
+
+    @property
+    def dirname(self) -> str:
+        return self.table.dirnames[self.table.dir_index[self.inode_number]]
+
+    @property
+    def path(self) -> str:
+        return self.table.paths[self.table.dir_index[self.inode_number]]
+
+    @property
+    def entries(self) -> dict[str, int]:
+        start, end = self._entry_range()
+        return dict(zip(self.table.entry_names[start:end], self.table.entry_inodes[start:end]))
+
+    def get_inode(self, filename: str) -> int | None:
+        start, end = self._entry_range()
+        index = bisect_left(self.table.entry_names, filename, start, end)
+        if index < end and self.table.entry_names[index] == filename:
+            return self.table.entry_inodes[index]
+
+    def list_filenames(self) -> set[str]:
+        start, end = self._entry_range()
+        return set(self.table.entry_names[start:end])
+
+    def copy(self) -> Directory:
+        new = object.__new__(Directory)
+        self._copy_into(new)
+        new.dirname = self.dirname
+        new.path = self.path
+        new.entries = self.entries
+        return new
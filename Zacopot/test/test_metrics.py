@@ -0,0 +1,75 @@
+import gc
+import threading
+import urllib.request
+import weakref
+
+from utils.metrics import Registry, Counter, Histogram, start_metrics_server
+
+
+def test_counter_sums_thread_cells():
+    counter = Counter()
+
+    def work():
+        for _ in range(1000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counter.inc()
+    assert counter.value() == 4001
+    assert len(counter._cells.cells) == 1      # finished threads were folded into the base cell
+
+
+def test_finished_threads_are_not_kept_alive():
+    histogram = Histogram((0.1, 1.0))
+
+    class Connection(threading.Thread):     # like a paramiko Transport recording its handshake
+        def run(self):
+            self.payload = bytearray(1024 * 1024)
+            histogram.observe(0.5)
+
+    threads = [Connection() for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    refs = [weakref.ref(thread) for thread in threads]
+    del threads, thread
+    gc.collect()
+
+    assert all(ref() is None for ref in refs)       # without a collect() from a scrape
+    assert histogram._cells.cells == {}
+    assert histogram.value() == ([0, 10, 10], 5.0, 10)
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.value() == ([2, 3, 4], 2.65, 4)
+
+
+def test_render_and_serve():
+    registry = Registry()
+    commands = registry.counter('test_commands_total', 'Commands', label='command')
+    commands.labels('ls').inc(2)
+    registry.gauge('test_sessions', 'Sessions')
+    registry.set_callback('test_sessions', lambda: 3)
+    registry.histogram('test_seconds', 'Latency', (0.5,)).observe(0.25)
+
+    text = registry.render()
+    assert 'test_commands_total{command="ls"} 2' in text
+    assert '# TYPE test_sessions gauge\ntest_sessions 3' in text
+    assert 'test_seconds_bucket{le="0.5"} 1' in text and 'test_seconds_bucket{le="+Inf"} 1' in text
+
+    server = start_metrics_server('127.0.0.1', 0, registry)
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        assert urllib.request.urlopen(url).read().decode() == registry.render()
+    finally:
+        server.shutdown()
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import signal
+import time
+
+from core.supervisor import Supervisor
+
+
+def read_pids(pid_dir, worker_id: int) -> list[int]:
+    try:
+        with open(os.path.join(pid_dir, f'worker_{worker_id}')) as f:
+            return [int(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_supervisor(pid_dir, workers: int, crash: bool = False, **kwargs) -> multiprocessing.Process:
+    def worker_main(worker_id: int):
+        with open(os.path.join(pid_dir, f'worker_{worker_id}'), 'a') as f:
+            f.write(f'{os.getpid()}\n')
+        if crash:
+            raise RuntimeError('worker failed to start')
+        time.sleep(60)
+
+    def main():
+        raise SystemExit(Supervisor(workers, worker_main, **kwargs).run())
+
+    process = multiprocessing.get_context('fork').Process(target=main)
+    process.start()
+    return process
+
+
+def test_killed_worker_is_restarted(tmp_path):
+    process = run_supervisor(str(tmp_path), 2, restart_delay=0.1)
+    try:
+        assert wait_for(lambda: read_pids(tmp_path, 0) and read_pids(tmp_path, 1))
+        first, sibling = read_pids(tmp_path, 0)[0], read_pids(tmp_path, 1)[0]
+
+        os.kill(first, signal.SIGKILL)
+
+        assert wait_for(lambda: len(read_pids(tmp_path, 0)) == 2)     # same worker id respawned
+        assert read_pids(tmp_path, 0)[1] != first
+        assert read_pids(tmp_path, 1) == [sibling]      # sibling untouched
+        os.kill(sibling, 0)
+    finally:
+        process.terminate()
+        process.join(10)
+
+    assert process.exitcode == 0
+    assert not alive(read_pids(tmp_path, 0)[-1])      # workers are stopped with the supervisor
+    assert not alive(sibling)
+
+
+def test_crashing_worker_stops_supervisor(tmp_path):
+    process = run_supervisor(str(tmp_path), 1, crash=True, restart_delay=0.05, max_restarts=2)
+    process.join(10)
+
+    assert process.exitcode == 1
+    assert len(read_pids(tmp_path, 0)) == 3     # first start and two restarts with backoff
@@ -0,0 +1,80 @@
+import gc
+import os
+
+import pytest
+
+from core.command_parser import command_parser
+from core.filesystem import FileSystem
+from core.image import build_image, load_image
+from core.template import TemplateStore, build_template
+from exceptions.fsExceptions import ImageFormatException
+from utils.block_device import block_device
+
+
+def test_forks_and_avoided_clones_are_counted():
+    template = TemplateStore(FileSystem())
+
+    session = template.fork()
+    assert command_parser(session, 'mkdir tmp') == ''
+    template.skipped()
+    template.skipped()
+
+    assert (template.forks, template.avoided) == (1, 2)
+    assert command_parser(template.file_system, 'ls') == ''     # the template is never written
+
+
+def test_reload_swaps_template_for_new_sessions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'motd').write_text('first')
+
+    template = TemplateStore(build_template(str(source), 'disk_file.bin'), str(source))
+    old_session = template.fork()
+
+    (source / 'motd').write_text('second')
+    assert template.reload()
+    new_session = template.fork()
+
+    assert command_parser(old_session, 'cat motd') == 'first'      # live sessions keep their generation
+    assert command_parser(new_session, 'cat motd') == 'second'
+    assert template.generation == 1
+
+    generation_file = new_session.disk_file
+    assert os.path.exists(generation_file)
+    assert template.reload()
+    del new_session
+    gc.collect()
+    assert not os.path.exists(generation_file)      # removed with the last session of that generation
+
+
+def test_image_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / 'source'
+    (source / 'home' / 'admin').mkdir(parents=True)
+    (source / 'home' / 'admin' / 'passwords.txt').write_text('root:hunter2\n' * 1000)
+    (source / 'motd').write_text('welcome')
+    (source / 'home' / 'admin' / 'motd.bak').write_text('welcome')     # shares the block of motd
+    build_image(str(source), 'fs_image.bin')
+    built = build_template(str(source), 'disk_file.bin')
+
+    image = load_image('fs_image.bin')
+    assert not block_device(image.disk_file).writable       # mapped read-only
+    assert os.path.getsize('fs_image.bin') < 1024 * 1024     # the data region ends at the last used block
+    assert command_parser(image, 'cat motd home/admin/passwords.txt') == \
+        command_parser(built, 'cat motd home/admin/passwords.txt')
+    assert command_parser(image, 'ls -ai home/admin') == command_parser(built, 'ls -ai home/admin')
+    assert command_parser(image, 'df') == command_parser(built, 'df')
+    assert image.superblock.refs == built.superblock.refs != {}
+
+    session = TemplateStore(image, str(source)).fork()
+    assert command_parser(session, 'rm -r home') == ''
+    assert command_parser(session, 'ls') == 'motd'
+    assert command_parser(image, 'ls') == 'home\tmotd'
+
+
+def test_image_version_is_checked(tmp_path):
+    path = tmp_path / 'fs_image.bin'
+    path.write_bytes(b'\0' * 4096)
+    with pytest.raises(ImageFormatException):
+        load_image(str(path))
@@ -0,0 +1,32 @@
+from core.timer_wheel import TimerWheel
+
+
+def test_expires_in_deadline_order():
+    wheel = TimerWheel(resolution=1.0, size=8, now=0.0)
+    wheel.schedule('a', 2.5)
+    wheel.schedule('b', 4.0)
+
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ['a']
+    assert wheel.advance(4.0) == ['b']
+    assert len(wheel) == 0
+
+
+def test_reschedule_and_cancel():
+    wheel = TimerWheel(resolution=1.0, size=8, now=0.0)
+    wheel.schedule('a', 1.0)
+    wheel.schedule('a', 3.0)        # moved, not duplicated
+    wheel.schedule('b', 1.0)
+    wheel.cancel('b')
+
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ['a']
+
+
+def test_deadline_beyond_one_revolution():
+    wheel = TimerWheel(resolution=1.0, size=4, now=0.0)
+    wheel.schedule('a', 6.0)        # shares a slot with step 2
+
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(5.0) == []
+    assert wheel.advance(100.0) == ['a']       # far behind, every slot is visited once
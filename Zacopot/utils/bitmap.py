@@ -0,0 +1,108 @@
+from typing import Iterator
+
+FREE = 0
+USED = 1
+
+
+class Bitmap:
+    """Allocation map of the numbers 1..size with a next-fit cursor. \n
+    One byte per number rather than one bit, so bytearray.find scans for a free number or a free run of any
+    length in C. That is still about 60 times smaller than a set of the free numbers, copies with a single memcpy
+    and keeps its free count without scanning"""
+
+    __slots__ = ("size", "free", "cursor", "_map")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.free = size
+        self.cursor = 1         # searches start after the last allocation and wrap around once
+        self._map = bytearray(size + 1)
+        self._map[0] = USED     # numbers start at 1
+
+    def is_free(self, number: int) -> bool:
+        return 0 < number <= self.size and self._map[number] == FREE
+
+    def find(self, start: int = 1) -> int | None:
+        """First free number from start on, no wrap around"""
+        number = self._map.find(FREE, max(start, 1))
+        return number if number != -1 else None
+
+    def run_end(self, start: int, limit: int) -> int:
+        """End of the free run beginning at start, at most limit"""
+        end = self._map.find(USED, start, min(limit, self.size + 1))
+        return end if end != -1 else min(limit, self.size + 1)
+
+    def runs(self, start: int = 1) -> Iterator[tuple[int, int]]:
+        """Free runs as (first number, length)"""
+        number = self._map.find(FREE, max(start, 1))
+        while number != -1:
+            end = self.run_end(number, self.size + 1)
+            yield number, end - number
+            number = self._map.find(FREE, end)
+
+    def allocate(self) -> int | None:
+        number = self._map.find(FREE, self.cursor)
+        if number == -1:
+            number = self._map.find(FREE, 1, self.cursor)
+            if number == -1:
+                return None
+        self._map[number] = USED
+        self.free -= 1
+        self.cursor = number + 1
+        return number
+
+    def allocate_run(self, count: int) -> int | None:
+        """First number of count contiguous free numbers, None if there is no such run"""
+        run = bytes(count)
+        number = self._map.find(run, self.cursor)
+        if number == -1:
+            number = self._map.find(run, 1, self.cursor + count - 1)
+            if number == -1:
+                return None
+        self.take_run(number, count)
+        self.cursor = number + count
+        return number
+
+    def take(self, number: int):
+        """Marks number used without searching for it"""
+        if self._map[number] == FREE:
+            self._map[number] = USED
+            self.free -= 1
+
+    def take_run(self, start: int, count: int):
+        self.free -= self._map.count(FREE, start, start + count)
+        self._map[start:start + count] = b'\x01' * count
+
+    def release(self, number: int):
+        if self._map[number] == USED:
+            self._map[number] = FREE
+            self.free += 1
+
+    def release_run(self, start: int, count: int):
+        self.free += self._map.count(USED, start, start + count)
+        self._map[start:start + count] = bytes(count)
+
+    def last_used(self) -> int:
+        """Highest used number, 0 if none is used"""
+        return self._map.rfind(USED)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._map)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Bitmap':
+        """Bitmap saved with to_bytes"""
+        new = cls.__new__(cls)
+        new._map = bytearray(data)
+        new.size = len(new._map) - 1
+        new.free = new._map.count(FREE)
+        new.cursor = 1
+        return new
+
+    def copy(self) -> 'Bitmap':
+        new = Bitmap.__new__(Bitmap)
+        new.size = self.size
+        new.free = self.free
+        new.cursor = self.cursor
+        new._map = bytearray(self._map)
+        return new
@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+from utils.constants import BLOCK_SIZE, BLOCK_CACHE_SIZE, DECOMPRESSED_CACHE_SIZE
+
+
+class BlockCache:
+    """Process-wide LRU of disk blocks shared by every session and device. \n
+    Entries are keyed by (device key, block number). Template blocks never change, so once a popular lure has
+    been read its blocks are served from memory. Writes through a device invalidate the blocks they cover"""
+
+    __slots__ = ("capacity", "size", "hits", "misses", "evictions", "_blocks", "_lock")
+
+    def __init__(self, capacity: int = BLOCK_CACHE_SIZE):
+        self.capacity = capacity        # bytes, 0 disables the cache
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._blocks: OrderedDict[tuple[int, int], bytes] = OrderedDict()      # least recently used first
+        self._lock = threading.Lock()
+
+    def get_run(self, device: int, start: int, count: int) -> list[bytes | None]:
+        """Cached blocks start..start+count, None for every miss"""
+        blocks = self._blocks
+        keys = [(device, block_number) for block_number in range(start, start + count)]
+        with self._lock:
+            run = [blocks.get(key) for key in keys]
+            hits = 0
+            for key, data in zip(keys, run):
+                if data is not None:
+                    blocks.move_to_end(key)
+                    hits += 1
+            self.hits += hits
+            self.misses += count - hits
+        return run
+
+    def put_run(self, device: int, start: int, data: bytes):
+        """Caches data read from block start on, split into blocks"""
+        if not self.capacity:
+            return
+        blocks = self._blocks
+        with self._lock:
+            for index, offset in enumerate(range(0, len(data), BLOCK_SIZE)):
+                key = (device, start + index)
+                block = data[offset:offset + BLOCK_SIZE]
+                old = blocks.pop(key, None)
+                if old is not None:
+                    self.size -= len(old)
+                blocks[key] = block
+                self.size += len(block)
+
+            while self.size > self.capacity:
+                _, block = blocks.popitem(last=False)
+                self.size -= len(block)
+                self.evictions += 1
+
+    def invalidate(self, device: int, start: int, count: int):
+        if not self._blocks:
+            return
+        with self._lock:
+            for block_number in range(start, start + count):
+                block = self._blocks.pop((device, block_number), None)
+                if block is not None:
+                    self.size -= len(block)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hit': self.hits, 'miss': self.misses, 'eviction': self.evictions}
+
+
+class ExtentCache:
+    """Process-wide LRU of decompressed file contents, in front of the compressed blocks in the block cache. \n
+    Entries are keyed by (device key, extents) of the compressed file. Deduplicated files may share some of their
+    blocks, only files with the very same extents share an entry. A file larger than a quarter of the capacity is
+    never cached so it cannot flush everything else"""
+
+    __slots__ = ("capacity", "size", "hits", "misses", "evictions", "_contents", "_lock")
+
+    def __init__(self, capacity: int = DECOMPRESSED_CACHE_SIZE):
+        self.capacity = capacity        # bytes, 0 disables the cache
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._contents: OrderedDict[tuple[int, tuple], bytes] = OrderedDict()   # least recently used first
+        self._lock = threading.Lock()
+
+    def cacheable(self, size: int) -> bool:
+        return size <= self.capacity // 4
+
+    def get(self, device: int, extents: tuple[tuple[int, int], ...]) -> bytes | None:
+        key = (device, extents)
+        with self._lock:
+            content = self._contents.get(key)
+            if content is None:
+                self.misses += 1
+            else:
+                self._contents.move_to_end(key)
+                self.hits += 1
+        return content
+
+    def put(self, device: int, extents: tuple[tuple[int, int], ...], content: bytes):
+        if not self.cacheable(len(content)):
+            return
+        key = (device, extents)
+        with self._lock:
+            old = self._contents.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._contents[key] = content
+            self.size += len(content)
+
+            while self.size > self.capacity:
+                _, old = self._contents.popitem(last=False)
+                self.size -= len(old)
+                self.evictions += 1
+
+    def invalidate(self, device: int, start: int, count: int):
+        """Drops contents with any extent in blocks start..start+count, the blocks are being rewritten. \n
+        Writes only happen while a template is built, so the whole cache is scanned"""
+        if not self._contents:
+            return
+        end = start + count
+        with self._lock:
+            for key in [key for key in self._contents if key[0] == device
+                        and any(first < end and start < first + length for first, length in key[1])]:
+                self.size -= len(self._contents.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._contents.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {'hit': self.hits, 'miss': self.misses, 'eviction': self.evictions}
+
+
+BLOCK_CACHE = BlockCache()
+EXTENT_CACHE = ExtentCache()
@@ -0,0 +1,179 @@
+import itertools
+import mmap
+import os
+import threading
+
+from utils.block_cache import BLOCK_CACHE, EXTENT_CACHE, BlockCache
+from utils.constants import BLOCK_SIZE, DISK_FILE_NAME, BLOCK_DEVICE_MMAP
+
+_device_keys = itertools.count(1)
+
+
+class BlockDevice:
+    """Disk image kept open for the life of the process. \n
+    os.pread and os.pwrite carry their own offset and the read-only map is never resized, so one device is
+    shared by every session thread without a lock. Reads through the map are zero-copy memoryview slices,
+    blocks past the mapped size (the image grew after it was opened) are read with pread.
+    Extent reads go through the shared block cache first. A compiled image is opened read-only"""
+
+    __slots__ = ("path", "key", "cache", "writable", "fd", "_map", "_view", "_mapped")
+
+    def __init__(self, path: str, use_mmap: bool = BLOCK_DEVICE_MMAP, cache: BlockCache = BLOCK_CACHE,
+                 writable: bool = True):
+        self.path = path
+        self.key = next(_device_keys)      # cache key, a rebuilt image of the same path never sees old blocks
+        self.cache = cache
+        self.writable = writable
+        self.fd = os.open(path, os.O_RDWR if writable else os.O_RDONLY)
+        size = os.fstat(self.fd).st_size
+        self._map = mmap.mmap(self.fd, size, access=mmap.ACCESS_READ) if use_mmap and size else None
+        self._view = memoryview(self._map) if self._map is not None else None
+        self._mapped = size if self._map is not None else 0     # writes through fd show up in the shared map
+
+    def read(self, block_number: int) -> memoryview | bytes:
+        """One block, a view into the map that stays valid while it is referenced"""
+        offset = block_number * BLOCK_SIZE
+        if offset + BLOCK_SIZE <= self._mapped:
+            return self._view[offset:offset + BLOCK_SIZE]
+        return os.pread(self.fd, BLOCK_SIZE, offset)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if offset + size <= self._mapped:
+            return self._map[offset:offset + size]
+        return os.pread(self.fd, size, offset)
+
+    def view(self, offset: int, size: int) -> memoryview:
+        """Zero-copy view of the mapped image, a copy when the range is not mapped"""
+        if offset + size <= self._mapped:
+            return self._view[offset:offset + size]
+        return memoryview(os.pread(self.fd, size, offset))
+
+    def readinto_at(self, offset: int, buffer: memoryview):
+        """Fills buffer from offset with a single copy or a single preadv call"""
+        size = len(buffer)
+        if offset + size <= self._mapped:
+            buffer[:] = self._view[offset:offset + size]
+        else:
+            os.preadv(self.fd, [buffer], offset)
+
+    def read_extent(self, start: int, count: int) -> list[bytes]:
+        """Blocks start..start+count as byte strings that join to the extent. \n
+        Cached blocks come from the block cache, each run of misses is read with one call and cached"""
+        cache = self.cache
+        if not cache.capacity:
+            return [self.read_at(start * BLOCK_SIZE, count * BLOCK_SIZE)]
+
+        run = cache.get_run(self.key, start, count)
+        if None not in run:
+            return run
+        parts = []
+        index = 0
+        while index < count:
+            if run[index] is not None:
+                parts.append(run[index])
+                index += 1
+                continue
+            end = index + 1
+            while end < count and run[end] is None:
+                end += 1
+            data = self.read_at((start + index) * BLOCK_SIZE, (end - index) * BLOCK_SIZE)
+            cache.put_run(self.key, start + index, data)
+            parts.append(data)
+            index = end
+        return parts
+
+    def readinto_extent(self, start: int, buffer: memoryview):
+        """Fills buffer with the blocks from start on"""
+        if not self.cache.capacity:
+            self.readinto_at(start * BLOCK_SIZE, buffer)
+            return
+        position = 0
+        for data in self.read_extent(start, -(-len(buffer) // BLOCK_SIZE)):
+            size = min(len(data), len(buffer) - position)
+            buffer[position:position + size] = memoryview(data)[:size]
+            position += size
+
+    def write(self, block_number: int, data: bytes):
+        """Writes data from the start of a block on, an extent goes out in one call \n
+        :raises PermissionError"""
+        if not self.writable:
+            raise PermissionError(f'{self.path} is opened read-only')
+        os.pwrite(self.fd, data, block_number * BLOCK_SIZE)
+        self.cache.invalidate(self.key, block_number, -(-len(data) // BLOCK_SIZE))
+        EXTENT_CACHE.invalidate(self.key, block_number, -(-len(data) // BLOCK_SIZE))
+
+    def close(self):
+        self._mapped = 0
+        if self._map is not None:
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:     # a streamed read still holds a block view, the map goes with the last one
+                pass
+        os.close(self.fd)
+
+
+class SourceFile:
+    """Read-only device over a lure file left in the source directory, block numbers count from its start. \n
+    Blocks are read on first use and kept in the shared block cache. The file is opened only for a cache miss,
+    so a large decoy tree holds no file descriptors"""
+
+    __slots__ = ("path", "key", "cache")
+
+    def __init__(self, path: str, cache: BlockCache = BLOCK_CACHE):
+        self.path = path
+        self.key = next(_device_keys)
+        self.cache = cache
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        try:
+            with open(self.path, 'rb') as source:
+                return os.pread(source.fileno(), size, offset)
+        except OSError:     # removed from the source directory, reads as empty
+            return b''
+
+    def readinto_at(self, offset: int, buffer: memoryview):
+        data = self.read_at(offset, len(buffer))
+        buffer[:len(data)] = data
+
+    read_extent = BlockDevice.read_extent
+    readinto_extent = BlockDevice.readinto_extent
+
+
+# Shared devices --------------------------------------------------------------
+
+_devices: dict[str, BlockDevice] = {}
+_devices_lock = threading.Lock()
+
+
+def block_device(path: str = DISK_FILE_NAME, writable: bool = True) -> BlockDevice:
+    """Shared device of a disk image, opened on first use, writable only applies to that first open"""
+    if not os.path.isabs(path):
+        path = os.path.abspath(path)
+    device = _devices.get(path)
+    if device is None:
+        with _devices_lock:
+            device = _devices.get(path)
+            if device is None:
+                device = _devices[path] = BlockDevice(path, writable=writable)
+    return device
+
+
+_sources: dict[tuple[str, float], SourceFile] = {}
+
+
+def source_file(path: str, mtime: float) -> SourceFile:
+    """Shared device of a source file as it was at mtime, a changed file gets new cache keys"""
+    device = _sources.get((path, mtime))
+    if device is None:
+        with _devices_lock:
+            device = _sources.setdefault((path, mtime), SourceFile(path))
+    return device
+
+
+def close_device(path: str = DISK_FILE_NAME):
+    """Closes the shared device of a disk image that is being removed or rebuilt"""
+    with _devices_lock:
+        device = _devices.pop(os.path.abspath(path), None)
+    if device is not None:
+        device.close()
@@ -0,0 +1,28 @@
+import lzma
+import zlib
+from fnmatch import fnmatch
+
+from utils.constants import COMPRESS_MIN_SIZE, COMPRESS_PATTERNS
+
+# codec numbers as kept in Inode.compression, 0 is raw storage
+CODECS = {'zlib': 1, 'lzma': 2}
+
+
+def selected(file_name: str, size: int) -> bool:
+    """Whether a file is worth compressing, by name pattern or size threshold"""
+    if COMPRESS_MIN_SIZE is not None and size >= COMPRESS_MIN_SIZE:
+        return True
+    return any(fnmatch(file_name, pattern) for pattern in COMPRESS_PATTERNS)
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    if codec == 'zlib':
+        return zlib.compress(data, 6)
+    if codec == 'lzma':
+        return lzma.compress(data, preset=6)
+    raise ValueError(f'Unknown compression codec {codec}.')
+
+
+def decompressor(codec_number: int):
+    """Incremental decompressor of a codec number, anything after the end of its stream is ignored"""
+    return zlib.decompressobj() if codec_number == CODECS['zlib'] else lzma.LZMADecompressor()
@@ -1,17 +1,84 @@
-
-BLOCK_SIZE = 4096   # bytes
-
-DISK_FILE_NAME = 'disk_file.bin'
-KEY_PATH = 'secrets/server.key'
-FS_SOURCE_PATH = 'fs_source_dir'
-LOG_DIR = 'logs'
-
-BANNER = b'Welcome to the research data center for the Ukraine Conservation Biology Team!\r\n' + 'Ласкаво просимо до каталогу даних дослідницької групи з охорони біорізноманіття!\r\n'.encode()
-DISTRO = 'debian'
-
-MAX_CONNECTIONS = 20
-MAX_BUFFER_SIZE = 4096
-
-# superblock options
-TOTAL_BLOCKS = 1000
-TOTAL_INODES = 200
+
+BLOCK_SIZE = 4096   # bytes
+
+DISK_FILE_NAME = 'disk_file.bin'
+BLOCK_DEVICE_MMAP = True    # read blocks as views of a read-only mmap of the disk image, False uses pread
+BLOCK_CACHE_SIZE = 16 * 1024 * 1024     # bytes of disk blocks cached for all sessions, 0 disables the cache
+DECOMPRESSED_CACHE_SIZE = 16 * 1024 * 1024  # bytes of decompressed file contents cached, 0 disables it
+KEY_PATH = 'secrets/server.key'
+FS_SOURCE_PATH = 'fs_source_dir'
+LAZY_CONTENT = False    # leave lure contents in FS_SOURCE_PATH and read them on first use, instead of copying
+FS_IMAGE_PATH = 'fs_image.bin'    # compiled FS_SOURCE_PATH, built with python -m core.image and mapped at boot
+TEMPLATE_WATCH_INTERVAL = None  # seconds between checks of FS_SOURCE_PATH for changes, None reloads on SIGHUP only
+LOG_DIR = 'logs'
+
+BANNER = b'Welcome to the research data center for the Ukraine Conservation Biology Team!\r\n' + 'Ласкаво просимо до каталогу даних дослідницької групи з охорони біорізноманіття!\r\n'.encode()
+DISTRO = 'debian'
+
+MAX_CONNECTIONS = 500       # each connection still owns a paramiko transport thread
+MAX_BUFFER_SIZE = 4096      # longest command line before the session is closed
+RECV_SIZE = 4096            # bytes read from a channel per readable event
+OUTPUT_CHUNK_SIZE = 32768   # bytes of streamed command output read and sent at a time
+HISTORY_SIZE = 100          # commands kept for arrow-key history
+
+# session loop options
+SESSION_WORKERS = 8         # threads running shell commands for all sessions
+CLOSE_WORKERS = 2           # threads tearing down finished sessions
+HANDSHAKE_TIMEOUT = 30      # seconds from accept to a shell request
+LOOP_TICK = 1.0             # seconds between handshake timeout checks
+LISTEN_BACKLOG = 512
+MAX_PENDING_HANDSHAKES = 100    # connections between accept and shell request, each owns a transport thread
+SHED_POLICY = 'delay'           # close, tarpit or delay connections beyond MAX_PENDING_HANDSHAKES
+HANDSHAKE_QUEUE_SIZE = 200      # delayed connections waiting for a handshake slot
+HANDSHAKE_QUEUE_TIMEOUT = 10.0  # seconds a delayed connection may wait before it is closed
+SESSION_IDLE_TIMEOUT = 600      # seconds without input before a shell is closed
+SESSION_MAX_DURATION = 3600     # seconds a shell may stay open
+REAPER_RESOLUTION = 1.0         # seconds per timer wheel slot
+REAPER_SLOTS = 1024
+OUTPUT_POLL_INTERVAL = 0.05     # seconds between send window checks of sessions waiting on a slow reader
+
+# metrics options
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = None             # port of the /metrics listener, None disables it
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)   # seconds
+SIZE_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# log writer options
+LOG_QUEUE_SIZE = 10000      # records waiting to be written before new ones are dropped
+LOG_BATCH_SIZE = 256        # records written with a single flush
+LOG_FLUSH_INTERVAL = 0.5    # seconds before a partial batch is flushed
+LOG_OUTPUT_LIMIT = 65536     # bytes of a streamed cat output written to the command log, the rest is counted
+
+# supervisor options
+WORKERS = 1                     # more than one worker enables the multi-process supervisor
+WORKER_RESTART_DELAY = 1.0      # seconds before the first restart of a crashed worker
+WORKER_MAX_RESTART_DELAY = 30.0     # backoff limit for a worker that keeps crashing
+WORKER_MAX_RESTARTS = 5         # crashes of one worker within the window before the supervisor gives up
+WORKER_RESTART_WINDOW = 60.0    # seconds
+
+# admission control options
+ADMISSION_RATE = 1.0            # new connections per second allowed from one ip
+ADMISSION_BURST = 10            # connections one ip may open at once before the rate applies
+ADMISSION_MAX_PER_IP = 10       # concurrent sessions from one ip
+ADMISSION_MIN_LIMIT = 50        # global session limit never adapts below this
+ADMISSION_ADAPT_INTERVAL = 5.0  # seconds between global limit adjustments
+ADMISSION_CPU_HIGH = 0.9        # process cpu seconds per second, above it the limit shrinks
+ADMISSION_LATENCY_HIGH = 2.0    # mean seconds from accept to the first auth attempt, above it the limit shrinks
+
+# tarpit options
+TARPIT_ENABLED = True           # hold rate limited clients instead of closing them
+TARPIT_INTERVAL = 10.0          # seconds between banner lines sent to a held client
+TARPIT_MAX = 1000               # clients held at once, others are closed
+TARPIT_MAX_HOLD = 3600.0        # seconds before a held client is released
+
+# superblock options
+TOTAL_BLOCKS = 262144          # 1 GiB disk image, created sparse
+TOTAL_INODES = 65536
+DISK_DEVICE = '/dev/sda1'       # filesystem name shown by df
+DENTRY_CACHE_SIZE = 1024      # resolved paths kept per filesystem
+DEDUP_BLOCKS = True             # store identical blocks of template files once, with reference counts
+COMPRESSION_CODEC = None        # 'zlib' or 'lzma' stores selected template files compressed, None stores all raw
+COMPRESS_MIN_SIZE = 16384       # files of at least this many bytes are selected, None selects by name only
+COMPRESS_PATTERNS = ('*.csv', '*.sql', '*.log', '*.json', '*.txt')     # names selected whatever their size
+COMPACT_TEMPLATE = True         # keep template inodes in typed arrays, False keeps Inode objects
+LS_TIME_CACHE_SIZE = 4096       # distinct minutes of formatted ls -l times kept
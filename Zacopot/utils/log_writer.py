@@ -0,0 +1,115 @@
+import logging
+import queue
+import threading
+import time
+
+from utils.constants import LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL
+
+
+class QueueLogHandler(logging.Handler):
+    """Formats records on the calling thread and hands them to the log writer without blocking"""
+
+    def __init__(self, writer: 'LogWriter', log_file: str, level=logging.NOTSET):
+        super().__init__(level)
+        self.writer = writer
+        self.log_file = log_file
+
+    def createLock(self):      # nothing is shared with other threads, no lock needed
+        self.lock = None
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + '\n'
+        except Exception:
+            self.handleError(record)
+            return
+        self.writer.put(self.log_file, line)
+
+
+class LogWriter(threading.Thread):
+    """Background writer fed by session threads through a bounded queue. \n
+    Lines are written in batches, flushed by size or time, and dropped (and counted) when the queue is full"""
+
+    def __init__(self, queue_size: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(name='log-writer', daemon=True)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.files = {}             # log file name -> open file
+        self.drop_report_file = None    # where dropped record counts are written
+        self.dropped = 0            # total records dropped because the queue was full
+        self.written = 0
+        self._reported_drops = 0
+        self._drop_lock = threading.Lock()      # only taken when the queue is full
+        self._stop_marker = object()
+
+    def handler(self, log_file: str, formatter: logging.Formatter, level=logging.NOTSET) -> QueueLogHandler:
+        """Returns a logging handler writing to the specified file through this writer"""
+        if log_file not in self.files:
+            self.files[log_file] = open(log_file, 'a', encoding='utf-8')
+        handler = QueueLogHandler(self, log_file, level)
+        handler.setFormatter(formatter)
+        return handler
+
+    def put(self, log_file: str, line: str):
+        try:
+            self.queue.put_nowait((log_file, line))
+        except queue.Full:      # never block a session on logging
+            with self._drop_lock:
+                self.dropped += 1
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def stop(self, timeout: float | None = None):
+        """Drains every queued record, flushes and closes the log files"""
+        if not self.is_alive():
+            for file in self.files.values():
+                file.close()
+            return
+        self.queue.put(self._stop_marker)       # waits for room, unlike session records
+        self.join(timeout)
+
+    def run(self):
+        batch: dict[str, list[str]] = {}
+        batch_len = 0
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is self._stop_marker:
+                stopping = True
+            elif item is not None:
+                log_file, line = item
+                batch.setdefault(log_file, []).append(line)
+                batch_len += 1
+
+            if stopping or batch_len >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                self.written += batch_len
+                batch = {}
+                batch_len = 0
+                deadline = time.monotonic() + self.flush_interval
+
+        for file in self.files.values():
+            file.close()
+
+    def _write(self, batch: dict[str, list[str]]):
+        dropped = self.dropped
+        if dropped != self._reported_drops and self.drop_report_file:
+            report = time.strftime('%Y-%m-%d %H:%M:%S') + \
+                f' | WARNING - Log queue full, dropped {dropped - self._reported_drops} records ({dropped} total)\n'
+            batch.setdefault(self.drop_report_file, []).append(report)
+            self._reported_drops = dropped
+
+        for log_file, lines in batch.items():
+            file = self.files[log_file]
+            file.write(''.join(lines))
+            file.flush()
@@ -0,0 +1,264 @@
+import bisect
+import itertools
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.constants import LATENCY_BUCKETS, SIZE_BUCKETS
+
+
+# Per-thread cells --------------------------------------------------------------
+
+class _CellOwner:
+    """Holds a thread's cell in its thread-local, it goes away with the thread"""
+
+    __slots__ = ("cell", "__weakref__")
+
+    def __init__(self, cell: list):
+        self.cell = cell
+
+
+class _Cells:
+    """Values split into one cell per writing thread. \n
+    A thread only ever writes its own cell, so updates take no lock and cannot be lost.
+    A cell is folded into a shared base cell as soon as its thread exits. Only the thread-local refers to the thread's
+    owner of the cell, so nothing here keeps a finished thread, or what it references, alive"""
+
+    __slots__ = ("size", "base", "cells", "_keys", "_local", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.base = [0] * size
+        self.cells: dict[int, list] = {}       # cells of running threads
+        self._keys = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()       # taken once per thread, on its exit and on collection
+
+    def cell(self) -> list:
+        try:
+            return self._local.owner.cell
+        except AttributeError:
+            cell = [0] * self.size
+            key = next(self._keys)
+            with self._lock:
+                self.cells[key] = cell
+            owner = self._local.owner = _CellOwner(cell)
+            weakref.finalize(owner, self._fold, key)
+            return cell
+
+    def _fold(self, key: int):
+        """The thread owning the cell is gone, its cell can no longer change"""
+        with self._lock:
+            cell = self.cells.pop(key, None)
+            if cell is not None:
+                self.base = [a + b for a, b in zip(self.base, cell)]
+
+    def collect(self) -> list:
+        with self._lock:
+            total = list(self.base)
+            for cell in self.cells.values():
+                total = [a + b for a, b in zip(total, cell)]
+        return total
+
+
+# Metric types ----------------------------------------------------------------
+
+class Counter:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: int | float = 1):
+        self._cells.cell()[0] += amount
+
+    def value(self) -> int | float:
+        return self._cells.collect()[0]
+
+
+class Histogram:
+    """Cumulative buckets plus sum and count, in the Prometheus layout"""
+
+    __slots__ = ("buckets", "_cells")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self._cells = _Cells(len(buckets) + 3)      # bucket counts, +Inf, sum, count
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def value(self) -> tuple[list[int], float, int]:
+        """Returns (cumulative bucket counts including +Inf, sum, count)"""
+        values = self._cells.collect()
+        cumulative = []
+        running = 0
+        for count in values[:-2]:
+            running += count
+            cumulative.append(running)
+        return cumulative, values[-2], values[-1]
+
+
+class Family:
+    """Metric of one type and name with a single label, one child metric per label value"""
+
+    def __init__(self, name: str, kind: str, help_text: str, label: str | None = None, factory=Counter):
+        self.name = name
+        self.kind = kind            # counter, gauge or histogram
+        self.help = help_text
+        self.label = label
+        self.factory = factory
+        self.children = {}          # label value -> metric
+        self.callback = None        # gauges read their value at scrape time
+
+    def labels(self, value: str = ''):
+        child = self.children.get(value)
+        if child is None:
+            child = self.children.setdefault(value, self.factory())     # setdefault keeps the first one on a race
+        return child
+
+    def inc(self, amount: int | float = 1):
+        self.labels().inc(amount)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        if self.callback:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {'': values}
+            return [(self.name, self._label(key), value) for key, value in values.items()]
+
+        samples = []
+        for key, child in list(self.children.items()):
+            if self.kind != 'histogram':
+                samples.append((self.name, self._label(key), child.value()))
+                continue
+            cumulative, total, count = child.value()
+            for bound, value in zip(child.buckets + (float('inf'),), cumulative):
+                labels = self._label(key) | {'le': '+Inf' if bound == float('inf') else repr(bound)}
+                samples.append((self.name + '_bucket', labels, value))
+            samples.append((self.name + '_sum', self._label(key), total))
+            samples.append((self.name + '_count', self._label(key), count))
+        return samples
+
+    def _label(self, value: str) -> dict:
+        return {self.label: value} if self.label and value != '' else {}
+
+
+class Registry:
+    def __init__(self):
+        self.families: dict[str, Family] = {}
+
+    def counter(self, name: str, help_text: str, label: str | None = None) -> Family:
+        return self._add(Family(name, 'counter', help_text, label))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...], label: str | None = None) -> Family:
+        return self._add(Family(name, 'histogram', help_text, label, lambda: Histogram(buckets)))
+
+    def gauge(self, name: str, help_text: str, label: str | None = None, kind: str = 'gauge') -> Family:
+        """Value is read from the callback set with set_callback, kind can be counter for exported totals"""
+        return self._add(Family(name, kind, help_text, label))
+
+    def set_callback(self, name: str, callback):
+        self.families[name].callback = callback
+
+    def render(self) -> str:
+        """Text exposition format"""
+        lines = []
+        for family in self.families.values():
+            lines.append(f'# HELP {family.name} {family.help}')
+            lines.append(f'# TYPE {family.name} {family.kind}')
+            for name, labels, value in family.samples():
+                if labels:
+                    label_text = ','.join(f'{key}="{escape(str(val))}"' for key, val in labels.items())
+                    name = f'{name}{{{label_text}}}'
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, family: Family) -> Family:
+        self.families[family.name] = family
+        return family
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Honeypot metrics ------------------------------------------------------------
+
+REGISTRY = Registry()
+
+SESSIONS_ACTIVE = REGISTRY.gauge('zacopot_sessions_active', 'Open sessions, handshakes included')
+HANDSHAKES_PENDING = REGISTRY.gauge('zacopot_handshakes_pending', 'Sessions between accept and shell request')
+CONNECTIONS_ACCEPTED = REGISTRY.gauge('zacopot_connections_accepted_total', 'Accepted TCP connections',
+                                      kind='counter')
+CONNECTIONS_SHED = REGISTRY.gauge('zacopot_connections_shed_total', 'Connections shed at the handshake limit',
+                                  label='policy', kind='counter')
+HANDSHAKE_QUEUE_DEPTH = REGISTRY.gauge('zacopot_handshake_queue_depth',
+                                       'Connections delayed by the shed policy until a handshake slot frees up')
+HANDSHAKE_QUEUE_WAIT = REGISTRY.histogram('zacopot_handshake_queue_wait_seconds',
+                                          'Seconds from accept to handshake start', LATENCY_BUCKETS)
+SESSION_WORK_DEPTH = REGISTRY.gauge('zacopot_session_work_depth', 'Session work waiting for a free worker')
+SESSION_WORK_WAIT = REGISTRY.histogram('zacopot_session_work_wait_seconds',
+                                       'Seconds from submitting session work to a worker running it', LATENCY_BUCKETS)
+HANDSHAKES = REGISTRY.counter('zacopot_handshakes_total', 'Finished or failed SSH handshakes', label='result')
+HANDSHAKE_SECONDS = REGISTRY.histogram('zacopot_handshake_seconds', 'Seconds from accept to the first auth attempt',
+                                       LATENCY_BUCKETS)
+COMMANDS = REGISTRY.counter('zacopot_commands_total', 'Shell commands run', label='command')
+COMMAND_SECONDS = REGISTRY.histogram('zacopot_command_seconds', 'command_parser dispatch time', LATENCY_BUCKETS,
+                                     label='command')
+BYTES_RECEIVED = REGISTRY.counter('zacopot_bytes_received_total', 'Shell bytes read from clients')
+BYTES_SENT = REGISTRY.counter('zacopot_bytes_sent_total', 'Shell bytes sent to clients')
+LOG_QUEUE_DEPTH = REGISTRY.gauge('zacopot_log_queue_depth', 'Records waiting for the log writer')
+LOG_DROPPED = REGISTRY.gauge('zacopot_log_records_dropped_total', 'Records dropped on a full log queue',
+                             kind='counter')
+SESSION_FS_INODES = REGISTRY.histogram('zacopot_session_filesystem_inodes',
+                                       'Inodes copied into a session filesystem, observed on close', SIZE_BUCKETS)
+BLOCK_CACHE = REGISTRY.gauge('zacopot_block_cache_total', 'Block cache lookups and evictions', label='result',
+                             kind='counter')
+BLOCK_CACHE_BYTES = REGISTRY.gauge('zacopot_block_cache_bytes', 'Disk blocks held by the block cache')
+EXTENT_CACHE = REGISTRY.gauge('zacopot_extent_cache_total', 'Decompressed extent cache lookups and evictions',
+                              label='result', kind='counter')
+EXTENT_CACHE_BYTES = REGISTRY.gauge('zacopot_extent_cache_bytes', 'Decompressed file contents held by the cache')
+DENTRY_LOOKUPS = REGISTRY.counter('zacopot_dentry_lookups_total', 'Session path lookups by dentry cache result',
+                                 label='result')
+TEMPLATE_BLOCKS = REGISTRY.gauge('zacopot_template_blocks', 'Template data blocks stored and referenced by files',
+                                 label='kind')
+TEMPLATE_DEDUP_SAVED = REGISTRY.gauge('zacopot_template_dedup_saved_bytes',
+                                      'Template bytes not stored thanks to shared blocks')
+TEMPLATE_FORKS = REGISTRY.gauge('zacopot_filesystem_forks_total', 'Session filesystems forked or avoided',
+                                label='result', kind='counter')
+
+
+# Exporter --------------------------------------------------------------------
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):      # scrapes are not worth a log line
+        pass
+
+
+def start_metrics_server(host: str, port: int, registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serves /metrics from a daemon thread"""
+    handler = type('MetricsHandler', (MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
@@ -1,175 +1,276 @@
-from models.models import Inode, Directory
-from exceptions.fsExceptions import DirNotFoundException, BlockSizeExceededException
-from utils.constants import BLOCK_SIZE, DISK_FILE_NAME
-
-
-def format_object(inode_obj: Directory | Inode,
-                  file_name: str,
-                  inodes: dict[int, Inode | Directory],
-                  total_blocks: list[int],
-                  options: str | None = '',
-                  long_options: dict[str, str] | None = None
-                  ) -> str:
-    output = ''
-
-    format_options = ''
-
-    show_hidden = False
-    separator = '\t'
-
-    opt_separator = '' if options == '' else ' '
-
-    for op in options:
-        match op:
-            case 'a':
-                show_hidden = True
-            case 'i':
-                format_options += 'i,'
-            case 'l':
-                if long_options:
-                    if long_options['time'] in ('ctime', 'status'):
-                        format_options += 'fp,l,o,g,s,tm,'
-                    elif long_options['time'] in ('birth', 'creation'):
-                        format_options += 'fp,l,o,g,s,tc,'
-                    else:
-                        format_options += 'fp,l,o,g,s,ta,'
-                else:
-                    format_options += 'fp,l,o,g,s,ta,'
-                separator = '\r\n'
-            case 's':
-                format_options += 'bn,'
-
-    format_options = format_options.rstrip(',')  # remove the last ','
-
-    if inode_obj.file_type == 0:  # print file inode data
-        output += f"{inode_obj:{format_options}}{opt_separator}{file_name}{separator}"
-
-    elif inode_obj.file_type == 1:  # is dir
-        for name in sorted(inode_obj.list_filenames()):
-            if not show_hidden and name.startswith('.'):
-                continue
-            file_inode_num = inode_obj.get_inode(name)
-            file_inode_obj = inodes[file_inode_num]
-            total_blocks[0] += len(file_inode_obj)
-            output += f"{file_inode_obj:{format_options}}{opt_separator}{name}{separator}"
-
-    return output
-
-
-def getPath(current_dir_inode: int, inodes: dict[int: Directory]) -> str:
-    """Returns the path to the current directory"""
-
-    if inodes[current_dir_inode].dirname == "/":
-        return "/"
-
-    path = ''
-
-    while inodes[current_dir_inode].dirname != "/":
-        path = inodes[current_dir_inode].dirname + "/" + path
-
-        current_dir_inode = inodes[current_dir_inode].get_inode("..")
-
-    return '/' + path
-
-
-def getInode(path: str, root_inode: int, current_dir_inode: int, inodes: dict[int: Directory]) -> int:
-    """Returns the inode to the specified directory or file \n
-    :raises DirNotFoundException"""
-
-    # dot and dotdot directories
-    match path:
-        case ".":
-            return current_dir_inode
-        case "..":
-            return inodes[current_dir_inode].get_inode("..")
-        case _ if path in ('', '/'):  # root inode
-            return root_inode
-
-    # single-level relative path
-    direct_inode = inodes[current_dir_inode].get_inode(path)
-    if direct_inode is not None:
-        return direct_inode
-
-    path_dirs = path.strip('/').split('/')
-
-    # path starts from current dir or from root dir
-    inode = root_inode if path.startswith('/') else current_dir_inode
-
-    for part in path_dirs:
-        inode_obj: Inode | Directory = inodes.get(inode)
-
-        if inode_obj.file_type == 0:  # check if dir exists
-            raise DirNotFoundException(f"{part} is not a directory.")
-
-        inode = inode_obj.get_inode(part)
-        if inode is None:
-            raise DirNotFoundException(f"{part} not found.")
-
-    return inode
-
-
-def getParentDirInode(path: str, root_inode: int, current_dir_path: str, current_dir_inode: int,
-                      inodes: dict[int: Inode | Directory]) -> Directory:
-    match path:
-        case _ if path.find('/') == -1:  # file is in curr dir
-            parent_dir_path = current_dir_path
-        case _ if '/' not in path.strip('/'):  # file in root dir
-            parent_dir_path = '/'
-        case _:
-            parent_dir_path = path[:path.rfind('/')]
-
-    parent_dir_inode = getInode(parent_dir_path, root_inode, current_dir_inode, inodes)
-    parent_dir_inode_obj = inodes[parent_dir_inode]
-
-    return parent_dir_inode_obj
-
-
-def writeBlock(block_number: int, data: bytes) -> None:
-    """Saves content into a block"""
-    if len(data) > BLOCK_SIZE:
-        raise BlockSizeExceededException(f"Data size {len(data)} exceeds BLOCK_SIZE size {BLOCK_SIZE}.")
-
-    with open(DISK_FILE_NAME, 'r+b') as disk_file:
-        disk_file.seek(block_number * BLOCK_SIZE)
-        disk_file.write(data)
-
-
-def readBlock(block_number: int) -> bytes:
-    """Read block content"""
-    with open(DISK_FILE_NAME, 'rb') as disk_file:
-        disk_file.seek(block_number * BLOCK_SIZE)
-        data = disk_file.read(BLOCK_SIZE)
-
-        return data
-
-
-def block_iter(input_file_name: str):
-    """Creates a generator object consisting of block sized data parts from the initial file"""
-    with open(input_file_name, 'rb') as input_file:
-        while True:
-            block = input_file.read(BLOCK_SIZE)
-            if not block:
-                break
-            yield block
-
-
-# def saveFile(input_file_name: str, allocate_block) -> None:
-#     """Saves file content"""
-#     for block_data in block_iter(input_file_name):
-#         if len(block_data) < BLOCK_SIZE:    # apply padding
-#             print(len(block_data))
-#             block_data = block_data.ljust(BLOCK_SIZE, b'\x00')
-#             print(len(block_data))
-#
-#         block_number = allocate_block()
-#         writeBlock(block_number, block_data)
-
-
-def readFile(inode: Inode | Directory) -> bytes:
-    """Read file content"""
-    content = b''
-
-    for block_number in inode.blocks:
-        content += readBlock(block_number)
-
-    return content[:inode.size]
+from typing import Iterator
+
+from models.models import Inode, Directory, compile_format
+from exceptions.fsExceptions import DirNotFoundException, BlockSizeExceededException
+from utils.block_cache import EXTENT_CACHE
+from utils.block_device import BlockDevice, SourceFile, block_device, source_file
+from utils.compression import decompressor
+from utils.constants import BLOCK_SIZE, DISK_FILE_NAME, OUTPUT_CHUNK_SIZE
+
+
+def format_object(inode_obj: Directory | Inode,
+                  file_name: str,
+                  inodes: dict[int, Inode | Directory],
+                  total_blocks: list[int],
+                  options: str | None = '',
+                  long_options: dict[str, str] | None = None
+                  ) -> str:
+    format_options = ''
+
+    show_hidden = False
+    separator = '\t'
+
+    opt_separator = '' if options == '' else ' '
+
+    for op in options:
+        match op:
+            case 'a':
+                show_hidden = True
+            case 'i':
+                format_options += 'i,'
+            case 'l':
+                if long_options:
+                    if long_options['time'] in ('ctime', 'status'):
+                        format_options += 'fp,l,o,g,s,tm,'
+                    elif long_options['time'] in ('birth', 'creation'):
+                        format_options += 'fp,l,o,g,s,tc,'
+                    else:
+                        format_options += 'fp,l,o,g,s,ta,'
+                else:
+                    format_options += 'fp,l,o,g,s,ta,'
+                separator = '\r\n'
+            case 's':
+                format_options += 'bn,'
+
+    format_row = compile_format(format_options.rstrip(','))    # remove the last ','
+
+    if inode_obj.file_type == 0:  # print file inode data
+        return f"{format_row(inode_obj)}{opt_separator}{file_name}{separator}"
+
+    rows = []
+    for name, file_inode_num in sorted(inode_obj.entries.items()):
+        if not show_hidden and name.startswith('.'):
+            continue
+        file_inode_obj = inodes[file_inode_num]
+        total_blocks[0] += len(file_inode_obj)
+        rows.append(f"{format_row(file_inode_obj)}{opt_separator}{name}{separator}")
+
+    return ''.join(rows)
+
+
+def human_size(size: int) -> str:
+    """Size the way df -h prints it, 1.0G, 13M, 1012M"""
+    for unit in ('', 'K', 'M', 'G', 'T'):
+        if size < 1024 or unit == 'T':
+            break
+        size /= 1024
+    if unit == '':
+        return str(size)
+    return f'{size:.1f}{unit}' if size < 10 else f'{size:.0f}{unit}'
+
+
+def getPath(current_dir_inode: int, inodes: dict[int: Directory]) -> str:
+    """Returns the path to the current directory"""
+
+    if inodes[current_dir_inode].dirname == "/":
+        return "/"
+
+    path = ''
+
+    while inodes[current_dir_inode].dirname != "/":
+        path = inodes[current_dir_inode].dirname + "/" + path
+
+        current_dir_inode = inodes[current_dir_inode].get_inode("..")
+
+    return '/' + path
+
+
+def getInode(path: str, root_inode: int, current_dir_inode: int, inodes: dict[int: Directory],
+             chain: list[int] | None = None) -> int:
+    """Returns the inode to the specified directory or file \n
+    chain, if given, collects the inodes the lookup passed through \n
+    :raises DirNotFoundException"""
+    chain = chain if chain is not None else []
+
+    # dot and dotdot directories
+    match path:
+        case ".":
+            chain.append(current_dir_inode)
+            return current_dir_inode
+        case "..":
+            chain.append(current_dir_inode)
+            chain.append(inodes[current_dir_inode].get_inode(".."))
+            return chain[-1]
+        case _ if path in ('', '/'):  # root inode
+            chain.append(root_inode)
+            return root_inode
+
+    # single-level relative path
+    direct_inode = inodes[current_dir_inode].get_inode(path)
+    if direct_inode is not None:
+        chain.extend((current_dir_inode, direct_inode))
+        return direct_inode
+
+    path_dirs = path.strip('/').split('/')
+
+    # path starts from current dir or from root dir
+    inode = root_inode if path.startswith('/') else current_dir_inode
+    chain.append(inode)
+
+    for part in path_dirs:
+        inode_obj: Inode | Directory = inodes.get(inode)
+
+        if inode_obj.file_type == 0:  # check if dir exists
+            raise DirNotFoundException(f"{part} is not a directory.")
+
+        inode = inode_obj.get_inode(part)
+        if inode is None:
+            raise DirNotFoundException(f"{part} not found.")
+        chain.append(inode)
+
+    return inode
+
+
+def parentPath(path: str, current_dir_path: str) -> str:
+    """Path of the directory holding path"""
+    match path:
+        case _ if path.find('/') == -1:  # file is in curr dir
+            return current_dir_path
+        case _ if '/' not in path.strip('/'):  # file in root dir
+            return '/'
+        case _:
+            return path[:path.rfind('/')]
+
+
+def getParentDirInode(path: str, root_inode: int, current_dir_path: str, current_dir_inode: int,
+                      inodes: dict[int: Inode | Directory]) -> Directory:
+    parent_dir_path = parentPath(path, current_dir_path)
+
+    parent_dir_inode = getInode(parent_dir_path, root_inode, current_dir_inode, inodes)
+    parent_dir_inode_obj = inodes[parent_dir_inode]
+
+    return parent_dir_inode_obj
+
+
+def writeBlock(block_number: int, data: bytes, disk_file_name: str = DISK_FILE_NAME) -> None:
+    """Saves content into a block"""
+    if len(data) > BLOCK_SIZE:
+        raise BlockSizeExceededException(f"Data size {len(data)} exceeds BLOCK_SIZE size {BLOCK_SIZE}.")
+
+    block_device(disk_file_name).write(block_number, data)
+
+
+def writeExtent(start_block: int, data: bytes, disk_file_name: str = DISK_FILE_NAME) -> None:
+    """Saves content into contiguous blocks starting at start_block"""
+    block_device(disk_file_name).write(start_block, data)
+
+
+def readBlock(block_number: int, disk_file_name: str = DISK_FILE_NAME) -> bytes:
+    """Read block content"""
+    return b''.join(block_device(disk_file_name).read_extent(block_number, 1))
+
+
+def block_iter(input_file_name: str):
+    """Creates a generator object consisting of block sized data parts from the initial file"""
+    with open(input_file_name, 'rb') as input_file:
+        while True:
+            block = input_file.read(BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+
+# def saveFile(input_file_name: str, allocate_block) -> None:
+#     """Saves file content"""
+#     for block_data in block_iter(input_file_name):
+#         if len(block_data) < BLOCK_SIZE:    # apply padding
+#             print(len(block_data))
+#             block_data = block_data.ljust(BLOCK_SIZE, b'\x00')
+#             print(len(block_data))
+#
+#         block_number = allocate_block()
+#         writeBlock(block_number, block_data)
+
+
+def inodeDevice(inode: Inode, disk_file_name: str = DISK_FILE_NAME) -> BlockDevice | SourceFile:
+    """Where the extents of an inode point, the disk file or the source file of a lazily loaded inode"""
+    return source_file(*inode.source) if inode.source is not None else block_device(disk_file_name)
+
+
+def decompressedChunks(inode: Inode, device: BlockDevice | SourceFile) -> Iterator[bytes]:
+    """Content of a compressed inode as it is decompressed, extent by extent"""
+    stream = decompressor(inode.compression)
+    for start, length in inode.extents:
+        for data in device.read_extent(start, length):
+            chunk = stream.decompress(data)
+            if chunk:
+                yield chunk
+            if stream.eof:    # the rest of the last block is padding
+                return
+
+
+def readCompressed(inode: Inode, device: BlockDevice | SourceFile) -> bytes:
+    """Content of a compressed inode through the decompressed extent cache"""
+    extents = tuple(inode.extents)      # deduplicated files can share a first block but not all of them
+    content = EXTENT_CACHE.get(device.key, extents)
+    if content is None:
+        content = b''.join(decompressedChunks(inode, device))
+        EXTENT_CACHE.put(device.key, extents, content)
+    return content
+
+
+def readFile(inode: Inode | Directory, disk_file_name: str = DISK_FILE_NAME) -> bytearray | bytes:
+    """Read file content, one cache lookup or device read per extent into a buffer of the file size"""
+    device = inodeDevice(inode, disk_file_name)
+    if inode.compression and inode.size:
+        return readCompressed(inode, device)
+    content = bytearray(inode.size)
+    view = memoryview(content)
+    position = 0
+
+    for start, length in inode.extents:
+        end = min(position + length * BLOCK_SIZE, inode.size)
+        device.readinto_extent(start, view[position:end])
+        position = end
+
+    return content
+
+
+def iterFile(inode: Inode, disk_file_name: str = DISK_FILE_NAME, chunk_size: int = OUTPUT_CHUNK_SIZE):
+    """Generates file content in parts of about chunk_size bytes, the file is never held whole in memory. \n
+    A compressed file small enough for the extent cache is decompressed whole once, larger ones as they stream"""
+    device = inodeDevice(inode, disk_file_name)
+    if inode.compression and inode.size:
+        if EXTENT_CACHE.cacheable(inode.size):
+            content = memoryview(readCompressed(inode, device))
+            for offset in range(0, len(content), chunk_size):
+                yield bytes(content[offset:offset + chunk_size])
+        else:
+            for chunk in decompressedChunks(inode, device):
+                for offset in range(0, len(chunk), chunk_size):
+                    yield chunk[offset:offset + chunk_size]
+        return
+
+    remaining = inode.size
+
+    for start, length in inode.extents:
+        offset = start * BLOCK_SIZE
+        end = offset + min(length * BLOCK_SIZE, remaining)
+        remaining -= end - offset
+
+        while offset < end:
+            size = min(chunk_size, end - offset)
+            yield b''.join(device.read_extent(offset // BLOCK_SIZE, -(-size // BLOCK_SIZE)))[:size]
+            offset += size
+
+
+def rstripped(chunks):
+    """rstrip over a stream of byte chunks, trailing whitespace is held back until more data follows it"""
+    held = b''
+    for chunk in chunks:
+        stripped = chunk.rstrip()
+        if stripped:
+            yield held + stripped
+            held = chunk[len(stripped):]
+        else:
+            held += chunk